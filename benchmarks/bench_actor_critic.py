@@ -0,0 +1,59 @@
+"""
+Forward/backward time of the ActorCritic architectures (64x64 Tanh MLPs).
+
+    python benchmarks/bench_actor_critic.py --batch 8 512
+"""
+import argparse
+import time
+import torch
+import gymnasium as gym
+from rlearn.method.ppo.naive.network.discrete import ActorCritic as ActorCriticDiscrete
+from rlearn.method.ppo.naive.network.continous import ActorCritic as ActorCriticContinous
+
+ARCHS = ('separate', 'stacked', 'shared')
+
+
+def timeit(fn, repeat):
+    for _ in range(3):
+        fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch', type=int, nargs='+', default=[8, 512])
+    parser.add_argument('--obs-dim', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--device', default='cpu')
+    args = parser.parse_args()
+
+    makers = {
+        'discrete': lambda arch: ActorCriticDiscrete((args.obs_dim,), 4, arch=arch),
+        'continuous': lambda arch: ActorCriticContinous((args.obs_dim,), gym.spaces.Box(-1, 1, (2,)), arch=arch),
+    }
+    for kind, make in makers.items():
+        for batch in args.batch:
+            x = torch.randn(batch, args.obs_dim, device=args.device)
+            print(f'{kind} batch={batch} device={args.device}')
+            for arch in ARCHS:
+                net = make(arch).to(args.device)
+                actions = net.get_action_and_value(x)[0]
+
+                def forward():
+                    with torch.no_grad():
+                        net.get_action_and_value(x, compute_entropy=False)
+
+                def forward_backward():
+                    _, log_prob, entropy, value = net.get_action_and_value(x, actions)
+                    (log_prob.mean() + entropy.mean() + value.mean()).backward()
+
+                fwd = timeit(forward, args.repeat)
+                fwd_bwd = timeit(forward_backward, args.repeat)
+                print(f'  {arch:9s} forward {fwd * 1e6:8.1f} us   forward+backward {fwd_bwd * 1e6:8.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark of the GAE backends against the original per-step loop of PPOAgent.
+
+    python benchmarks/bench_gae.py --steps 2048 --num-envs 8
+"""
+import argparse
+import time
+import torch
+from rlearn.method.ppo.naive.gae import compute_gae, GAE_BACKENDS
+
+
+def original_loop(rewards, values, dones, next_value, next_done, gamma, gae_lambda):
+    # PPOAgent._compute_gae_and_returns before the GAE engine (incl. the per-step assert)
+    steps_per_epoch, num_envs = rewards.shape
+    next_value = next_value.reshape(1, -1)
+    advantages = torch.zeros_like(rewards)
+    lastgaelam = 0
+    for t in reversed(range(steps_per_epoch)):
+        if t == steps_per_epoch - 1:
+            nextnonterminal = 1.0 - next_done
+            nextvalues = next_value
+        else:
+            nextnonterminal = 1.0 - dones[t + 1]
+            nextvalues = values[t + 1]
+        delta = rewards[t] + gamma * nextvalues * nextnonterminal - values[t]
+        advantages[t] = lastgaelam = delta + gamma * gae_lambda * nextnonterminal * lastgaelam
+        assert advantages[t].shape == (num_envs, )
+    return advantages, advantages + values
+
+
+def timeit(fn, repeat):
+    fn()  # warmup (jit/numba compilation, discount matrix cache)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--steps', type=int, default=2048)
+    parser.add_argument('--num-envs', type=int, default=8)
+    parser.add_argument('--done-prob', type=float, default=0.01)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--device', default='cpu')
+    args = parser.parse_args()
+
+    gamma, gae_lambda = 0.99, 0.95
+    shape = (args.steps, args.num_envs)
+    rewards = torch.randn(shape, device=args.device)
+    values = torch.randn(shape, device=args.device)
+    next_value = torch.randn(args.num_envs, device=args.device)
+    next_done = torch.zeros(args.num_envs, device=args.device)
+
+    for done_prob in (args.done_prob, 0.0):
+        dones = (torch.rand(shape, device=args.device) < done_prob).float()
+        ref, _ = original_loop(rewards, values, dones, next_value, next_done, gamma, gae_lambda)
+        print(f'steps={args.steps} num_envs={args.num_envs} done_prob={done_prob} device={args.device}')
+        base = timeit(lambda: original_loop(rewards, values, dones, next_value, next_done, gamma, gae_lambda),
+                      args.repeat)
+        print(f'  {"original":12s} {base * 1e3:9.3f} ms')
+        for backend in GAE_BACKENDS:
+            def run():
+                return compute_gae(rewards, values, dones, next_value, next_done,
+                                   gamma, gae_lambda, backend=backend)
+            try:
+                cost = timeit(run, args.repeat)
+            except ImportError as e:
+                print(f'  {backend:12s} skipped ({e})')
+                continue
+            err = (run()[0] - ref).abs().max().item()
+            print(f'  {backend:12s} {cost * 1e3:9.3f} ms  x{base / cost:7.1f}  max_err={err:.2e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Latency/throughput of MicroBatchServer vs. one `predict` call per request (serialized by a lock),
+with `--clients` threads each sending `--requests` requests back to back.
+
+    python benchmarks/bench_inference_server.py --clients 32 --requests 200
+    python benchmarks/bench_inference_server.py --checkpoint final_models/model.pth
+"""
+import argparse
+import threading
+import time
+import numpy as np
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.core.player.naive import BatchedCartPolePlayer
+from rlearn.serving import MicroBatchServer
+
+
+def run_clients(request_fn, states, num_clients, num_requests):
+    latencies = [[] for _ in range(num_clients)]
+    barrier = threading.Barrier(num_clients + 1)
+
+    def client(i):
+        barrier.wait()
+        for j in range(num_requests):
+            state = states[(i * num_requests + j) % len(states)]
+            start = time.perf_counter()
+            request_fn(state)
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(num_clients)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return np.concatenate(latencies), elapsed
+
+
+def report(name, latencies, elapsed):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    print(f'{name:28s} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms   throughput {len(latencies) / elapsed:10.1f} req/s')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checkpoint', default=None, help='saved PPOAgent, an untrained CartPole agent if not given')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, nargs='+', default=[0.5, 2.0])
+    args = parser.parse_args()
+
+    env = BatchedCartPolePlayer(1)
+    if args.checkpoint:
+        agent = PPOAgent.load(args.checkpoint, env)
+    else:
+        agent = PPOAgent(env, config={'cuda': False})
+    states = np.random.default_rng(0).normal(size=(1024,) + agent.state_dim).astype(np.float32)
+
+    lock = threading.Lock()
+
+    def predict_one(state):
+        with lock:
+            return agent.predict(state, deterministic=True)
+
+    print(f'clients={args.clients} requests/client={args.requests} device={agent.device}')
+    report('predict (one at a time)', *run_clients(predict_one, states, args.clients, args.requests))
+    for max_wait_ms in args.max_wait_ms:
+        server = MicroBatchServer(agent, max_batch_size=args.max_batch_size, max_wait_ms=max_wait_ms)
+        with server:
+            latencies, elapsed = run_clients(server.predict, states, args.clients, args.requests)
+        report(f'micro-batch wait={max_wait_ms}ms', latencies, elapsed)
+        print(f'{"":28s} mean batch size {server.num_requests / max(server.num_batches, 1):.1f}')
+    env.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Latency of the exported NumPy policy vs. torch for single states and small batches
+(64x64 Tanh MLP actor).
+
+    python benchmarks/bench_numpy_policy.py --batch 1 8 64
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import torch
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.core.player.naive import BatchedCartPolePlayer, BatchedPendulumPlayer
+from rlearn.serving import NumpyPolicy, NumpyInferenceEngine
+
+
+def timeit(fn, repeat):
+    for _ in range(10):
+        fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+    torch.set_num_threads(1)
+
+    for kind, player_cls in [('discrete', BatchedCartPolePlayer), ('continuous', BatchedPendulumPlayer)]:
+        env = player_cls(1)
+        agent = PPOAgent(env, config={'cuda': False})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'policy.npz'
+            agent.export_policy(path)
+            policy = NumpyPolicy(path)
+            engine = NumpyInferenceEngine(policy, max_batch_size=max(args.batch))
+        net = agent.actor_critic
+        print(f'{kind}')
+        state = np.random.default_rng(0).normal(size=agent.state_dim).astype(np.float32)
+        t = timeit(lambda: agent.predict(state, deterministic=True), args.repeat)
+        print(f'  PPOAgent.predict (single)           {t * 1e6:9.1f} us')
+        for batch in args.batch:
+            states = np.random.default_rng(0).normal(size=(batch,) + agent.state_dim).astype(np.float32)
+
+            def torch_forward():
+                with torch.no_grad():
+                    net.forward_actor(torch.from_numpy(states)).numpy()
+
+            results = {
+                'torch forward_actor': timeit(torch_forward, args.repeat),
+                'PPOAgent.predict_batch': timeit(lambda: agent.predict_batch(states, deterministic=True), args.repeat),
+                'NumpyPolicy.predict': timeit(lambda: policy.predict(states), args.repeat),
+                'NumpyInferenceEngine (argmax/mean)': timeit(lambda: engine.predict(states), args.repeat),
+                'NumpyInferenceEngine (sample)': timeit(lambda: engine.predict(states, deterministic=False), args.repeat),
+            }
+            print(f'  batch={batch}')
+            for name, t in results.items():
+                print(f'    {name:35s} {t * 1e6:9.1f} us')
+        env.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -80,7 +80,15 @@ class BaseAgent(ABC):
     def load_model_dict(self, model_dict):
         raise NotImplementedError()  
     
+    def policy_dict(self):
+        """What inference/evaluation needs (e.g. no optimizer state), loadable by `load_model_dict`"""
+        return self.model_dict()
+
     def checkpoint_dict(self):
+        """
+        State written by `save_checkpoint` and by the background `CheckpointManager` of
+        `OnlineAgentVE.learn`; override this (not `save_checkpoint`) to customize checkpoints.
+        """
         return self.model_dict()
     
     def load_checkpoint_dict(self, checkpoint_dict):
@@ -102,6 +110,7 @@ class BaseAgent(ABC):
         path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
         torch.save(self.checkpoint_dict(), str(path))
+        return path
     
     @classmethod
     def load_checkpoint(cls, path, env):
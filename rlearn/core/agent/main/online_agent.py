@@ -2,7 +2,7 @@ from abc import abstractmethod
 import time
 import uuid
 from pathlib import Path
-from ....utils.recorder import TrajectoryRecorder
+from ....utils.recorder import CompactTrajectoryRecorder
 from ....utils.exit_monitor import ExitMonitor
 from ....utils.i18n import Translator
 from .base_agent import BaseAgent
@@ -68,7 +68,12 @@ class OnlineAgent(BaseAgent):
               improvement_ratio_threshold=None,
               checkpoint_freq=None,
               checkpoint_path='checkpoints',
-              final_model_path=None):
+              final_model_path=None,
+              recorder=None):
+        """
+        recorder: 轨迹记录器, None: 内存中的 `CompactTrajectoryRecorder` (保留完整info);
+            长时间训练使用 `rlearn.utils.trajectory_store.TrajectoryStore` (磁盘memmap或环形缓冲区)
+        """
         if self.env is None:
             raise ValueError("Environment not set. Please call set_env() before learning.")
         exit_monitor = ExitMonitor({
@@ -85,7 +90,7 @@ class OnlineAgent(BaseAgent):
             'improvement_ratio_threshold': improvement_ratio_threshold
         })
         tr = Translator(to_lang=self.lang)
-        trajectory_recorder = TrajectoryRecorder()
+        trajectory_recorder = recorder if recorder is not None else CompactTrajectoryRecorder()
 
         self.before_learn()
         total_steps = 0
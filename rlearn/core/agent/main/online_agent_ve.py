@@ -2,14 +2,23 @@ from abc import abstractmethod
 import time
 import uuid
 import numpy as np
+import torch
 from pathlib import Path
 from collections import deque
 from .base_agent import BaseAgent
 from ....utils.i18n import Translator
 # from ....utils.exit_monitor.exit_monitor_ve import ExitMonitorVE
 from ....utils.exit_monitor.exit_monitor import ExitMonitor
+from ....utils.checkpoint_manager import CheckpointManager
 from torch.utils.tensorboard import SummaryWriter
 
+
+def _to_numpy(x):
+    if isinstance(x, torch.Tensor):
+        return x.detach().cpu().numpy()
+    return np.asarray(x)
+
+
 class OnlineAgentVE(BaseAgent):
     def __init__(self, env=None, config=None, logger=None, seed=None):
         super().__init__(env, config, logger, seed)
@@ -45,8 +54,16 @@ class OnlineAgentVE(BaseAgent):
               checkpoint_freq=None,
               checkpoint_dir='checkpoints',
               final_model_name=None,
-              final_model_dir='final_models'):
+              final_model_dir='final_models',
+              evaluator=None,
+              checkpoint_manager=None):
         """
+        checkpoint_manager: `rlearn.utils.checkpoint_manager.CheckpointManager`, 在后台线程写检查点(含保留策略);
+            None且设置了checkpoint_freq时，使用checkpoint_dir下保留全部检查点的默认manager.
+            manager保存的是 `self.checkpoint_dict()` (自定义检查点内容请重写它).
+            已弃用: 子类重写的 `save_checkpoint(path)` 仍会在训练循环中同步调用(写入manager的目录，
+            不参与保留策略)，并输出警告
+        evaluator: `rlearn.utils.eval_worker.EvalWorker`, 每eval_freq个epoch在后台进程中评估一次，可提前结束训练
         avg_reward := avg reward of all environments in recent reward_window_size episodes
         exit if any:
             (1) avg_reward >= reward_threshold and min_reward_threshold <= avg_reward
@@ -62,113 +79,162 @@ class OnlineAgentVE(BaseAgent):
         )
         if self.env is None:
             raise ValueError("Environment not set. Please call set_env() before learning.")
-        exit_monitor = ExitMonitor({
-            'max_total_steps': max_total_steps,
-            'max_runtime': max_runtime,
-            'max_episodes': max_episodes,
-            'target_episode_reward': target_episode_reward,
-            'reward_window_size': reward_window_size,
-            'min_reward_threshold': min_reward_threshold,
-            'max_episodes_without_improvement': max_episodes_without_improvement,
-        })
-        self.num_envs = self.env.num_envs
-        self.single_action_space = self.env.single_action_space
-        self.single_observation_space = self.env.single_observation_space
-        self.max_epochs = max_epochs
-        self.steps_per_epoch = steps_per_epoch
+        owns_checkpoint_manager = checkpoint_freq and checkpoint_manager is None
+        if owns_checkpoint_manager:
+            checkpoint_manager = CheckpointManager(checkpoint_dir or 'checkpoints')
+        training_failed = True
+        try:
+            if evaluator is not None:
+                evaluator.start(self, log_dir=f"runs/{run_name}")
+            last_checkpoint_episode = 0
+            warned_save_checkpoint = False
+            exit_monitor = ExitMonitor({
+                'max_total_steps': max_total_steps,
+                'max_runtime': max_runtime,
+                'max_episodes': max_episodes,
+                'target_episode_reward': target_episode_reward,
+                'reward_window_size': reward_window_size,
+                'min_reward_threshold': min_reward_threshold,
+                'max_episodes_without_improvement': max_episodes_without_improvement,
+            })
+            self.num_envs = self.env.num_envs
+            self.single_action_space = self.env.single_action_space
+            self.single_observation_space = self.env.single_observation_space
+            self.max_epochs = max_epochs
+            self.steps_per_epoch = steps_per_epoch
         
-        tr = Translator(to_lang=self.lang)
+            tr = Translator(to_lang=self.lang)
         
-        # here: the only `reset`
-        states, infos = self.env.reset()
-        if len(states.shape) == 1:
-            states = states.reshape(-1, 1)
-        # print(states)
-        self.before_learn(states, infos, max_epochs=max_epochs, steps_per_epoch=steps_per_epoch)
-        total_steps = 0
-        start_time = time.time()
+            # here: the only `reset`
+            states, infos = self.env.reset()
+            if len(states.shape) == 1:
+                states = states.reshape(-1, 1)
+            # print(states)
+            self.before_learn(states, infos, max_epochs=max_epochs, steps_per_epoch=steps_per_epoch)
+            total_steps = 0
+            start_time = time.time()
         
-        cur_episode_ends = np.zeros(self.num_envs, dtype=bool) # 当前episode是否结束
-        cur_episode_acc_rewards = np.zeros(self.num_envs) # 当前最新累积的episode reward
-        cur_episode_acc_lengths = np.zeros(self.num_envs) # 当前最新累积的episode length
+            cur_episode_ends = np.zeros(self.num_envs, dtype=bool) # 当前episode是否结束
+            cur_episode_acc_rewards = np.zeros(self.num_envs) # 当前最新累积的episode reward
+            cur_episode_acc_lengths = np.zeros(self.num_envs) # 当前最新累积的episode length
 
-        should_exit_program = False 
-        for epoch in range(max_epochs):
-            if should_exit_program: 
-                break 
-            self.before_episode(epoch=epoch)
-            # 不能在此reset，因为 steps_per_epoch不是真正的结束
-            for epoch_step in range(steps_per_epoch):
-                actions = self.select_action(states, epoch_step=epoch_step)
-                (next_obs, rewards, terminates, truncates, infos) = self.env.step(actions)
-                # TODO: terminates为 True才应看为done 
-                dones = np.logical_or(terminates, truncates) 
-                cur_episode_ends = np.logical_or(terminates, truncates) 
-                assert cur_episode_ends.shape == (self.num_envs, )
+            should_exit_program = False 
+            for epoch in range(max_epochs):
+                if should_exit_program: 
+                    break 
+                self.before_episode(epoch=epoch)
+                # 不能在此reset，因为 steps_per_epoch不是真正的结束
+                for epoch_step in range(steps_per_epoch):
+                    actions = self.select_action(states, epoch_step=epoch_step)
+                    (next_obs, rewards, terminates, truncates, infos) = self.env.step(actions)
+                    # torch-native env: only the episode bookkeeping uses host copies,
+                    # next_obs/rewards/... are passed to `self.step` as tensors
+                    host_rewards, host_terminates, host_truncates = (
+                        _to_numpy(rewards), _to_numpy(terminates), _to_numpy(truncates)
+                    )
+                    # TODO: terminates为 True才应看为done 
+                    dones = np.logical_or(host_terminates, host_truncates) 
+                    cur_episode_ends = dones
+                    assert cur_episode_ends.shape == (self.num_envs, )
                 
-                # 只有episode结束，且next_obs为None时，才用全零状态代替
-                next_obs = np.array([
-                    np.zeros(self.single_observation_space.shape)
-                    if done and obs is None else obs 
-                    for obs, done in zip(next_obs, dones)
-                ])
-                if len(next_obs.shape) == 1:
-                    next_obs = next_obs.reshape(-1, 1)
+                    # 只有episode结束，且next_obs为None时，才用全零状态代替
+                    # batched (numeric ndarray/tensor) observations cannot hold None, skip the per-env loop
+                    if not isinstance(next_obs, (np.ndarray, torch.Tensor)) or next_obs.dtype == object:
+                        next_obs = np.array([
+                            np.zeros(self.single_observation_space.shape)
+                            if done and obs is None else obs
+                            for obs, done in zip(next_obs, dones)
+                        ])
+                    if len(next_obs.shape) == 1:
+                        next_obs = next_obs.reshape(-1, 1)
                 
-                # new 
-                cur_episode_acc_rewards += np.array(rewards)
-                cur_episode_acc_lengths += 1 
+                    # new 
+                    cur_episode_acc_rewards += host_rewards
+                    cur_episode_acc_lengths += 1 
                 
-                total_steps += self.num_envs # 环境步数 
+                    total_steps += self.num_envs # 环境步数 
                 
-                self.step(next_obs, rewards, terminates, truncates, infos,
-                          epoch=epoch, epoch_step=epoch_step)
+                    self.step(next_obs, rewards, terminates, truncates, infos,
+                              epoch=epoch, epoch_step=epoch_step)
                 
-                states = next_obs
+                    states = next_obs
                 
-                # 因为一次时刻可能多个环境完成 
-                if epoch_step == steps_per_epoch - 1:
-                    should_exit_learning, episode_info = self.after_episode(epoch=epoch, total_steps=total_steps)
-                else:
-                    should_exit_learning = False
-                    episode_info = None
+                    # 因为一次时刻可能多个环境完成 
+                    if epoch_step == steps_per_epoch - 1:
+                        should_exit_learning, episode_info = self.after_episode(epoch=epoch, total_steps=total_steps)
+                    else:
+                        should_exit_learning = False
+                        episode_info = None
                 
-                if np.sum(cur_episode_ends) > 0:
-                    # 有新episode 
-                    # 只用到了cur_episode_ends真的数据  
-                    should_exit, exit_reason = exit_monitor.should_exit(
-                        total_steps,
-                        cur_episode_ends,
-                        cur_episode_acc_rewards, 
-                        cur_episode_acc_lengths
-                    ) 
+                    if np.sum(cur_episode_ends) > 0:
+                        # 有新episode 
+                        # 只用到了cur_episode_ends真的数据  
+                        should_exit, exit_reason = exit_monitor.should_exit(
+                            total_steps,
+                            cur_episode_ends,
+                            cur_episode_acc_rewards, 
+                            cur_episode_acc_lengths
+                        ) 
 
-                    if should_exit:
-                        self.logger.info(f"{tr('exit_reason')}: {tr(exit_reason)}")
-                        should_exit_program = True
-                        break 
-                for r in cur_episode_acc_rewards[cur_episode_ends]:
-                    self.writer.add_scalar("charts/episodic_return", r, total_steps)
-                for l in cur_episode_acc_lengths[cur_episode_ends]:
-                    self.writer.add_scalar("charts/episodic_length", l, total_steps)
+                        if should_exit:
+                            self.logger.info(f"{tr('exit_reason')}: {tr(exit_reason)}")
+                            should_exit_program = True
+                            break 
+                    for r in cur_episode_acc_rewards[cur_episode_ends]:
+                        self.writer.add_scalar("charts/episodic_return", r, total_steps)
+                    for l in cur_episode_acc_lengths[cur_episode_ends]:
+                        self.writer.add_scalar("charts/episodic_length", l, total_steps)
                
-                cur_episode_acc_rewards[cur_episode_ends] = 0 
-                cur_episode_acc_lengths[cur_episode_ends] = 0 
+                    cur_episode_acc_rewards[cur_episode_ends] = 0 
+                    cur_episode_acc_lengths[cur_episode_ends] = 0 
 
-                if should_exit_learning: 
-                    self.logger.info(f'Early stopping: {str(episode_info)}')
-                    should_exit_program = True 
-                    break
+                    if should_exit_learning: 
+                        self.logger.info(f'Early stopping: {str(episode_info)}')
+                        should_exit_program = True 
+                        break
             
-            if checkpoint_freq and exit_monitor.episode_count % checkpoint_freq == 0:
-                checkpoint_dir = checkpoint_dir or 'checkpoints'
-                checkpoint_file = Path(checkpoint_dir) / f'checkpoint_episode_{exit_monitor.episode_count}.pth'
-                # in case of user overridding save-method
-                checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
-                self.save_checkpoint(str(checkpoint_file))
-                self.logger.info(tr('checkpoint_saved') + f': {checkpoint_file}')
+                # 只在episode_count跨过checkpoint_freq的整数倍时保存(没有新episode的epoch不重复保存)
+                if checkpoint_freq and exit_monitor.episode_count // checkpoint_freq > last_checkpoint_episode // checkpoint_freq:
+                    last_checkpoint_episode = exit_monitor.episode_count
+                    recent_rewards = exit_monitor.recent_rewards
+                    checkpoint_name = f'checkpoint_episode_{exit_monitor.episode_count}.pth'
+                    if type(self).save_checkpoint is BaseAgent.save_checkpoint:
+                        checkpoint_file = checkpoint_manager.save(
+                            checkpoint_name,
+                            self.checkpoint_dict(),
+                            metric=float(np.mean(recent_rewards)) if recent_rewards else None,
+                        )
+                        self.logger.info(tr('checkpoint_queued') + f': {checkpoint_file}')
+                    else:
+                        # in case of user overridding save-method (已弃用): 同步写入，不参与保留策略
+                        if not warned_save_checkpoint:
+                            self.logger.warning(
+                                f'{type(self).__name__} overrides save_checkpoint(path), which is deprecated: '
+                                'checkpoints are written synchronously without the retention policy of the '
+                                'checkpoint manager, override checkpoint_dict() instead'
+                            )
+                            warned_save_checkpoint = True
+                        checkpoint_file = Path(checkpoint_manager.checkpoint_dir) / checkpoint_name
+                        checkpoint_file.parent.mkdir(parents=True, exist_ok=True)
+                        self.save_checkpoint(str(checkpoint_file))
+                        self.logger.info(tr('checkpoint_saved') + f': {checkpoint_file}')
+
+                if evaluator is not None and not should_exit_program:
+                    # 只提交快照并收集已完成的结果，不等待评估
+                    if evaluator.should_eval(epoch):
+                        evaluator.submit(epoch, total_steps, self)
+                    evaluator.poll()
+                    should_exit, eval_exit_reason = evaluator.should_exit()
+                    if should_exit:
+                        exit_reason = eval_exit_reason
+                        self.logger.info(f"{tr('exit_reason')}: {tr(exit_reason)}")
+                        should_exit_program = True
                 
-        self.after_learn()
+            self.after_learn()
+            training_failed = False
+        finally:
+            # 异常时也要结束评估进程与检查点写入线程
+            self._close_background_workers(evaluator, checkpoint_manager, owns_checkpoint_manager, training_failed)
         
         end_time = time.time()
         training_duration = end_time - start_time
@@ -193,9 +259,33 @@ class OnlineAgentVE(BaseAgent):
             'final_model_file': final_model_file,
             'best_avg_reward': exit_monitor.best_avg_reward,
         }
+        if evaluator is not None:
+            learning_info['best_eval_reward'] = evaluator.best_eval_reward
+            learning_info['eval_results'] = evaluator.results
 
         return learning_info
     
+    def _close_background_workers(self, evaluator, checkpoint_manager, owns_checkpoint_manager, training_failed):
+        """
+        Stop the eval worker (pending evaluations are only awaited if `evaluator.wait_at_exit`,
+        never after an exception) and flush the checkpoint writer; errors raised here do not hide
+        the exception of a failed training.
+        """
+        closers = []
+        if evaluator is not None:
+            closers.append(lambda: evaluator.close(wait=False if training_failed else None))
+        if owns_checkpoint_manager:
+            closers.append(checkpoint_manager.close)
+        elif checkpoint_manager is not None:
+            closers.append(checkpoint_manager.wait)
+        for close in closers:
+            try:
+                close()
+            except Exception as e:
+                if not training_failed:
+                    raise
+                self.logger.error(f'Error while cleaning up after a failed training: {e}')
+
     @abstractmethod
     def select_action(self, states, epoch_step, *args, **kwargs):
         raise NotImplementedError()
@@ -0,0 +1,3 @@
+from .rollout import RolloutBuffer, RolloutBatch, PackedMinibatchSampler, FrameStackRolloutBuffer
+
+__all__ = ['RolloutBuffer', 'RolloutBatch', 'PackedMinibatchSampler', 'FrameStackRolloutBuffer']
@@ -0,0 +1,215 @@
+from typing import Dict, Iterator, NamedTuple, Optional, Sequence, Tuple
+import torch
+
+
+class RolloutBatch(NamedTuple):
+    obs: torch.Tensor
+    actions: torch.Tensor
+    log_probs: torch.Tensor
+    advantages: torch.Tensor
+    returns: torch.Tensor
+    values: torch.Tensor
+
+
+class RolloutBuffer:
+    """
+    Preallocated on-policy rollout storage, time-major `(steps, num_envs, *shape)`.
+
+    All fields of the same dtype live in one contiguous flat tensor (struct-of-arrays), allocated
+    once directly on `device`; each field is a view into it, so writing `buffer['rewards'][t] = r`
+    writes the storage in place. Observations can be kept in a narrower dtype
+    (e.g. `torch.float16`/`torch.bfloat16`) to halve rollout memory and bandwidth.
+
+    Default fields: obs, actions, log_probs, rewards, dones, values, advantages, returns.
+    Extra fields are given as `{name: (shape, dtype)}`, e.g. `{'terminations': ((), torch.float32)}`.
+    """
+
+    def __init__(self, steps, num_envs, obs_shape, action_shape=(), device='cpu',
+                 obs_dtype=torch.float32, action_dtype=torch.float32,
+                 extra_fields: Optional[Dict[str, Tuple[Sequence[int], torch.dtype]]] = None):
+        self.steps = steps
+        self.num_envs = num_envs
+        self.batch_size = steps * num_envs
+        self.device = torch.device(device)
+        specs = {
+            'obs': (tuple(obs_shape), obs_dtype),
+            'actions': (tuple(action_shape), action_dtype),
+            'log_probs': ((), torch.float32),
+            'rewards': ((), torch.float32),
+            'dones': ((), torch.float32),
+            'values': ((), torch.float32),
+            'advantages': ((), torch.float32),
+            'returns': ((), torch.float32),
+        }
+        for name, (shape, dtype) in (extra_fields or {}).items():
+            if name in specs:
+                raise ValueError(f'Field `{name}` already exists')
+            specs[name] = (tuple(shape), dtype)
+        self.specs = specs
+        self.storages, self.fields = _allocate(self._stored_specs(), (steps, num_envs), self.device)
+
+    def _stored_specs(self):
+        """specs of the fields kept as `(steps, num_envs, *shape)` storage"""
+        return self.specs
+
+    def __getitem__(self, name) -> torch.Tensor:
+        return self.fields[name]
+
+    def __contains__(self, name):
+        return name in self.fields
+
+    def flat(self, name) -> torch.Tensor:
+        """`(steps * num_envs, *shape)` view of a field"""
+        shape, _ = self.specs[name]
+        return self.fields[name].view((self.batch_size,) + shape)
+
+    def set_obs(self, t, obs):
+        """Store the `(num_envs, *obs_shape)` observations of step `t`"""
+        self.fields['obs'][t] = obs
+
+    def gather(self, name, indices, out=None) -> torch.Tensor:
+        """`flat(name)[indices]`, written into `out` if given"""
+        return torch.index_select(self.flat(name), 0, indices, out=out)
+
+    def flat_slice(self, name, start, stop) -> torch.Tensor:
+        """`flat(name)[start:stop]`, a view without copying"""
+        return self.flat(name)[start:stop]
+
+    def reset(self):
+        for storage in self.storages.values():
+            storage.zero_()
+
+    def iter_minibatches(self, minibatch_size, shuffle=True, generator=None) -> Iterator[RolloutBatch]:
+        """
+        Iterate over the flattened rollout in minibatches of `minibatch_size` (the last one may be smaller).
+        Without `shuffle` every minibatch is a contiguous slice, i.e. a view without copying;
+        with `shuffle` the indices are permuted on device and each minibatch is gathered.
+        See `PackedMinibatchSampler` for shuffling with a single gather per field.
+        """
+        if not shuffle:
+            for start in range(0, self.batch_size, minibatch_size):
+                yield RolloutBatch(*[self.flat_slice(name, start, start + minibatch_size)
+                                     for name in RolloutBatch._fields])
+            return
+        indices = torch.randperm(self.batch_size, device=self.device, generator=generator)
+        for start in range(0, self.batch_size, minibatch_size):
+            mb_indices = indices[start:start + minibatch_size]
+            yield RolloutBatch(*[self.gather(name, mb_indices) for name in RolloutBatch._fields])
+
+
+class PackedMinibatchSampler:
+    """
+    Shuffled minibatches of a `RolloutBuffer` with one gather per field and epoch.
+
+    Each call of `iter_minibatches` draws one device-side permutation, gathers every field of
+    `RolloutBatch` into a preallocated packed buffer (`index_select(out=...)`), and yields
+    contiguous slices of it, so the minibatches themselves are views without copying.
+    The yielded views are overwritten by the next `iter_minibatches` call.
+    """
+
+    def __init__(self, buffer: RolloutBuffer):
+        self.buffer = buffer
+        specs = {name: buffer.specs[name] for name in RolloutBatch._fields}
+        self.storages, self.fields = _allocate(specs, (buffer.batch_size,), buffer.device)
+
+    def iter_minibatches(self, minibatch_size, generator=None) -> Iterator[RolloutBatch]:
+        buffer = self.buffer
+        indices = torch.randperm(buffer.batch_size, device=buffer.device, generator=generator)
+        packed = []
+        for name in RolloutBatch._fields:
+            buffer.gather(name, indices, out=self.fields[name])
+            packed.append(self.fields[name])
+        for start in range(0, buffer.batch_size, minibatch_size):
+            yield RolloutBatch(*[x[start:start + minibatch_size] for x in packed])
+
+
+class FrameStackRolloutBuffer(RolloutBuffer):
+    """
+    `RolloutBuffer` for frame-stacked observations `(num_stack, *frame_shape)` (see `FrameStackPlayer`)
+    that stores every frame only once instead of `num_stack` times.
+
+    The frames are kept as `(num_stack - 1 + steps, num_envs, *frame_shape)`: the full stack of the
+    first step followed by the newest frame of every step. The stack of step `t` is gathered at
+    minibatch time as frames `[t, t + num_stack - 1]`, clamped to the first frame of the episode when
+    `dones` marks an episode start in between (a reset observation is its first frame repeated).
+
+    `obs` is not a field (`buffer['obs']` does not exist); use `set_obs`/`gather`/`iter_minibatches`.
+    """
+
+    def __init__(self, steps, num_envs, obs_shape, action_shape=(), device='cpu',
+                 obs_dtype=torch.float32, action_dtype=torch.float32,
+                 extra_fields: Optional[Dict[str, Tuple[Sequence[int], torch.dtype]]] = None):
+        super().__init__(steps, num_envs, obs_shape, action_shape=action_shape, device=device,
+                         obs_dtype=obs_dtype, action_dtype=action_dtype, extra_fields=extra_fields)
+        self.num_stack = obs_shape[0]
+        self.frame_shape = tuple(obs_shape[1:])
+        self.frames = torch.zeros((self.num_stack - 1 + steps, num_envs) + self.frame_shape,
+                                  dtype=obs_dtype, device=self.device)
+
+    def _stored_specs(self):
+        return {name: spec for name, spec in self.specs.items() if name != 'obs'}
+
+    def set_obs(self, t, obs):
+        if t == 0:
+            self.frames[:self.num_stack].copy_(obs.transpose(0, 1))
+        else:
+            self.frames[self.num_stack - 1 + t].copy_(obs[:, -1])
+
+    def frame_indices(self, indices) -> torch.Tensor:
+        """flat rollout indices `(n,)` -> flat frame indices `(n, num_stack)`, oldest frame first"""
+        steps, num_envs, k = self.steps, self.num_envs, self.num_stack
+        t = torch.arange(steps, device=self.device)
+        # states[t]为新episode的第一个状态(reset observation): dones[t - 1]
+        first = torch.zeros((steps, num_envs), dtype=torch.bool, device=self.device)
+        first[1:] = self.fields['dones'][:-1] > 0
+        # 当前episode第一帧所在位置
+        start = torch.cummax(torch.where(first, (t + k - 1)[:, None], 0), dim=0).values.view(-1)
+
+        step = torch.div(indices, num_envs, rounding_mode='floor')
+        env = indices - step * num_envs
+        slots = torch.maximum(step[:, None] + torch.arange(k, device=self.device), start[indices, None])
+        return slots * num_envs + env[:, None]
+
+    def gather(self, name, indices, out=None) -> torch.Tensor:
+        if name != 'obs':
+            return super().gather(name, indices, out=out)
+        frames = self.frames.view((-1,) + self.frame_shape)
+        frame_indices = self.frame_indices(indices).view(-1)
+        if out is not None:
+            torch.index_select(frames, 0, frame_indices, out=out.view((-1,) + self.frame_shape))
+            return out
+        return frames.index_select(0, frame_indices).view((len(indices), self.num_stack) + self.frame_shape)
+
+    def flat_slice(self, name, start, stop) -> torch.Tensor:
+        if name != 'obs':
+            return super().flat_slice(name, start, stop)
+        return self.gather(name, torch.arange(start, min(stop, self.batch_size), device=self.device))
+
+    def reset(self):
+        super().reset()
+        self.frames.zero_()
+
+
+def _allocate(specs, leading_shape, device):
+    """同dtype的字段共享一块连续存储, returns (storages by dtype, field views by name)"""
+    leading_numel = _numel(leading_shape)
+    numels = {}
+    for name, (shape, dtype) in specs.items():
+        numels.setdefault(dtype, 0)
+        numels[dtype] += leading_numel * _numel(shape)
+    storages = {dtype: torch.zeros(n, dtype=dtype, device=device) for dtype, n in numels.items()}
+
+    fields: Dict[str, torch.Tensor] = {}
+    offsets = {dtype: 0 for dtype in numels}
+    for name, (shape, dtype) in specs.items():
+        n = leading_numel * _numel(shape)
+        fields[name] = storages[dtype].narrow(0, offsets[dtype], n).view(tuple(leading_shape) + shape)
+        offsets[dtype] += n
+    return storages, fields
+
+
+def _numel(shape):
+    n = 1
+    for s in shape:
+        n *= s
+    return n
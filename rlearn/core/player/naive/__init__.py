@@ -1,7 +1,13 @@
 from .env_player import EnvPlayer
 from .base import BaseVecEnvPlayer
 from .sync_vec_env import SyncVecEnvPlayer, make_vec_env_player
-# TODO
-# from .async_vec_env import AsyncVecEnvPlayer
+from .async_vec_env import AsyncVecEnvPlayer
+from .sharded_vec_env import ShardedVecEnvPlayer
+from .batched_env import BatchedEnvPlayer
+from .batched_classic_control import BatchedCartPolePlayer, BatchedPendulumPlayer
+from .frame_stack import FrameStackPlayer
+from .normalize import NormalizeVecEnvPlayer, RunningMeanStd
 
-__all__ = ['EnvPlayer', 'BaseVecEnvPlayer', 'SyncVecEnvPlayer', 'make_vec_env_player']
\ No newline at end of file
+__all__ = ['EnvPlayer', 'BaseVecEnvPlayer', 'SyncVecEnvPlayer', 'AsyncVecEnvPlayer', 'ShardedVecEnvPlayer',
+           'BatchedEnvPlayer', 'BatchedCartPolePlayer', 'BatchedPendulumPlayer', 'FrameStackPlayer',
+           'NormalizeVecEnvPlayer', 'RunningMeanStd', 'make_vec_env_player']
\ No newline at end of file
@@ -0,0 +1,308 @@
+import time
+import traceback
+import multiprocessing as mp
+from multiprocessing.connection import wait
+import numpy as np
+import cloudpickle
+from .base import BaseVecEnvPlayer
+
+
+class CloudpickleWrapper:
+    """Wrap env_fn so that lambdas/closures can be sent to worker processes"""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __getstate__(self):
+        return cloudpickle.dumps(self.fn)
+
+    def __setstate__(self, state):
+        self.fn = cloudpickle.loads(state)
+
+    def __call__(self):
+        return self.fn()
+
+
+def _make_shared_array(ctx, shape, dtype):
+    """Allocate a raw (lock-free) shared buffer large enough for `shape` x `dtype`"""
+    nbytes = int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+    return ctx.RawArray('b', max(nbytes, 1))
+
+
+def _as_numpy(shared, shape, dtype):
+    return np.frombuffer(shared, dtype=dtype, count=int(np.prod(shape, dtype=np.int64))).reshape(shape)
+
+
+def _worker(index, env_fns, remote, parent_remote, shared_buffers, num_envs, env_slice, obs_shape, obs_dtype):
+    """
+    Worker loop: owns the envs of `env_slice`, steps them in a tight local loop and writes
+    obs/reward/terminated/truncated straight into its rows of the shared buffers.
+    Only the infos of the slice are sent back through the pipe, as one message per command.
+    """
+    parent_remote.close()
+    shared_obs, shared_rewards, shared_terminateds, shared_truncateds = shared_buffers
+    observations = _as_numpy(shared_obs, (num_envs,) + obs_shape, obs_dtype)[env_slice]
+    rewards = _as_numpy(shared_rewards, (num_envs,), np.float32)[env_slice]
+    terminateds = _as_numpy(shared_terminateds, (num_envs,), np.bool_)[env_slice]
+    truncateds = _as_numpy(shared_truncateds, (num_envs,), np.bool_)[env_slice]
+
+    envs = [env_fn() for env_fn in env_fns]
+    should_reset = np.zeros(len(envs), dtype=np.bool_)
+    infos = [None] * len(envs)
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == 'reset':
+                seeds, options = data
+                for i, (env, seed) in enumerate(zip(envs, seeds)):
+                    observations[i], infos[i] = env.reset(seed=seed, options=options)
+                should_reset[:] = False
+                remote.send((list(infos), True))
+            elif command == 'step':
+                # data: (local env ids or None for the whole slice, actions)
+                local_ids, actions = data
+                if local_ids is None:
+                    local_ids = range(len(envs))
+                for i, action in zip(local_ids, actions):
+                    # 与SyncVecEnvPlayer一致: 上一步结束的环境在本步自动重置
+                    if should_reset[i]:
+                        observations[i], infos[i] = envs[i].reset()
+                        rewards[i] = 0.0
+                        terminateds[i] = False
+                        truncateds[i] = False
+                    else:
+                        (
+                            observations[i],
+                            rewards[i],
+                            terminateds[i],
+                            truncateds[i],
+                            infos[i]
+                        ) = envs[i].step(action)
+                    should_reset[i] = terminateds[i] or truncateds[i]
+                remote.send(([infos[i] for i in local_ids], True))
+            elif command == 'render':
+                remote.send(([env.render() for env in envs], True))
+            elif command == 'close':
+                remote.send((None, True))
+                break
+            else:
+                raise RuntimeError(f'Unknown command `{command}` received by worker {index}')
+    except (KeyboardInterrupt, Exception):
+        remote.send((traceback.format_exc(), False))
+    finally:
+        for env in envs:
+            env.close()
+
+
+class AsyncVecEnvPlayer(BaseVecEnvPlayer):
+    """
+    永续环境，当环境终止时，会自动重置环境，并继续执行下一个环境。
+
+    AsyncVecEnvPlayer runs the envs in worker processes (one env per worker by default).
+    Observations, rewards and done flags are written by the workers into preallocated
+    shared-memory NumPy buffers, so only actions and infos go through the pipes.
+    Reference:
+        https://github.com/Farama-Foundation/Gymnasium/blob/main/gymnasium/vector/async_vector_env.py
+    """
+
+    def __init__(self, env_fns, copy=True, context=None, daemon=True, envs_per_worker=1, **kwargs):
+        """
+        Args:
+            copy (bool): Whether to return copies of the shared buffers from `reset`/`step`.
+                If False, the returned arrays are views that are overwritten by the next call.
+            context (str): multiprocessing start method, e.g. 'fork', 'spawn', 'forkserver'.
+            daemon (bool): Whether the worker processes are daemonic.
+            envs_per_worker (int): Number of envs stepped sequentially by each worker process.
+        """
+        # NOTE: 不调用BaseVecEnvPlayer.__init__，环境只在子进程中创建
+        dummy_env = env_fns[0]()
+        self._single_action_space = dummy_env.action_space
+        self._single_observation_space = dummy_env.observation_space
+        dummy_env.close()
+        del dummy_env
+        self.envs = None
+        self._num_envs = len(env_fns)
+        self._is_closed = False
+        self.copy = copy
+
+        ctx = mp.get_context(context)
+        obs_shape = self.single_observation_space.shape
+        obs_dtype = self.single_observation_space.dtype
+        self._shared_buffers = (
+            _make_shared_array(ctx, (self.num_envs,) + obs_shape, obs_dtype),
+            _make_shared_array(ctx, (self.num_envs,), np.float32),
+            _make_shared_array(ctx, (self.num_envs,), np.bool_),
+            _make_shared_array(ctx, (self.num_envs,), np.bool_),
+        )
+        shared_obs, shared_rewards, shared_terminateds, shared_truncateds = self._shared_buffers
+        self._observations = _as_numpy(shared_obs, (self.num_envs,) + obs_shape, obs_dtype)
+        self._rewards = _as_numpy(shared_rewards, (self.num_envs,), np.float32)
+        self._terminateds = _as_numpy(shared_terminateds, (self.num_envs,), np.bool_)
+        self._truncateds = _as_numpy(shared_truncateds, (self.num_envs,), np.bool_)
+
+        assert envs_per_worker >= 1, f"envs_per_worker must be positive, got {envs_per_worker}"
+        self.envs_per_worker = envs_per_worker
+        self._env_slices = [slice(start, min(start + envs_per_worker, self.num_envs))
+                            for start in range(0, self.num_envs, envs_per_worker)]
+        self.parent_remotes, self.processes = [], []
+        for index, env_slice in enumerate(self._env_slices):
+            parent_remote, child_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                name=f'Worker<{type(self).__name__}>-{index}',
+                args=(index, [CloudpickleWrapper(env_fn) for env_fn in env_fns[env_slice]],
+                      child_remote, parent_remote, self._shared_buffers, self.num_envs,
+                      env_slice, obs_shape, obs_dtype),
+                daemon=daemon,
+            )
+            process.start()
+            child_remote.close()
+            self.parent_remotes.append(parent_remote)
+            self.processes.append(process)
+        # step_async/step_wait: worker index -> global env ids sent to it
+        self._pending = {}
+
+    @property
+    def num_workers(self):
+        return len(self.processes)
+
+    def _receive(self, remotes):
+        results, successes = zip(*[remote.recv() for remote in remotes])
+        if not all(successes):
+            errors = [result for result, success in zip(results, successes) if not success]
+            self.close(terminate=True)
+            raise RuntimeError('Worker process raised an exception:\n' + '\n'.join(errors))
+        # flatten per-worker lists into per-env lists
+        return [item for result in results for item in result]
+
+    def _output(self, array):
+        return np.copy(array) if self.copy else array
+
+    def _assert_not_pending(self, name):
+        if self._pending:
+            raise RuntimeError(f'Calling `{name}` while waiting for a pending call to `step_wait`.')
+
+    def reset(self, seed=None, options=None):
+        self._assert_not_pending('reset')
+        # 只应该被调用一次
+        if seed is None:
+            seed = [None] * self.num_envs
+        elif isinstance(seed, int):
+            seed = [seed + i for i in range(self.num_envs)]
+        elif isinstance(seed, list):
+            assert len(seed) == self.num_envs, f"The length of seed ({len(seed)}) must be equal to the number of environments ({self.num_envs})."
+
+        for remote, env_slice in zip(self.parent_remotes, self._env_slices):
+            remote.send(('reset', (seed[env_slice], options)))
+        infos = {'infos': self._receive(self.parent_remotes)}
+        return self._output(self._observations), infos
+
+    def step(self, actions):
+        self._assert_not_pending('step')
+        for remote, env_slice in zip(self.parent_remotes, self._env_slices):
+            remote.send(('step', (None, actions[env_slice])))
+        infos = {'infos': self._receive(self.parent_remotes)}
+        return (
+            self._output(self._observations),
+            self._output(self._rewards),
+            self._output(self._terminateds),
+            self._output(self._truncateds),
+            infos,
+        )
+
+    def step_async(self, actions, env_ids=None):
+        """
+        Send actions to the workers of `env_ids` without waiting.
+        A worker can only have one pending step, i.e. envs sharing a worker must be sent together.
+        """
+        if env_ids is None:
+            env_ids = np.arange(self.num_envs)
+        env_ids = np.asarray(env_ids)
+        assert len(actions) == len(env_ids), \
+            f"The number of actions ({len(actions)}) must match the number of env ids ({len(env_ids)})."
+        order = np.argsort(env_ids, kind='stable')
+        env_ids = env_ids[order]
+        workers = env_ids // self.envs_per_worker
+        sends = []
+        for worker in np.unique(workers).tolist():
+            if worker in self._pending:
+                raise RuntimeError(f'Worker {worker} has a pending step, call `step_wait` first.')
+            mask = workers == worker
+            worker_env_ids = env_ids[mask]
+            sends.append((worker, worker_env_ids, [actions[k] for k in order[mask]]))
+        for worker, worker_env_ids, worker_actions in sends:
+            local_ids = (worker_env_ids - self._env_slices[worker].start).tolist()
+            self.parent_remotes[worker].send(('step', (local_ids, worker_actions)))
+            self._pending[worker] = worker_env_ids
+
+    def step_wait(self, min_ready=None, timeout=None):
+        """
+        Wait until at least `min_ready` pending envs finished (all pending envs by default),
+        e.g. `min_ready=batch_size` gives EnvPool-like batch stepping where slow envs keep
+        running in their workers while the finished ones are returned.
+        """
+        if not self._pending:
+            raise RuntimeError('Calling `step_wait` without any prior call to `step_async`.')
+        num_pending = sum(len(ids) for ids in self._pending.values())
+        min_ready = num_pending if min_ready is None else min(min_ready, num_pending)
+        remote_to_worker = {self.parent_remotes[worker]: worker for worker in self._pending}
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        ready_workers, infos, num_ready = [], {}, 0
+        while num_ready < min_ready:
+            remaining = None if deadline is None else max(deadline - time.perf_counter(), 0)
+            remotes = wait([r for r, w in remote_to_worker.items() if w not in infos], timeout=remaining)
+            if not remotes:
+                raise mp.TimeoutError(f'`step_wait` timed out after {timeout} seconds.')
+            for remote in remotes:
+                worker = remote_to_worker[remote]
+                infos[worker] = self._receive([remote])
+                ready_workers.append(worker)
+                num_ready += len(self._pending[worker])
+
+        ready_workers.sort()
+        env_ids = np.concatenate([self._pending.pop(worker) for worker in ready_workers])
+        infos = {'infos': [info for worker in ready_workers for info in infos[worker]]}
+        return (
+            self._observations[env_ids],
+            self._rewards[env_ids],
+            self._terminateds[env_ids],
+            self._truncateds[env_ids],
+            infos,
+            env_ids,
+        )
+
+    def do_close(self, terminate=False, **kwargs):
+        if terminate:
+            for process in self.processes:
+                if process.is_alive():
+                    process.terminate()
+        else:
+            # drain results of pending `step_async` calls before asking the workers to exit
+            for worker in self._pending:
+                try:
+                    self.parent_remotes[worker].recv()
+                except (BrokenPipeError, EOFError):
+                    pass
+            for remote, process in zip(self.parent_remotes, self.processes):
+                if process.is_alive():
+                    try:
+                        remote.send(('close', None))
+                        remote.recv()
+                    except (BrokenPipeError, EOFError):
+                        pass
+        for remote in self.parent_remotes:
+            remote.close()
+        for process in self.processes:
+            process.join()
+        self._pending.clear()
+
+    def render(self, mode='human'):
+        for remote in self.parent_remotes:
+            remote.send(('render', None))
+        return self._receive(self.parent_remotes)
+
+    def __del__(self):
+        # `_pending` is only set once all workers are started
+        if not getattr(self, '_is_closed', True) and hasattr(self, '_pending'):
+            self.close(terminate=True)
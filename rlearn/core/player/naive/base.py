@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
 import numpy as np
 
 
@@ -49,7 +49,9 @@ class BaseEnvPlayer(ABC):
 
 
 class BaseVecEnvPlayer(ABC):
-    
+    # torch-native players return torch tensors from `reset`/`step` and accept tensor actions
+    is_torch_env = False
+
     def __init__(self, env_fns, **kwargs):
         self.envs = [env_fn() for env_fn in env_fns]
         self._single_action_space = self.envs[0].action_space
@@ -64,7 +66,29 @@ class BaseVecEnvPlayer(ABC):
     @abstractmethod
     def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
         pass
-    
+
+    def step_async(self, actions: np.ndarray, env_ids: Optional[np.ndarray] = None) -> None:
+        """
+        Send actions to the envs without waiting for the results.
+        Args:
+            actions: The actions of the envs in `env_ids`, aligned with `env_ids`.
+            env_ids: The ids of the envs to step. Defaults to all envs.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support `step_async`')
+
+    def step_wait(self, min_ready: Optional[int] = None,
+                  timeout: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any], np.ndarray]:
+        """
+        Wait for (a subset of) the envs sent by `step_async`.
+        Args:
+            min_ready: Return as soon as at least `min_ready` envs finished. Defaults to all pending envs.
+            timeout: Maximum number of seconds to wait.
+        Returns:
+            observations, rewards, terminateds, truncateds, infos of the finished envs,
+            and `env_ids`, the (ascending) ids of the finished envs.
+        """
+        raise NotImplementedError(f'{type(self).__name__} does not support `step_wait`')
+
     @abstractmethod
     def do_close(self, **kwargs):
         pass
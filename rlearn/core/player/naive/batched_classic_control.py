@@ -0,0 +1,105 @@
+import math
+import numpy as np
+from gymnasium import spaces
+from .batched_env import BatchedEnvPlayer
+
+
+class BatchedCartPolePlayer(BatchedEnvPlayer):
+    """
+    Vectorized `CartPole-v1`: same dynamics, rewards and termination as the gymnasium
+    env (euler integrator, truncation after 500 steps), with the state of all envs kept
+    in one `(num_envs, 4)` float64 array.
+    """
+    gravity = 9.8
+    masscart = 1.0
+    masspole = 0.1
+    total_mass = masspole + masscart
+    length = 0.5  # actually half the pole's length
+    polemass_length = masspole * length
+    force_mag = 10.0
+    tau = 0.02
+    theta_threshold_radians = 12 * 2 * math.pi / 360
+    x_threshold = 2.4
+
+    def __init__(self, num_envs, max_episode_steps=500, **kwargs):
+        high = np.array([self.x_threshold * 2, np.inf, self.theta_threshold_radians * 2, np.inf],
+                        dtype=np.float32)
+        super().__init__(num_envs,
+                         observation_space=spaces.Box(-high, high, dtype=np.float32),
+                         action_space=spaces.Discrete(2),
+                         max_episode_steps=max_episode_steps,
+                         **kwargs)
+        self.state = np.zeros((num_envs, 4), dtype=np.float64)
+
+    def reset_envs(self, mask):
+        self.state[mask] = self.np_random.uniform(low=-0.05, high=0.05, size=(int(mask.sum()), 4))
+
+    def step_envs(self, actions):
+        x, x_dot, theta, theta_dot = self.state.T
+        force = np.where(actions == 1, self.force_mag, -self.force_mag)
+        costheta = np.cos(theta)
+        sintheta = np.sin(theta)
+
+        temp = (force + self.polemass_length * np.square(theta_dot) * sintheta) / self.total_mass
+        thetaacc = (self.gravity * sintheta - costheta * temp) / (
+            self.length * (4.0 / 3.0 - self.masspole * np.square(costheta) / self.total_mass)
+        )
+        xacc = temp - self.polemass_length * thetaacc * costheta / self.total_mass
+
+        # euler, columns of self.state are updated in-place
+        x += self.tau * x_dot
+        x_dot += self.tau * xacc
+        theta += self.tau * theta_dot
+        theta_dot += self.tau * thetaacc
+
+        terminateds = ((x < -self.x_threshold) | (x > self.x_threshold)
+                       | (theta < -self.theta_threshold_radians) | (theta > self.theta_threshold_radians))
+        rewards = np.ones(self.num_envs, dtype=np.float32)
+        return rewards, terminateds
+
+    def get_observations(self):
+        return self.state.astype(np.float32)
+
+
+class BatchedPendulumPlayer(BatchedEnvPlayer):
+    """
+    Vectorized `Pendulum-v1`: same dynamics and rewards as the gymnasium env
+    (truncation after 200 steps), with the state of all envs kept in one
+    `(num_envs, 2)` float64 array of `(theta, theta_dot)`.
+    """
+    max_speed = 8
+    max_torque = 2.0
+    dt = 0.05
+    m = 1.0
+    l = 1.0
+
+    def __init__(self, num_envs, g=10.0, max_episode_steps=200, **kwargs):
+        high = np.array([1.0, 1.0, self.max_speed], dtype=np.float32)
+        super().__init__(num_envs,
+                         observation_space=spaces.Box(low=-high, high=high, dtype=np.float32),
+                         action_space=spaces.Box(low=-self.max_torque, high=self.max_torque,
+                                                 shape=(1,), dtype=np.float32),
+                         max_episode_steps=max_episode_steps,
+                         **kwargs)
+        self.g = g
+        self.state = np.zeros((num_envs, 2), dtype=np.float64)
+
+    def reset_envs(self, mask):
+        high = np.array([np.pi, 1.0])
+        self.state[mask] = self.np_random.uniform(low=-high, high=high, size=(int(mask.sum()), 2))
+
+    def step_envs(self, actions):
+        th, thdot = self.state.T
+        u = np.clip(actions.reshape(self.num_envs, -1)[:, 0], -self.max_torque, self.max_torque)
+        angle = ((th + np.pi) % (2 * np.pi)) - np.pi
+        costs = angle ** 2 + 0.1 * thdot ** 2 + 0.001 * (u ** 2)
+
+        newthdot = thdot + (3 * self.g / (2 * self.l) * np.sin(th) + 3.0 / (self.m * self.l ** 2) * u) * self.dt
+        newthdot = np.clip(newthdot, -self.max_speed, self.max_speed)
+        self.state[:, 0] = th + newthdot * self.dt
+        self.state[:, 1] = newthdot
+        return (-costs).astype(np.float32), np.zeros(self.num_envs, dtype=np.bool_)
+
+    def get_observations(self):
+        th, thdot = self.state.T
+        return np.stack([np.cos(th), np.sin(th), thdot], axis=1).astype(np.float32)
@@ -0,0 +1,93 @@
+from abc import abstractmethod
+from typing import Optional, Tuple
+import numpy as np
+from .base import BaseVecEnvPlayer
+
+
+class BatchedEnvPlayer(BaseVecEnvPlayer):
+    """
+    永续环境，当环境终止时，会自动重置环境，并继续执行下一个环境。
+
+    Base class of natively vectorized envs: the state of all envs is one batched NumPy
+    array and `step` advances the whole `(num_envs, ...)` batch with array operations.
+    Auto-reset (same semantics as SyncVecEnvPlayer: an env that ended in the last step
+    is reset in this step with reward 0) and time-limit truncation are handled here with
+    boolean masks, so there is no per-env Python loop.
+
+    Subclasses implement:
+        - `reset_envs(mask)`: re-initialize the state of the envs where `mask` is True
+        - `step_envs(actions)`: advance all envs one step, return `(rewards, terminateds)`
+        - `get_observations()`: the `(num_envs, *obs_shape)` observations of the current state
+    """
+
+    def __init__(self, num_envs, observation_space, action_space, max_episode_steps=None, **kwargs):
+        """
+        Args:
+            num_envs (int): Number of envs in the batch.
+            observation_space: Observation space of a single env.
+            action_space: Action space of a single env.
+            max_episode_steps (int): Episodes are truncated after this many steps if given.
+        """
+        # NOTE: 不调用BaseVecEnvPlayer.__init__，没有单独的env对象
+        self.envs = None
+        self._num_envs = num_envs
+        self._single_observation_space = observation_space
+        self._single_action_space = action_space
+        self._is_closed = False
+        self.max_episode_steps = max_episode_steps
+        self.np_random = np.random.default_rng()
+
+        self._rewards = np.zeros(num_envs, dtype=np.float32)
+        self._terminateds = np.zeros(num_envs, dtype=np.bool_)
+        self._truncateds = np.zeros(num_envs, dtype=np.bool_)
+        self._should_reset = np.zeros(num_envs, dtype=np.bool_)
+        self._elapsed_steps = np.zeros(num_envs, dtype=np.int64)
+
+    @abstractmethod
+    def reset_envs(self, mask: np.ndarray) -> None:
+        pass
+
+    @abstractmethod
+    def step_envs(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        pass
+
+    @abstractmethod
+    def get_observations(self) -> np.ndarray:
+        pass
+
+    def reset(self, seed: Optional[int] = None, options=None):
+        if seed is not None:
+            self.np_random = np.random.default_rng(seed)
+        self.reset_envs(np.ones(self.num_envs, dtype=np.bool_))
+        self._elapsed_steps[:] = 0
+        self._should_reset[:] = False
+        return self.get_observations(), {}
+
+    def step(self, actions):
+        # envs ended in the last step are stepped too, then overwritten by the reset below
+        reset_mask = self._should_reset
+        rewards, terminateds = self.step_envs(np.asarray(actions))
+        self._rewards[:] = rewards
+        self._terminateds[:] = terminateds
+        self._elapsed_steps += 1
+        if self.max_episode_steps is not None:
+            np.greater_equal(self._elapsed_steps, self.max_episode_steps, out=self._truncateds)
+
+        if reset_mask.any():
+            self.reset_envs(reset_mask)
+            self._rewards[reset_mask] = 0.0
+            self._terminateds[reset_mask] = False
+            self._truncateds[reset_mask] = False
+            self._elapsed_steps[reset_mask] = 0
+
+        np.logical_or(self._terminateds, self._truncateds, out=self._should_reset)
+        return (
+            self.get_observations(),
+            np.copy(self._rewards),
+            np.copy(self._terminateds),
+            np.copy(self._truncateds),
+            {},
+        )
+
+    def do_close(self, **kwargs):
+        pass
@@ -0,0 +1,77 @@
+import numpy as np
+from gymnasium import spaces
+from .base import BaseVecEnvPlayer
+
+
+class FrameStackPlayer(BaseVecEnvPlayer):
+    """
+    永续环境，当环境终止时，会自动重置环境，并继续执行下一个环境。
+
+    Stacks the last `num_stack` observations of a vector player along a new axis 1, i.e. the
+    observations are `(num_envs, num_stack, *frame_shape)`; an env that (auto-)resets starts with
+    its first frame repeated `num_stack` times.
+
+    Frames are kept in one ring buffer `(num_envs, 2 * num_stack, *frame_shape)` that is written
+    twice per step (at `pos` and `pos + num_stack`), so the last `num_stack` frames of all envs are
+    always the contiguous slice `[pos + 1, pos + num_stack]` and the stacked observation is a view
+    of the ring buffer instead of `num_stack` copied frames.
+    """
+
+    def __init__(self, player: BaseVecEnvPlayer, num_stack=4, copy=True):
+        """
+        Args:
+            player: The wrapped vector player (NumPy observations, next-step auto-reset).
+            num_stack (int): Number of stacked frames.
+            copy (bool): Whether `reset`/`step` return a copy of the stacked frames. If False,
+                a view of the ring buffer is returned which is only valid until the next call.
+        """
+        # NOTE: 不调用BaseVecEnvPlayer.__init__，envs由被包装的player管理
+        self.player = player
+        self.num_stack = num_stack
+        self.copy = copy
+        self._num_envs = player.num_envs
+        self._single_action_space = player.single_action_space
+        frame_space = player.single_observation_space
+        self.frame_shape = frame_space.shape
+        self._single_observation_space = spaces.Box(
+            low=np.repeat(frame_space.low[None], num_stack, axis=0),
+            high=np.repeat(frame_space.high[None], num_stack, axis=0),
+            dtype=frame_space.dtype,
+        )
+        self._is_closed = False
+
+        self._frames = np.zeros((self.num_envs, 2 * num_stack) + self.frame_shape, dtype=frame_space.dtype)
+        self._pos = 0
+        self._should_reset = np.zeros(self.num_envs, dtype=np.bool_)
+
+    @property
+    def envs(self):
+        return self.player.envs
+
+    def _stacked(self):
+        stacked = self._frames[:, self._pos + 1:self._pos + 1 + self.num_stack]
+        return np.copy(stacked) if self.copy else stacked
+
+    def reset(self, **kwargs):
+        frames, infos = self.player.reset(**kwargs)
+        self._pos = 0
+        self._frames[:] = frames[:, None]
+        self._should_reset[:] = False
+        return self._stacked(), infos
+
+    def step(self, actions):
+        frames, rewards, terminateds, truncateds, infos = self.player.step(actions)
+        self._pos = (self._pos + 1) % self.num_stack
+        self._frames[:, self._pos] = frames
+        self._frames[:, self._pos + self.num_stack] = frames
+        if self._should_reset.any():
+            # 上一步结束的env在本步被重置: 用第一帧填满
+            self._frames[self._should_reset] = frames[self._should_reset, None]
+        np.logical_or(terminateds, truncateds, out=self._should_reset)
+        return self._stacked(), rewards, terminateds, truncateds, infos
+
+    def render(self, mode='human'):
+        return self.player.render(mode)
+
+    def do_close(self, **kwargs):
+        self.player.close(**kwargs)
@@ -0,0 +1,165 @@
+import numpy as np
+from gymnasium import spaces
+from .base import BaseVecEnvPlayer
+
+
+class RunningMeanStd:
+    """
+    Running mean/variance of a stream of `(batch, *shape)` arrays.
+
+    Every `update` merges the moments of the whole batch at once (parallel variance,
+    Chan et al.), so the statistics of all envs are updated with one vectorized operation.
+    """
+
+    def __init__(self, shape=(), epsilon=1e-8, clip=None):
+        """
+        Args:
+            shape: Shape of a single sample.
+            epsilon (float): Added to the variance in `normalize`/`scale`.
+            clip (float): Clip normalized values to `[-clip, clip]` if given.
+        """
+        self.shape = tuple(shape)
+        self.epsilon = epsilon
+        self.clip = clip
+        self.mean = np.zeros(self.shape, dtype=np.float64)
+        self.var = np.ones(self.shape, dtype=np.float64)
+        # 初始count取很小的值，避免除0
+        self.count = 1e-4
+
+    def update(self, batch):
+        batch = np.asarray(batch, dtype=np.float64)
+        self.update_from_moments(batch.mean(axis=0), batch.var(axis=0), batch.shape[0])
+
+    def update_from_moments(self, batch_mean, batch_var, batch_count):
+        delta = batch_mean - self.mean
+        total_count = self.count + batch_count
+        self.mean = self.mean + delta * (batch_count / total_count)
+        m2 = self.var * self.count + batch_var * batch_count + np.square(delta) * (self.count * batch_count / total_count)
+        self.var = m2 / total_count
+        self.count = total_count
+
+    def normalize(self, x, out=None):
+        """`(x - mean) / std`, clipped; `out` (float32) can be given to avoid allocation"""
+        out = np.subtract(x, self.mean, out=out, dtype=np.float32, casting='unsafe')
+        np.divide(out, np.sqrt(self.var + self.epsilon), out=out, casting='unsafe')
+        if self.clip is not None:
+            np.clip(out, -self.clip, self.clip, out=out)
+        return out
+
+    def scale(self, x, out=None):
+        """`x / std` without centering, clipped"""
+        out = np.divide(x, np.sqrt(self.var + self.epsilon), out=out, dtype=np.float32, casting='unsafe')
+        if self.clip is not None:
+            np.clip(out, -self.clip, self.clip, out=out)
+        return out
+
+    def state_dict(self):
+        # 只含python类型，可被torch.load(weights_only=True)加载
+        return {'mean': self.mean.tolist(), 'var': self.var.tolist(), 'count': float(self.count),
+                'epsilon': self.epsilon, 'clip': self.clip}
+
+    def load_state_dict(self, state_dict):
+        self.mean = np.array(state_dict['mean'], dtype=np.float64)
+        self.var = np.array(state_dict['var'], dtype=np.float64)
+        self.shape = self.mean.shape
+        self.count = state_dict['count']
+        self.epsilon = state_dict['epsilon']
+        self.clip = state_dict['clip']
+
+    @classmethod
+    def from_state_dict(cls, state_dict):
+        rms = cls()
+        rms.load_state_dict(state_dict)
+        return rms
+
+
+class NormalizeVecEnvPlayer(BaseVecEnvPlayer):
+    """
+    永续环境，当环境终止时，会自动重置环境，并继续执行下一个环境。
+
+    Normalizes the batched `(num_envs, *obs_shape)` observations of a vector player with one
+    `RunningMeanStd` shared by all envs, and optionally scales the rewards by the running std
+    of the discounted returns (rewards are not centered). Both statistics are updated with the
+    whole batch per step while `training` is True and frozen otherwise.
+    """
+
+    def __init__(self, player: BaseVecEnvPlayer, norm_obs=True, norm_reward=False, gamma=0.99,
+                 clip_obs=10.0, clip_reward=10.0, epsilon=1e-8, copy=True):
+        """
+        Args:
+            player: The wrapped vector player (NumPy observations, next-step auto-reset).
+            norm_obs (bool): Normalize the observations.
+            norm_reward (bool): Scale the rewards by the std of the discounted returns.
+            gamma (float): Discount of the returns used for reward scaling.
+            clip_obs (float): Clip normalized observations to `[-clip_obs, clip_obs]`.
+            clip_reward (float): Clip scaled rewards to `[-clip_reward, clip_reward]`.
+            epsilon (float): Added to the variances.
+            copy (bool): Whether `reset`/`step` return a copy of the normalized observations.
+                If False, a preallocated buffer is returned which is overwritten by the next call.
+        """
+        # NOTE: 不调用BaseVecEnvPlayer.__init__，envs由被包装的player管理
+        self.player = player
+        self.norm_obs = norm_obs
+        self.norm_reward = norm_reward
+        self.gamma = gamma
+        self.copy = copy
+        self.training = True
+        self._num_envs = player.num_envs
+        self._single_action_space = player.single_action_space
+        obs_space = player.single_observation_space
+        if norm_obs:
+            self._single_observation_space = spaces.Box(-clip_obs, clip_obs, obs_space.shape, dtype=np.float32)
+        else:
+            self._single_observation_space = obs_space
+        self._is_closed = False
+
+        self.obs_rms = RunningMeanStd(obs_space.shape, epsilon=epsilon, clip=clip_obs) if norm_obs else None
+        self.ret_rms = RunningMeanStd((), epsilon=epsilon, clip=clip_reward) if norm_reward else None
+        self._obs = np.zeros((self.num_envs,) + obs_space.shape, dtype=np.float32)
+        self._returns = np.zeros(self.num_envs, dtype=np.float64)
+
+    @property
+    def envs(self):
+        return self.player.envs
+
+    def _normalize_obs(self, obs):
+        if not self.norm_obs:
+            return obs
+        if self.training:
+            self.obs_rms.update(obs)
+        self.obs_rms.normalize(obs, out=self._obs)
+        return self._obs.copy() if self.copy else self._obs
+
+    def reset(self, **kwargs):
+        obs, infos = self.player.reset(**kwargs)
+        self._returns[:] = 0.0
+        return self._normalize_obs(obs), infos
+
+    def step(self, actions):
+        obs, rewards, terminateds, truncateds, infos = self.player.step(actions)
+        if self.norm_reward:
+            self._returns *= self.gamma
+            self._returns += rewards
+            if self.training:
+                self.ret_rms.update(self._returns)
+            rewards = self.ret_rms.scale(rewards)
+            self._returns[np.logical_or(terminateds, truncateds)] = 0.0
+        return self._normalize_obs(obs), rewards, terminateds, truncateds, infos
+
+    def state_dict(self):
+        return {
+            'obs_rms': self.obs_rms.state_dict() if self.obs_rms is not None else None,
+            'ret_rms': self.ret_rms.state_dict() if self.ret_rms is not None else None,
+        }
+
+    def load_state_dict(self, state_dict):
+        for name in ['obs_rms', 'ret_rms']:
+            rms = getattr(self, name)
+            if rms is not None and state_dict.get(name) is not None:
+                rms.load_state_dict(state_dict[name])
+
+    def render(self, mode='human'):
+        return self.player.render(mode)
+
+    def do_close(self, **kwargs):
+        self.player.close(**kwargs)
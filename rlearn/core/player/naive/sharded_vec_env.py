@@ -0,0 +1,30 @@
+import os
+import math
+from .async_vec_env import AsyncVecEnvPlayer
+
+
+class ShardedVecEnvPlayer(AsyncVecEnvPlayer):
+    """
+    永续环境，当环境终止时，会自动重置环境，并继续执行下一个环境。
+
+    ShardedVecEnvPlayer packs `envs_per_worker` envs into each worker process.
+    Every worker steps its slice of envs in a local loop and writes the results as one
+    contiguous block of the shared buffers, so a step costs K pipe round-trips (one per
+    worker) instead of N (one per env). This pays off for cheap envs such as CartPole,
+    where one-env-per-process stepping is dominated by IPC overhead.
+    """
+
+    def __init__(self, env_fns, envs_per_worker=None, num_workers=None, **kwargs):
+        """
+        Args:
+            envs_per_worker (int): Number of envs per worker process.
+            num_workers (int): Number of worker processes, used when `envs_per_worker` is None.
+                Defaults to `os.cpu_count()`.
+        """
+        num_envs = len(env_fns)
+        if envs_per_worker is None:
+            num_workers = min(num_workers or os.cpu_count() or 1, num_envs)
+            envs_per_worker = math.ceil(num_envs / num_workers)
+        elif num_workers is not None:
+            raise ValueError("Only one of `envs_per_worker` and `num_workers` can be given.")
+        super().__init__(env_fns, envs_per_worker=envs_per_worker, **kwargs)
@@ -1,10 +1,26 @@
 import numpy as np
 from copy import deepcopy
 from .base import BaseVecEnvPlayer
+from .async_vec_env import AsyncVecEnvPlayer
+from .sharded_vec_env import ShardedVecEnvPlayer
 
 
-def make_vec_env_player(env_fn, num_envs):
-    return SyncVecEnvPlayer([env_fn for _ in range(num_envs)])
+def make_vec_env_player(env_fn, num_envs, mode='sync', envs_per_worker=None, **kwargs):
+    """
+    Args:
+        mode (str): 'sync' steps all envs in this process, 'async' runs one worker process per env,
+            'sharded' packs `envs_per_worker` envs into each worker process.
+        envs_per_worker (int): Number of envs per worker in 'sharded' mode.
+    """
+    env_fns = [env_fn for _ in range(num_envs)]
+    if mode == 'sync':
+        return SyncVecEnvPlayer(env_fns, **kwargs)
+    elif mode == 'async':
+        return AsyncVecEnvPlayer(env_fns, **kwargs)
+    elif mode == 'sharded':
+        return ShardedVecEnvPlayer(env_fns, envs_per_worker=envs_per_worker, **kwargs)
+    else:
+        raise ValueError(f"Unknown vector env player mode: {mode}")
 
 # Gymnasium-like SyncVecEnvPlayer
 class SyncVecEnvPlayer(BaseVecEnvPlayer):
@@ -16,21 +32,53 @@ class SyncVecEnvPlayer(BaseVecEnvPlayer):
         https://github.com/Farama-Foundation/Gymnasium/blob/main/gymnasium/vector/sync_vector_env.py
     """
 
-    def __init__(self, env_fns, **kwargs):
+    def __init__(self, env_fns, copy=True, collect_infos=True, **kwargs):
         """
         Args:
-            copy (bool): Whether to copy the observation space.
+            copy (bool): Whether to return newly allocated arrays from `reset`/`step`.
+                If False, observations, rewards and done flags are written in-place into
+                preallocated double buffers and views are returned, i.e. the arrays returned
+                by one call stay valid until the call after next.
+            collect_infos (bool): Whether `step` builds the `infos` dict. If False, `step`
+                returns an empty dict and the per-env infos can be fetched by `get_infos()`.
         """
         super().__init__(env_fns, **kwargs)
-        self._rewards = np.zeros(self.num_envs, dtype=np.float32)
-        self._terminateds = np.zeros(self.num_envs, dtype=np.bool_)
-        self._truncateds = np.zeros(self.num_envs, dtype=np.bool_)
-        self._observations = np.zeros((self.num_envs,) + self.single_observation_space.shape,
-                                      dtype=self.single_observation_space.dtype)
+        self.copy = copy
+        self.collect_infos = collect_infos
+        # 双缓冲: copy=False时，交替写入两组buffer
+        self._buffer_index = 0
+        self._observation_buffers = np.zeros((2, self.num_envs) + self.single_observation_space.shape,
+                                             dtype=self.single_observation_space.dtype)
+        self._reward_buffers = np.zeros((2, self.num_envs), dtype=np.float32)
+        self._terminated_buffers = np.zeros((2, self.num_envs), dtype=np.bool_)
+        self._truncated_buffers = np.zeros((2, self.num_envs), dtype=np.bool_)
+        self._observations = self._observation_buffers[0]
+        self._rewards = self._reward_buffers[0]
+        self._terminateds = self._terminated_buffers[0]
+        self._truncateds = self._truncated_buffers[0]
         self._should_reset = np.zeros(self.num_envs, dtype=np.bool_)
-        self._infos = {'infos': []}
+        self._info_list = [None] * self.num_envs
+        # step_async/step_wait
+        self._pending_actions = None
+        self._pending_env_ids = None
+
+    def _swap_buffers(self):
+        self._buffer_index ^= 1
+        self._observations = self._observation_buffers[self._buffer_index]
+        self._rewards = self._reward_buffers[self._buffer_index]
+        self._terminateds = self._terminated_buffers[self._buffer_index]
+        self._truncateds = self._truncated_buffers[self._buffer_index]
+
+    def get_infos(self):
+        """Infos of the latest `reset`/`step`, built on demand"""
+        return {'infos': list(self._info_list)}
+
+    def _assert_not_pending(self, name):
+        if self._pending_env_ids is not None:
+            raise RuntimeError(f'Calling `{name}` while waiting for a pending call to `step_wait`.')
 
     def reset(self, seed=None, options=None):
+        self._assert_not_pending('reset')
         # 只应该被调用一次 
         if seed is None:
             seed = [None] * self.num_envs
@@ -39,14 +87,26 @@ class SyncVecEnvPlayer(BaseVecEnvPlayer):
         elif isinstance(seed, list):
             assert len(seed) == self.num_envs, f"The length of seed ({len(seed)}) must be equal to the number of environments ({self.num_envs})."
 
+        self._should_reset[:] = False
+        if not self.copy:
+            self._swap_buffers()
+            for i, (env, my_seed) in enumerate(zip(self.envs, seed)):
+                self._observations[i], self._info_list[i] = env.reset(seed=my_seed, options=options)
+            return self._observations, self.get_infos()
+
         obs, infos = [], {'infos': []}
         for i, (env, my_seed) in enumerate(zip(self.envs, seed)):
             ob, info = env.reset(seed=my_seed, options=options)
             obs.append(ob)
             infos['infos'].append(info)
+            self._info_list[i] = info
         return np.stack(obs), infos
 
     def step(self, actions):
+        self._assert_not_pending('step')
+        if not self.copy:
+            return self._step_inplace(actions)
+
         obs, infos = [], {'infos': []}
         for i, action in enumerate(actions):
             if self._should_reset[i]:
@@ -65,11 +125,94 @@ class SyncVecEnvPlayer(BaseVecEnvPlayer):
                 ) = self.envs[i].step(action)
             
             obs.append(ob)
-            infos['infos'].append(info)
+            self._info_list[i] = info
         
-        self._should_reset = np.logical_or(self._terminateds, self._truncateds)
+        if self.collect_infos:
+            infos['infos'] = list(self._info_list)
+        else:
+            infos = {}
+        np.logical_or(self._terminateds, self._truncateds, out=self._should_reset)
         return np.stack(obs), np.copy(self._rewards), np.copy(self._terminateds), np.copy(self._truncateds), infos
 
+    def _step_inplace(self, actions):
+        """Write every env's outputs into the next buffer set and return views of it"""
+        self._swap_buffers()
+        observations, rewards = self._observations, self._rewards
+        terminateds, truncateds = self._terminateds, self._truncateds
+        for i, action in enumerate(actions):
+            if self._should_reset[i]:
+                observations[i], self._info_list[i] = self.envs[i].reset()
+                rewards[i] = 0.0
+                terminateds[i] = False
+                truncateds[i] = False
+            else:
+                (
+                    observations[i],
+                    rewards[i],
+                    terminateds[i],
+                    truncateds[i],
+                    self._info_list[i]
+                ) = self.envs[i].step(action)
+
+        np.logical_or(terminateds, truncateds, out=self._should_reset)
+        infos = self.get_infos() if self.collect_infos else {}
+        return observations, rewards, terminateds, truncateds, infos
+
+    def step_async(self, actions, env_ids=None):
+        self._assert_not_pending('step_async')
+        self._pending_env_ids = np.arange(self.num_envs) if env_ids is None else np.asarray(env_ids)
+        assert len(actions) == len(self._pending_env_ids), \
+            f"The number of actions ({len(actions)}) must match the number of env ids ({len(self._pending_env_ids)})."
+        self._pending_actions = actions
+
+    def step_wait(self, min_ready=None, timeout=None):
+        """
+        In-process envs are stepped here, so all pending envs are always ready.
+        Unlike `step`, the returned arrays are always new arrays.
+        """
+        if self._pending_env_ids is None:
+            raise RuntimeError('Calling `step_wait` without any prior call to `step_async`.')
+        actions, env_ids = self._pending_actions, self._pending_env_ids
+        self._pending_actions, self._pending_env_ids = None, None
+
+        if not self.copy:
+            # 与 `step` 相同，写入另一组buffer，上一次 `step` 返回的视图保持不变；
+            # 未被step的环境沿用最新的数据
+            previous = self._buffer_index
+            self._swap_buffers()
+            self._observations[...] = self._observation_buffers[previous]
+            self._rewards[...] = self._reward_buffers[previous]
+            self._terminateds[...] = self._terminated_buffers[previous]
+            self._truncateds[...] = self._truncated_buffers[previous]
+
+        order = np.argsort(env_ids, kind='stable')
+        env_ids = env_ids[order]
+        for i, k in zip(env_ids, order):
+            if self._should_reset[i]:
+                self._observations[i], self._info_list[i] = self.envs[i].reset()
+                self._rewards[i] = 0.0
+                self._terminateds[i] = False
+                self._truncateds[i] = False
+            else:
+                (
+                    self._observations[i],
+                    self._rewards[i],
+                    self._terminateds[i],
+                    self._truncateds[i],
+                    self._info_list[i]
+                ) = self.envs[i].step(actions[k])
+            self._should_reset[i] = self._terminateds[i] or self._truncateds[i]
+
+        infos = {'infos': [self._info_list[i] for i in env_ids]} if self.collect_infos else {}
+        return (
+            self._observations[env_ids],
+            self._rewards[env_ids],
+            self._terminateds[env_ids],
+            self._truncateds[env_ids],
+            infos,
+            env_ids,
+        )
+
     def do_close(self, **kwargs):
         for env in self.envs:
             env.close()
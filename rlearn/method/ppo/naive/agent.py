@@ -4,9 +4,12 @@ import torch.nn as nn
 import torch.optim as optim
 import gymnasium as gym
 from rlearn.core.agent.main.online_agent_ve import OnlineAgentVE
+from rlearn.core.player.naive.normalize import RunningMeanStd
+from rlearn.core.buffer import RolloutBuffer, PackedMinibatchSampler, FrameStackRolloutBuffer
 # from rlearn.core.agent.naive.vector.online_agent import OnlineAgent
-from .network.discrete import ActorCritic as ActorCriticDiscrete
-from .network.continous import ActorCritic as ActorCriticContinous
+from .network.api import make_actor_critic
+from .gae import compute_gae
+from .export import export_policy
 
 class PPOAgent(OnlineAgentVE):
 
@@ -34,6 +37,22 @@ class PPOAgent(OnlineAgentVE):
         self.anneal_lr = self.config.get('anneal_lr', True) 
         self.gamma = self.config.get('gamma', 0.99)
         self.gae_lambda = self.config.get('gae_lambda', 0.95) 
+        # 截断(truncated)的episode用最终状态的value做bootstrap，而不是当作终止
+        self.bootstrap_truncated = self.config.get('bootstrap_truncated', False)
+        # 图像观测(uint8, 3维): rollout中按uint8存储，网络内部(encoder)再转换为float并归一化
+        image_obs = self.config.get('image_obs', 'auto')
+        if image_obs == 'auto':
+            image_obs = (isinstance(self.single_observation_space, gym.spaces.Box)
+                         and len(self.single_observation_space.shape) == 3
+                         and self.single_observation_space.dtype == np.uint8)
+        self.image_obs = image_obs
+        # rollout中observation的存储类型: 'float32', 'float16', 'bfloat16', 'uint8'
+        self.obs_dtype = getattr(torch, self.config.get('obs_dtype', 'uint8' if self.image_obs else 'float32'))
+        # 帧堆叠环境(FrameStackPlayer): rollout中每帧只存一次，minibatch时再还原堆叠
+        frame_stack_storage = self.config.get('frame_stack_storage', 'auto')
+        if frame_stack_storage == 'auto':
+            frame_stack_storage = getattr(self.env, 'num_stack', None) is not None
+        self.frame_stack_storage = frame_stack_storage
         self.num_minibatches = self.config.get('num_minibatches', 4)
         self.update_epochs = self.config.get('update_epochs', 4)
         self.norm_adv = self.config.get('norm_adv', True)
@@ -68,15 +87,39 @@ class PPOAgent(OnlineAgentVE):
         self.v_clipfrac_stop = self.config.get('v_clipfrac_stop', None) # 
         self.kl_stop = self.config.get('kl_stop', None) 
         self.norm_adv_eps = self.config.get('norm_adv_eps', 1e-8)        
+        # 统计量(approx_kl, clipfrac等)在device上累加，每个update epoch只同步一次；
+        # 此时 kl_stop/target_kl/clipfrac_stop 按epoch平均值检查
+        self.deferred_metrics = self.config.get('deferred_metrics', False)
+        # 策略计算: 'eager'(torch.distributions), 'fused'(手写log-prob/entropy), 'compile'(fused + torch.compile)
+        self.policy_backend = self.config.get('policy_backend', 'eager')
+        # actor/critic结构: 'separate'(两个独立MLP), 'stacked'(bmm批量计算两个MLP), 'shared'(共享trunk)
+        self.network_arch = self.config.get('network_arch', 'separate')
+        # 网络工厂(见 network/api.py)及其参数，如 hidden_sizes, activation, layer_norm, encoder, encoder_kwargs
+        self.network = self.config.get('network', 'actor_critic')
+        self.network_kwargs = dict(self.config.get('network_kwargs', None) or {})
         self.device = torch.device("cuda" if torch.cuda.is_available() and self.config.get('cuda', True) else "cpu")
+        # GAE实现: 'loop', 'torchscript', 'numpy', 'numba', 'discount'，见 gae.py
+        # 默认: cpu上用numpy; cuda上用torchscript, rollout留在device上，不拷贝到host
+        self.gae_backend = self.config.get('gae_backend', 'numpy' if self.device.type == 'cpu' else 'torchscript')
+        # rollout: 使用pinned内存中转 + non_blocking拷贝 (仅cuda有效)
+        self.pin_memory = self.config.get('pin_memory', False) and self.device.type == 'cuda'
+        # torch-native env: reset/step返回tensor，跳过NumPy转换
+        self.is_torch_env = getattr(self.env, 'is_torch_env', False)
+        # 观测归一化统计量(NormalizeVecEnvPlayer)，保存在model_dict中，predict时固定不更新
+        self.obs_rms = getattr(self.env, 'obs_rms', None)
         if isinstance(self.single_action_space, gym.spaces.Box):
             self.logger.info(f'Use continuous action space: {self.single_action_space=}')
-            self.actor_critic = ActorCriticContinous(self.state_dim, 
-                                                     self.single_action_space, #.shape,
-                                                     rpo_alpha=self.rpo_alpha).to(self.device)
+            self.network_kwargs.setdefault('rpo_alpha', self.rpo_alpha)
         else:
             self.logger.info(f'Use discrete action space: {self.single_action_space=}')
-            self.actor_critic = ActorCriticDiscrete(self.state_dim, self.single_action_space.n).to(self.device)
+        self.network_kwargs.setdefault('arch', self.network_arch)
+        if self.image_obs:
+            # Atari风格: Nature-CNN(actor/critic共享) + 线性输出层
+            self.network_kwargs.setdefault('encoder', 'nature_cnn')
+            self.network_kwargs.setdefault('hidden_sizes', ())
+        self.actor_critic = make_actor_critic(self.network, self.state_dim, self.single_action_space,
+                                              **self.network_kwargs).to(self.device)
+        self._policy_fn = self._make_policy_fn()
         self.optimizer = optim.Adam(self.actor_critic.parameters(), lr=self.learning_rate, eps=self.optimizer_eps)
         self.logger.info(f'config: {self.config}')
 
@@ -98,6 +141,22 @@ class PPOAgent(OnlineAgentVE):
         # self.critic = get_critic_model(env, model_type='MLPCritic').to(self.device)
         # self.optimizer = optim.Adam(list(self.actor.parameters()) + list(self.critic.parameters()), lr=config.learning_rate)
     
+    @property
+    def _state_dtype(self):
+        """dtype of the observations fed to the network"""
+        return torch.uint8 if self.obs_dtype == torch.uint8 else torch.float32
+
+    def _make_policy_fn(self):
+        """`get_action_and_value` used in rollout and update, selected by `policy_backend`"""
+        if self.policy_backend == 'eager':
+            return self.actor_critic.get_action_and_value
+        if self.policy_backend == 'fused':
+            return self.actor_critic.get_action_and_value_fused
+        if self.policy_backend == 'compile':
+            # 首次调用(及batch大小变化)时编译
+            return torch.compile(self.actor_critic.get_action_and_value_fused, dynamic=False)
+        raise ValueError(f'Unknown policy_backend: {self.policy_backend}, expected one of eager, fused, compile')
+    
     def _get_target_entropy(self):
         """根据动作空间类型设置目标熵"""
         if self.is_continuous:
@@ -118,16 +177,39 @@ class PPOAgent(OnlineAgentVE):
         self.batch_size = int(self.num_envs * steps_per_epoch)
         self.minibatch_size = int(self.batch_size // self.num_minibatches)
 
-        self.states = torch.zeros((steps_per_epoch, num_envs) + self.state_dim).to(self.device)
-        self.actions = torch.zeros((steps_per_epoch, num_envs) + self.single_action_space.shape).to(self.device)
-        self.log_probs = torch.zeros((steps_per_epoch, num_envs)).to(self.device)
-        self.rewards = torch.zeros((steps_per_epoch, num_envs)).to(self.device)
-        self.dones = torch.zeros((steps_per_epoch, num_envs)).to(self.device)
-        self.values = torch.zeros((steps_per_epoch, num_envs)).to(self.device)
+        buffer_cls = FrameStackRolloutBuffer if self.frame_stack_storage else RolloutBuffer
+        self.rollout = buffer_cls(
+            steps_per_epoch, num_envs, self.state_dim, self.single_action_space.shape,
+            device=self.device, obs_dtype=self.obs_dtype,
+            # 离散动作直接存为long，更新时无需再转换
+            action_dtype=torch.float32 if isinstance(self.single_action_space, gym.spaces.Box) else torch.long,
+            extra_fields={'terminations': ((), torch.float32)} if self.bootstrap_truncated else None,
+        )
+        # views into self.rollout (按帧存储时没有obs字段)
+        self.states = self.rollout['obs'] if 'obs' in self.rollout else None
+        self.actions = self.rollout['actions']
+        self.log_probs = self.rollout['log_probs']
+        self.rewards = self.rollout['rewards']
+        self.dones = self.rollout['dones']
+        if self.bootstrap_truncated:
+            self.terminations = self.rollout['terminations']
+        self.values = self.rollout['values']
+        self.sampler = PackedMinibatchSampler(self.rollout)
         
-        # variables for single step
-        self.next_state = torch.Tensor(states).to(self.device) # (num_envs, *obs_shape)
-        self.next_done = torch.zeros(self.num_envs).to(self.device)
+        # variables for single step, reused (copied into) every step
+        self.next_state = torch.zeros((num_envs,) + self.state_dim, dtype=self._state_dtype, device=self.device) # (num_envs, *obs_shape)
+        self.next_done = torch.zeros(self.num_envs, device=self.device)
+        self.next_termination = torch.zeros(self.num_envs, device=self.device)
+        if self.pin_memory:
+            self._staging = {
+                'next_state': torch.zeros((num_envs,) + self.state_dim, dtype=self._state_dtype, pin_memory=True),
+                'rewards': torch.zeros(num_envs, pin_memory=True),
+                'next_done': torch.zeros(num_envs, pin_memory=True),
+                'next_termination': torch.zeros(num_envs, pin_memory=True),
+            }
+        else:
+            self._staging = {}
+        self._copy_to_device(self.next_state, states, 'next_state')
 
         self.logger.debug(f'reset: demo states: {states}')
         self.logger.debug(f'reset: demo infos: {infos}')
@@ -150,12 +232,14 @@ class PPOAgent(OnlineAgentVE):
     
     def select_action(self, state: torch.Tensor, 
                       epoch_step, *args, **kwargs):
-        self.states[epoch_step] = self.next_state
+        self.rollout.set_obs(epoch_step, self.next_state)
         self.dones[epoch_step] = self.next_done
+        if self.bootstrap_truncated:
+            self.terminations[epoch_step] = self.next_termination
 
         with torch.no_grad():
             # action: (num_envs, action_dim)
-            action, logprob, _, value = self.actor_critic.get_action_and_value(self.next_state, compute_entropy=False)
+            action, logprob, _, value = self._policy_fn(self.next_state, compute_entropy=False)
             # value: (num_envs, 1)
             assert value.shape == (self.num_envs, 1)
             self.values[epoch_step] = value.flatten()
@@ -170,22 +254,43 @@ class PPOAgent(OnlineAgentVE):
         self.actions[epoch_step] = action
         self.log_probs[epoch_step] = logprob
         
+        if self.is_torch_env:
+            return action
         return action.cpu().numpy()
     
+    def _copy_to_device(self, dst, data, staging_key=None):
+        """
+        Copy env outputs (NumPy arrays or torch tensors) into the preallocated device tensor `dst`.
+        NumPy arrays are wrapped without copying; with `pin_memory` they are staged in pinned host
+        memory and transferred with `non_blocking=True`. The staging buffer is only rewritten in the
+        next env step, after `select_action` has synchronized on `action.cpu()`.
+        """
+        if isinstance(data, torch.Tensor):
+            dst.copy_(data.reshape(dst.shape), non_blocking=True)
+            return dst
+        data = torch.as_tensor(np.asarray(data)).reshape(dst.shape)
+        staging = self._staging.get(staging_key)
+        if staging is None:
+            dst.copy_(data)
+        else:
+            staging.copy_(data)
+            dst.copy_(staging, non_blocking=True)
+        return dst
+
     def step(self, next_state, rewards, terminates, 
              truncates, infos, epoch, epoch_step):
-        next_done = np.logical_or(terminates, truncates)
+        if isinstance(terminates, torch.Tensor):
+            next_done = torch.logical_or(terminates, truncates)
+        else:
+            next_done = np.logical_or(terminates, truncates)
         assert rewards.shape == (self.num_envs, )
-        self.rewards[epoch_step] = torch.tensor(rewards).to(self.device) # removed: .view(-1)
+        self._copy_to_device(self.rewards[epoch_step], rewards, 'rewards')
         
         # OnlineAgentVE 的 next_obs 已经处理
-        # print('next_state', next_state)
-        # if next_state is not None:
-        #     self.next_state = torch.Tensor(next_state).to(self.device)
-        # else:
-        #     self.next_state = None
-        self.next_state = torch.Tensor(next_state).to(self.device)
-        self.next_done = torch.Tensor(next_done).to(self.device)
+        self._copy_to_device(self.next_state, next_state, 'next_state')
+        self._copy_to_device(self.next_done, next_done, 'next_done')
+        if self.bootstrap_truncated:
+            self._copy_to_device(self.next_termination, terminates, 'next_termination')
         # if "final_info" in infos:
         #     for info in infos["final_info"]:
         #         if info and "episode" in info:
@@ -198,25 +303,18 @@ class PPOAgent(OnlineAgentVE):
           - advantages: GAE_advantage
           - returns: GAE_advantage + values
         """
-        device = self.device
         with torch.no_grad():
             # predicted return
-            next_value = self.actor_critic.get_value(next_state).reshape(1, -1) # shape: (1, num_envs)
-            advantages = torch.zeros_like(rewards).to(device) # shape: (steps_per_epoch, num_envs)
-            lastgaelam = 0 # torch.zeros_like(rewards).to(device) # shape: (num_envs, )
-            gamma = self.gamma
-            gae_lambda = self.gae_lambda
-            for t in reversed(range(self.steps_per_epoch)):
-                if t == self.steps_per_epoch - 1:
-                    nextnonterminal = 1.0 - next_done 
-                    nextvalues = next_value
-                else:
-                    nextnonterminal = 1.0 - dones[t + 1] 
-                    nextvalues = values[t + 1]
-                delta = rewards[t] + gamma * nextvalues * nextnonterminal - values[t]
-                advantages[t] = lastgaelam = delta + gamma * gae_lambda * nextnonterminal * lastgaelam
-                assert advantages[t].shape == (self.num_envs, )
-            returns = advantages + values
+            next_value = self.actor_critic.get_value(next_state).reshape(-1) # shape: (num_envs, )
+        if self.bootstrap_truncated:
+            terminations, next_termination = self.terminations, self.next_termination
+        else:
+            terminations, next_termination = None, None
+        advantages, returns = compute_gae(
+            rewards, values, dones, next_value, next_done, self.gamma, self.gae_lambda,
+            terminations=terminations, next_termination=next_termination, backend=self.gae_backend
+        )
+        assert advantages.shape == (self.steps_per_epoch, self.num_envs)
         return advantages, returns
             
     def after_episode(self, epoch, total_steps, episode_reward=None, **kwargs):
@@ -228,15 +326,13 @@ class PPOAgent(OnlineAgentVE):
         advantages, returns = self._compute_gae_and_returns(
             rewards, dones, values, self.next_state, self.next_done, self.device
         )
+        self.rollout['advantages'].copy_(advantages)
+        self.rollout['returns'].copy_(returns)
 
-        batch_states = states.reshape((-1,) + self.state_dim)
-        batch_log_probs = log_probs.reshape(-1)
-        batch_actions = actions.reshape((-1,) + self.single_action_space.shape)
-        batch_advantages = advantages.reshape(-1)
-        batch_returns = returns.reshape(-1)
-        batch_values = values.reshape(-1)
+        batch_advantages = self.rollout.flat('advantages')
+        batch_returns = self.rollout.flat('returns')
+        batch_values = self.rollout.flat('values')
         
-        batch_indices = np.arange(self.batch_size)
         clipfracs = []
         all_approx_kls = []
         all_approx_kls_old = []
@@ -244,7 +340,7 @@ class PPOAgent(OnlineAgentVE):
         v_clipfrac = 0.0
         
         if self.norm_adv and not self.use_minibatch_norm_adv:
-            batch_advantages = (batch_advantages - batch_advantages.mean()) / (batch_advantages.std() + self.norm_adv_eps)
+            batch_advantages.sub_(batch_advantages.mean()).div_(batch_advantages.std() + self.norm_adv_eps)
         
         # 在epoch循环开始前初始化
         if self.autotune_ent_coef:
@@ -253,6 +349,9 @@ class PPOAgent(OnlineAgentVE):
         # 每个数据还是跑一遍，但分多批
         # self.save_lr()
         exit_this_train = False
+        if self.deferred_metrics:
+            # [approx_kl, old_approx_kl, clipfrac, v_clipfrac, entropy] 的minibatch累加和
+            metric_sums = torch.zeros(5, device=self.device)
         for _epoch in range(self.update_epochs):
             if exit_this_train:
                 break
@@ -276,32 +375,38 @@ class PPOAgent(OnlineAgentVE):
                 if exit_this_train:
                     break
                 
-                np.random.shuffle(batch_indices) # shuffle for each local_minibatch_size for i.i.d condition
-                for start in range(0, self.batch_size, local_minibatch_size):
+                if self.deferred_metrics:
+                    metric_sums.zero_()
+                    num_minibatches = 0
+                # shuffle for each local_minibatch_size for i.i.d condition
+                # 每个epoch在device上打乱一次并打包，minibatch为连续切片
+                for mb in self.sampler.iter_minibatches(local_minibatch_size):
                     # mbatch_advantages.std() 可能因只有一个元素导致，导致计算失败
-                    end = start + local_minibatch_size
-                    mini_batch_indices = batch_indices[start:end] 
                     # 因为有update_epochs随机复用数据，丢弃部分数据是可行的
                     # 防止数据太少导致误差
                     # if len(mini_batch_indices) != local_minibatch_size:
                     #     continue 
 
                     # NOTE: 因为是mini-batch, 所有计算很快
-                    if isinstance(self.single_action_space, gym.spaces.Box):
-                        _, newlogprob, entropy, new_value = self.actor_critic.get_action_and_value(batch_states[mini_batch_indices], batch_actions[mini_batch_indices])
-                    else:
-                        _, newlogprob, entropy, new_value = self.actor_critic.get_action_and_value(batch_states[mini_batch_indices], batch_actions.long()[mini_batch_indices])
-                    logratio = newlogprob - batch_log_probs[mini_batch_indices]
+                    # 低精度浮点存储转换回float32; uint8图像由网络内部转换
+                    mb_states = mb.obs.to(self._state_dtype)
+                    _, newlogprob, entropy, new_value = self._policy_fn(mb_states, mb.actions)
+                    logratio = newlogprob - mb.log_probs
                     ratio = logratio.exp()
                     with torch.no_grad():
                         # `http://joschu.net/blog/kl-approx.html`
                         old_approx_kl = (-logratio).mean()
                         approx_kl = ((ratio - 1) - logratio).mean()
-                        approx_kls += [approx_kl.cpu().item()]
-                        clipfrac = ((ratio - 1.0).abs() > self.clip_coef).float().mean().item()
-                        clipfracs += [clipfrac]
-                        all_approx_kls += [approx_kl.cpu().item()]
-                        all_approx_kls_old += [old_approx_kl.cpu().item()]
+                        if self.deferred_metrics:
+                            metric_sums[0] += approx_kl
+                            metric_sums[1] += old_approx_kl
+                            metric_sums[2] += ((ratio - 1.0).abs() > self.clip_coef).float().mean()
+                        else:
+                            approx_kls += [approx_kl.cpu().item()]
+                            clipfrac = ((ratio - 1.0).abs() > self.clip_coef).float().mean().item()
+                            clipfracs += [clipfrac]
+                            all_approx_kls += [approx_kl.cpu().item()]
+                            all_approx_kls_old += [old_approx_kl.cpu().item()]
                     
                     # XXX TODO: 这里减去的是minibatch的平均值, 可以考虑减去整个steps_per_epoch*num_envs的平均值
                     #           或其他自定义长度的平均值
@@ -309,7 +414,7 @@ class PPOAgent(OnlineAgentVE):
                     #      TODO: 将来校验
                     
                     # ** normalize mbatch_advantages **
-                    mbatch_advantages = batch_advantages[mini_batch_indices]
+                    mbatch_advantages = mb.advantages
                     if self.norm_adv and self.use_minibatch_norm_adv:
                         mbatch_advantages = (mbatch_advantages - mbatch_advantages.mean()) / (mbatch_advantages.std() + self.norm_adv_eps)
         
@@ -325,21 +430,25 @@ class PPOAgent(OnlineAgentVE):
                     new_value = new_value.view(-1)
                     if self.clip_vloss:
                         # XXX: the code NOT good
-                        v_loss_unclipped = (new_value - batch_returns[mini_batch_indices]) ** 2
-                        v_clipped = batch_values[mini_batch_indices] + torch.clamp(
-                            new_value - batch_values[mini_batch_indices],
+                        v_loss_unclipped = (new_value - mb.returns) ** 2
+                        v_clipped = mb.values + torch.clamp(
+                            new_value - mb.values,
                             -self.clip_coef_v,
                             self.clip_coef_v,
                         )
                         # record
-                        v_clipfrac = ((v_clipped - batch_returns[mini_batch_indices]).abs() > self.clip_coef_v).float().mean().item()
-                        v_clipfracs += [v_clipfrac]
+                        if self.deferred_metrics:
+                            with torch.no_grad():
+                                metric_sums[3] += ((v_clipped - mb.returns).abs() > self.clip_coef_v).float().mean()
+                        else:
+                            v_clipfrac = ((v_clipped - mb.returns).abs() > self.clip_coef_v).float().mean().item()
+                            v_clipfracs += [v_clipfrac]
                         
-                        v_loss_clipped = (v_clipped - batch_returns[mini_batch_indices]) ** 2
+                        v_loss_clipped = (v_clipped - mb.returns) ** 2
                         v_loss_max = torch.max(v_loss_unclipped, v_loss_clipped)
                         v_loss = 0.5 * v_loss_max.mean()
                     else:
-                        v_loss = 0.5 * ((new_value - batch_returns[mini_batch_indices]) ** 2).mean()
+                        v_loss = 0.5 * ((new_value - mb.returns) ** 2).mean()
 
                     kl_loss = ((ratio - 1) - logratio).mean()
                     entropy_loss = entropy.mean()
@@ -353,9 +462,29 @@ class PPOAgent(OnlineAgentVE):
                         nn.utils.clip_grad_norm_(self.actor_critic.parameters(), self.max_grad_norm)
                     self.optimizer.step() 
                     
-                    if self.autotune_ent_coef:
+                    if self.deferred_metrics:
+                        num_minibatches += 1
+                        if self.autotune_ent_coef:
+                            metric_sums[4] += entropy_loss.detach()
+                    elif self.autotune_ent_coef:
                         total_entropy += entropy.mean().item()
                         entropy_count += 1
+                
+                if self.deferred_metrics:
+                    # 每个update epoch只同步一次
+                    approx_kl, old_approx_kl, clipfrac, epoch_v_clipfrac, epoch_entropy = (
+                        metric_sums / num_minibatches
+                    ).tolist()
+                    approx_kls += [approx_kl]
+                    clipfracs += [clipfrac]
+                    all_approx_kls += [approx_kl]
+                    all_approx_kls_old += [old_approx_kl]
+                    if self.clip_vloss:
+                        v_clipfrac = epoch_v_clipfrac
+                        v_clipfracs += [v_clipfrac]
+                    if self.autotune_ent_coef:
+                        total_entropy += epoch_entropy * num_minibatches
+                        entropy_count += num_minibatches
                         
                 if _epoch % 20 == 0:
                     self.logger.debug(
@@ -377,12 +506,12 @@ class PPOAgent(OnlineAgentVE):
                     # break
                 
                 if self.kl_stop is not None and approx_kl > self.kl_stop:
-                    self.logger.debug(f"Early stopping at step {epoch} due to reaching max kl: {approx_kl.detach().cpu().item()}")
+                    self.logger.debug(f"Early stopping at step {epoch} due to reaching max kl: {float(approx_kl)}")
                     exit_this_train = True
                     break
                 
                 if self.target_kl is not None and approx_kl > self.target_kl:
-                    self.logger.info(f"Early stopping Program at step {epoch} due to reaching max kl: {approx_kl.detach().cpu().item()}")
+                    self.logger.info(f"Early stopping Program at step {epoch} due to reaching max kl: {float(approx_kl)}")
                     exit_this_train = True
                     should_exit_learning = True
                     break
@@ -435,36 +564,93 @@ class PPOAgent(OnlineAgentVE):
     def after_learn(self):
         pass
     
-    def predict(self, state, deterministic=False):
+    def predict(self, state, deterministic=False, normalize_obs=True):
         # for single env
         if np.isscalar(state):
             state = np.array([state])
         assert state.shape == self.state_dim
-        states = torch.FloatTensor(np.array([state])).to(self.device)
+        actions, batch_info = self.predict_batch(np.asarray(state)[None], deterministic=deterministic,
+                                                 return_info=True, normalize_obs=normalize_obs)
+        info = {
+            'action_probs': batch_info['log_probs'][0].tolist(),
+            'entropy': batch_info['entropy'][0].tolist(),
+            'values': batch_info['values'][:1].tolist()
+        }
+        action = actions[0]
+        return action.item() if np.isscalar(action) else action, info
+
+    def predict_batch(self, states, deterministic=False, return_info=False, normalize_obs=True):
+        """
+        Actions for a batch of (raw) states `(n, *state_dim)` in one forward pass.
+
+        Args:
+            normalize_obs (bool): Normalize the states with `obs_rms`; False for states that are
+                already normalized, e.g. by a `NormalizeVecEnvPlayer`.
+
+        Returns:
+            actions: `(n,)` (discrete) or `(n, action_dim)` (continuous) array.
+            info: None, or if `return_info` a dict of `(n,)` arrays `log_probs`, `entropy`, `values`.
+        """
+        states = np.asarray(states)
+        if self.state_dim == (1,) and states.ndim == 1:
+            states = states[:, None]
+        assert states.shape[1:] == self.state_dim, f'{states.shape=}, expected (n, *{self.state_dim})'
+        if normalize_obs and self.obs_rms is not None:
+            # 原始观测，用训练得到的统计量归一化(不更新)
+            states = self.obs_rms.normalize(states)
+        states = torch.as_tensor(states, device=self.device).to(self._state_dtype)
         with torch.no_grad():
-            actions, action_probs, entropy, values = self.actor_critic.get_action_and_value(
-                states, deterministic=deterministic,
-                compute_entropy=True
+            actions, log_probs, entropy, values = self.actor_critic.get_action_and_value_fused(
+                states, deterministic=deterministic, compute_entropy=return_info
             )
-            info = {
-                'action_probs': action_probs[0].cpu().tolist(),
-                'entropy': entropy[0].cpu().tolist(),
-                'values': values[0].cpu().tolist()
-            }
-        action = actions[0].cpu().numpy()
-        return action.item() if np.isscalar(action) else action, info
-    
+        actions = actions.cpu().numpy()
+        if not return_info:
+            return actions, None
+        info = {
+            'log_probs': log_probs.cpu().numpy(),
+            'entropy': entropy.cpu().numpy(),
+            'values': values.flatten().cpu().numpy(),
+        }
+        return actions, info
+
+    def export_policy(self, path, format='npz'):
+        """Inference-only export (actor, obs normalization, action scaling), see export.py"""
+        export_policy(self, path, format=format)
+
     def model_dict(self):
         state = {
             'config': self.config,
             'actor_critic': self.actor_critic.state_dict(),
             'optimizer': self.optimizer.state_dict(),
         }
+        if self.obs_rms is not None:
+            state['obs_rms'] = self.obs_rms.state_dict()
+        if getattr(self.env, 'ret_rms', None) is not None:
+            state['ret_rms'] = self.env.ret_rms.state_dict()
         return state
     
+    def policy_dict(self):
+        """`model_dict` without optimizer state and reward normalization (see `EvalWorker`)"""
+        state = {
+            'config': self.config,
+            'actor_critic': self.actor_critic.state_dict(),
+        }
+        if self.obs_rms is not None:
+            state['obs_rms'] = self.obs_rms.state_dict()
+        return state
+
     def load_model_dict(self, model_dict):
         self.config = model_dict['config']
         self.initialize()
         self.actor_critic.load_state_dict(model_dict['actor_critic'])
-        self.optimizer.load_state_dict(model_dict['optimizer'])
+        # policy_dict 不包含优化器状态
+        if 'optimizer' in model_dict:
+            self.optimizer.load_state_dict(model_dict['optimizer'])
+        if model_dict.get('obs_rms') is not None:
+            if self.obs_rms is None:
+                self.obs_rms = RunningMeanStd.from_state_dict(model_dict['obs_rms'])
+            else:
+                self.obs_rms.load_state_dict(model_dict['obs_rms'])
+        if model_dict.get('ret_rms') is not None and getattr(self.env, 'ret_rms', None) is not None:
+            self.env.ret_rms.load_state_dict(model_dict['ret_rms'])
     
@@ -0,0 +1,188 @@
+"""
+Inference-only export of a trained PPO policy: only the actor weights, the observation
+normalization (`obs_rms`) and the action scaling, without optimizer state or config.
+
+Formats (load them with `rlearn.serving.runtime.load_policy`, which needs neither gymnasium
+nor tensorboard):
+
+- 'npz': the actor as a list of NumPy layers, evaluated by `NumpyPolicy` (MLP actors only)
+- 'torch': a `torch.export` program (.pt2), any architecture including CNN encoders
+- 'onnx': ONNX graph via `torch.onnx.export` (requires the optional onnx/onnxscript packages)
+
+The torch/onnx programs compute the deterministic action; 'npz' also keeps `log_std`
+(continuous) for sampling.
+"""
+import copy
+import json
+import numpy as np
+import torch
+import torch.nn as nn
+from .network.layers import ACTIVATIONS
+
+EXPORT_FORMATS = ('npz', 'torch', 'onnx')
+NPZ_FORMAT_VERSION = 1
+
+
+class ExportedPolicy(nn.Module):
+    """obs -> deterministic action (argmax / clipped action mean), with observation normalization"""
+
+    def __init__(self, actor_critic, is_continuous, obs_rms=None):
+        super().__init__()
+        self.net = _actor_only(copy.deepcopy(actor_critic).cpu().eval())
+        self.is_continuous = is_continuous
+        self.normalize_obs = obs_rms is not None
+        if self.normalize_obs:
+            self.register_buffer('obs_mean', torch.tensor(np.asarray(obs_rms.mean), dtype=torch.float32))
+            self.register_buffer('obs_std', torch.tensor(np.sqrt(np.asarray(obs_rms.var) + obs_rms.epsilon),
+                                                         dtype=torch.float32))
+            self.clip_obs = obs_rms.clip
+        self.clip_action = is_continuous and self.net.scale_action
+
+    def forward(self, obs):
+        if self.normalize_obs:
+            obs = (obs.float() - self.obs_mean) / self.obs_std
+            if self.clip_obs is not None:
+                obs = obs.clamp(-self.clip_obs, self.clip_obs)
+        out = self.net.forward_actor(obs)
+        if not self.is_continuous:
+            return out.argmax(dim=-1)
+        if self.clip_action:
+            out = torch.max(torch.min(out, self.net.action_high_bound), self.net.action_low_bound)
+        return out
+
+
+def _actor_only(net):
+    """Remove the critic (in place) so that exported programs only hold the actor weights"""
+    if net.arch == 'separate':
+        del net.critic
+        return net
+    heads = net.heads
+    out_dim = heads.out_dims[0]
+    with torch.no_grad():
+        if net.arch == 'shared':
+            head = nn.Linear(heads.head.in_features, out_dim)
+            head.weight.copy_(heads.head.weight[:out_dim])
+            head.bias.copy_(heads.head.bias[:out_dim])
+            heads.head = head
+        elif net.arch == 'stacked':
+            # 只保留第0个head(actor)
+            heads.weights = nn.ParameterList([nn.Parameter(w[:1].clone()) for w in heads.weights])
+            heads.biases = nn.ParameterList([nn.Parameter(b[:1].clone()) for b in heads.biases])
+            heads.num_heads = 1
+        else:
+            raise ValueError(f'Cannot export network arch {net.arch}')
+    heads.out_dims = [out_dim]
+    return net
+
+
+def export_policy(agent, path, format='npz'):
+    """
+    Write the policy of a `PPOAgent` for inference-only deployment.
+    Args:
+        agent: A (trained) `PPOAgent`.
+        path: Output file, e.g. 'policy.npz', 'policy.pt2', 'policy.onnx'.
+        format (str): One of `EXPORT_FORMATS`.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f'Unknown export format: {format}, expected one of {EXPORT_FORMATS}')
+    if format == 'npz':
+        arrays = _npz_arrays(agent)
+        np.savez(path, **arrays)
+        return
+
+    policy = ExportedPolicy(agent.actor_critic, agent.is_continuous, agent.obs_rms)
+    dtype = torch.uint8 if agent.obs_dtype == torch.uint8 else torch.float32
+    example = torch.zeros((2,) + tuple(agent.state_dim), dtype=dtype)
+    if format == 'torch':
+        program = torch.export.export(policy, (example,),
+                                      dynamic_shapes={'obs': {0: torch.export.Dim('batch', min=1)}})
+        torch.export.save(program, str(path))
+        return
+    try:
+        import onnx  # noqa: F401
+    except ImportError as e:
+        raise ImportError("format='onnx' requires the onnx package: pip install onnx onnxscript") from e
+    torch.onnx.export(policy, (example,), str(path), input_names=['obs'], output_names=['action'],
+                      dynamic_axes={'obs': {0: 'batch'}, 'action': {0: 'batch'}})
+
+
+def _npz_arrays(agent):
+    net = agent.actor_critic
+    if getattr(net, 'encoder', None) is not None:
+        raise ValueError("format='npz' only supports MLP actors, use format='torch' for encoders")
+    arrays = {}
+    layers = []
+
+    def add_linear(weight, bias):
+        """weight: (in, out)"""
+        name = f'layer{len(layers)}'
+        arrays[f'{name}.weight'] = weight.detach().cpu().numpy().astype(np.float32)
+        arrays[f'{name}.bias'] = bias.detach().cpu().numpy().astype(np.float32)
+        layers.append({'type': 'linear', 'name': name})
+
+    def add_module(module):
+        if isinstance(module, nn.Linear):
+            add_linear(module.weight.T, module.bias)
+        elif isinstance(module, nn.LayerNorm):
+            name = f'layer{len(layers)}'
+            arrays[f'{name}.weight'] = module.weight.detach().cpu().numpy().astype(np.float32)
+            arrays[f'{name}.bias'] = module.bias.detach().cpu().numpy().astype(np.float32)
+            layers.append({'type': 'layer_norm', 'name': name, 'eps': module.eps})
+        else:
+            layers.append(_activation_layer(module))
+
+    if net.arch == 'separate':
+        for module in (net.actor_mean if agent.is_continuous else net.actor):
+            add_module(module)
+    elif net.arch == 'shared':
+        for module in net.heads.trunk:
+            add_module(module)
+        out_dim = net.heads.out_dims[0]
+        add_linear(net.heads.head.weight[:out_dim].T, net.heads.head.bias[:out_dim])
+    elif net.arch == 'stacked':
+        heads = net.heads
+        last = len(heads.weights) - 1
+        for i, (w, b) in enumerate(zip(heads.weights, heads.biases)):
+            if i == last:
+                add_linear(w[0, :, :heads.out_dims[0]], b[0, 0, :heads.out_dims[0]])
+            else:
+                add_linear(w[0], b[0, 0])
+                layers.append(_activation_layer(heads.activation))
+    else:
+        raise ValueError(f"format='npz' does not support network arch {net.arch}")
+    if agent.is_continuous and net.arch != 'separate' and net.scale_action:
+        layers.append({'type': 'activation', 'fn': 'tanh'})
+
+    meta = {
+        'format_version': NPZ_FORMAT_VERSION,
+        'kind': 'continuous' if agent.is_continuous else 'discrete',
+        'state_dim': list(agent.state_dim),
+        'layers': layers,
+        'normalize_obs': agent.obs_rms is not None,
+        'clip_obs': agent.obs_rms.clip if agent.obs_rms is not None else None,
+        'scale_action': bool(agent.is_continuous and net.scale_action),
+    }
+    if agent.obs_rms is not None:
+        arrays['obs_mean'] = np.asarray(agent.obs_rms.mean, dtype=np.float32)
+        arrays['obs_std'] = np.sqrt(np.asarray(agent.obs_rms.var) + agent.obs_rms.epsilon).astype(np.float32)
+    if agent.is_continuous:
+        arrays['log_std'] = net.actor_logstd.detach().cpu().numpy().reshape(-1).astype(np.float32)
+        if net.scale_action:
+            for name in ['action_scale', 'action_bias', 'action_low_bound', 'action_high_bound']:
+                arrays[name] = getattr(net, name).detach().cpu().numpy().astype(np.float32)
+    arrays['__meta__'] = np.array(json.dumps(meta))
+    return arrays
+
+
+def _activation_layer(module):
+    for name, cls in ACTIVATIONS.items():
+        if type(module) is cls:
+            layer = {'type': 'activation', 'fn': name}
+            if name == 'leaky_relu':
+                layer['negative_slope'] = module.negative_slope
+            elif name == 'elu':
+                layer['alpha'] = module.alpha
+            elif name == 'gelu' and module.approximate != 'none':
+                layer['approximate'] = module.approximate
+            return layer
+    raise ValueError(f"format='npz' does not support layer {module}")
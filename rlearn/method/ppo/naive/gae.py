@@ -0,0 +1,163 @@
+"""
+GAE (Generalized Advantage Estimation) with selectable backends.
+
+All backends compute the same quantity; rollout tensors are time-major `(steps, num_envs)`:
+
+    delta[t] = rewards[t] + gamma * values[t+1] * (1 - terminations[t+1]) - values[t]
+    adv[t]   = delta[t] + gamma * gae_lambda * (1 - dones[t+1]) * adv[t+1]
+
+`dones[t]`/`terminations[t]` are the flags of `states[t]` (i.e. the env ended in the step that
+produced `states[t]`); index `steps` refers to `next_value`/`next_done`/`next_termination`.
+With the players of this repo (next-step auto-reset) `states[t+1]` of an ended episode is the
+final observation, so `values[t+1]` bootstraps truncated episodes when `terminations` is given.
+Without `terminations`, every done is treated as a termination (no bootstrapping).
+
+Backends:
+    - 'loop': reference Python loop over time (one set of tiny torch ops per step)
+    - 'torchscript': the same scan compiled with `torch.jit.script` (no Python per step)
+    - 'numpy': the scan on host NumPy arrays
+    - 'numba': the scan as a `numba.njit` kernel (requires numba)
+    - 'discount': reverse-cumulative-discount as one matmul with a `(steps, steps)` discount
+      matrix; only valid without dones, otherwise falls back to 'torchscript'
+"""
+import numpy as np
+import torch
+
+GAE_BACKENDS = ('loop', 'torchscript', 'numpy', 'numba', 'discount')
+
+
+def _prepare(rewards, values, dones, next_value, next_done, gamma, terminations, next_termination):
+    """Vectorized part: (deltas, decays) where adv[t] = deltas[t] + decays[t] * adv[t+1]"""
+    next_value = next_value.reshape(1, -1)
+    next_dones = torch.cat([dones[1:], next_done.reshape(1, -1)])
+    if terminations is None:
+        next_terminations = next_dones
+    else:
+        next_terminations = torch.cat([terminations[1:], next_termination.reshape(1, -1)])
+    next_values = torch.cat([values[1:], next_value])
+    deltas = rewards + gamma * next_values * (1.0 - next_terminations) - values
+    return deltas, 1.0 - next_dones
+
+
+def _gae_loop(deltas, nondones, gae_lambda_gamma):
+    advantages = torch.zeros_like(deltas)
+    lastgaelam = 0
+    for t in reversed(range(deltas.shape[0])):
+        advantages[t] = lastgaelam = deltas[t] + gae_lambda_gamma * nondones[t] * lastgaelam
+    return advantages
+
+
+def _gae_scan(deltas: torch.Tensor, decays: torch.Tensor) -> torch.Tensor:
+    advantages = torch.empty_like(deltas)
+    lastgaelam = torch.zeros_like(deltas[0])
+    for t in range(deltas.shape[0] - 1, -1, -1):
+        lastgaelam = deltas[t] + decays[t] * lastgaelam
+        advantages[t] = lastgaelam
+    return advantages
+
+
+_scripted_scan = None
+
+
+def _gae_torchscript(deltas, nondones, gae_lambda_gamma):
+    global _scripted_scan
+    if _scripted_scan is None:
+        # NOTE: 延迟编译，只有选用该backend时才需要torch.jit
+        _scripted_scan = torch.jit.script(_gae_scan)
+    return _scripted_scan(deltas, gae_lambda_gamma * nondones)
+
+
+def _np_scan(deltas, decays, advantages):
+    lastgaelam = np.zeros_like(deltas[0])
+    for t in range(deltas.shape[0] - 1, -1, -1):
+        lastgaelam = deltas[t] + decays[t] * lastgaelam
+        advantages[t] = lastgaelam
+    return advantages
+
+
+def _gae_numpy(deltas, nondones, gae_lambda_gamma):
+    deltas_np = deltas.cpu().numpy()
+    decays_np = (gae_lambda_gamma * nondones).cpu().numpy()
+    advantages = _np_scan(deltas_np, decays_np, np.empty_like(deltas_np))
+    return torch.from_numpy(advantages).to(deltas.device)
+
+
+_numba_scan = None
+
+
+def _gae_numba(deltas, nondones, gae_lambda_gamma):
+    global _numba_scan
+    if _numba_scan is None:
+        try:
+            import numba
+        except ImportError as e:
+            raise ImportError("gae_backend='numba' requires numba: pip install numba") from e
+        _numba_scan = numba.njit(cache=True)(_np_scan)
+    deltas_np = deltas.cpu().numpy()
+    decays_np = (gae_lambda_gamma * nondones).cpu().numpy()
+    advantages = _numba_scan(deltas_np, decays_np, np.empty_like(deltas_np))
+    return torch.from_numpy(advantages).to(deltas.device)
+
+
+_discount_matrices = {}
+
+
+def discount_matrix(steps, discount, device=None, dtype=torch.float32):
+    """
+    Upper-triangular Toeplitz matrix `M[t, s] = discount ** (s - t)` for `s >= t`, so that
+    `M @ x` is the reverse cumulative discounted sum of `x` along the first axis. Cached.
+    """
+    key = (steps, float(discount), str(device), dtype)
+    matrix = _discount_matrices.get(key)
+    if matrix is None:
+        exponents = torch.arange(steps, dtype=torch.float64)
+        exponents = exponents.reshape(1, -1) - exponents.reshape(-1, 1)
+        matrix = torch.where(exponents >= 0, float(discount) ** exponents.clamp(min=0), 0.0)
+        matrix = matrix.to(device=device, dtype=dtype)
+        _discount_matrices[key] = matrix
+    return matrix
+
+
+def _gae_discount(deltas, nondones, gae_lambda_gamma):
+    if not bool(nondones.all()):
+        # episode边界会打断折扣链，退回scan
+        return _gae_torchscript(deltas, nondones, gae_lambda_gamma)
+    matrix = discount_matrix(deltas.shape[0], gae_lambda_gamma, device=deltas.device, dtype=deltas.dtype)
+    return matrix @ deltas
+
+
+_BACKEND_FNS = {
+    'loop': _gae_loop,
+    'torchscript': _gae_torchscript,
+    'numpy': _gae_numpy,
+    'numba': _gae_numba,
+    'discount': _gae_discount,
+}
+
+
+def compute_gae(rewards, values, dones, next_value, next_done, gamma, gae_lambda,
+                terminations=None, next_termination=None, backend='loop'):
+    """
+    Compute GAE advantages and returns.
+
+    Args:
+        rewards, values, dones: `(steps, num_envs)` tensors.
+        next_value, next_done: `(num_envs,)` value and done flag of the state after the last step.
+        gamma, gae_lambda: discount and GAE lambda.
+        terminations, next_termination: termination flags (same layout as `dones`/`next_done`).
+            If given, truncated episodes are bootstrapped with the value of their final state.
+        backend: one of `GAE_BACKENDS`.
+
+    Returns:
+        advantages, returns (= advantages + values), both `(steps, num_envs)`
+    """
+    if backend not in _BACKEND_FNS:
+        raise ValueError(f'Unknown GAE backend: {backend}, expected one of {GAE_BACKENDS}')
+    if (terminations is None) != (next_termination is None):
+        raise ValueError('terminations and next_termination must be given together')
+    with torch.no_grad():
+        deltas, nondones = _prepare(rewards, values, dones, next_value, next_done,
+                                    gamma, terminations, next_termination)
+        advantages = _BACKEND_FNS[backend](deltas, nondones, gamma * gae_lambda)
+        returns = advantages + values
+    return advantages, returns
@@ -1,4 +1,5 @@
-# from .actor_critic import MLPActor, MLPCritic
-# from .api import get_actor_model, get_critic_model
+from .api import register_network, make_actor_critic, NETWORKS
+from .layers import register_encoder, make_encoder, make_mlp, CNNEncoder, ENCODERS, ACTIVATIONS
 
-# __all__ = ['MLPActor', 'MLPCritic', 'get_actor_model', 'get_critic_model']
+__all__ = ['register_network', 'make_actor_critic', 'NETWORKS',
+           'register_encoder', 'make_encoder', 'make_mlp', 'CNNEncoder', 'ENCODERS', 'ACTIVATIONS']
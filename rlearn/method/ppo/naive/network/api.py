@@ -1,12 +1,34 @@
-from .discrete import MLPActor, MLPCritic
+import gymnasium as gym
+from .discrete import ActorCritic as ActorCriticDiscrete
+from .continous import ActorCritic as ActorCriticContinous
 
+NETWORKS = {}
 
-def get_actor_model(env, model_type='MLPActor', model_kwargs={}):
-    assert model_type == 'MLPActor'
-    actor = MLPActor(env)
-    return actor
 
-def get_critic_model(env, model_type='MLPCritic', model_kwargs={}):
-    assert model_type == 'MLPCritic'
-    critic = MLPCritic(env)
-    return critic
\ No newline at end of file
+def register_network(name):
+    """
+    Register an actor-critic factory `fn(state_dim, action_space, **kwargs) -> nn.Module`.
+    The module must provide `get_value` and `get_action_and_value` (and `get_action_and_value_fused`
+    for `policy_backend='fused'/'compile'`) like `discrete.ActorCritic`/`continous.ActorCritic`.
+    """
+    def decorator(fn):
+        NETWORKS[name] = fn
+        return fn
+    return decorator
+
+
+@register_network('actor_critic')
+def make_default_actor_critic(state_dim, action_space, rpo_alpha=0.0, **kwargs):
+    """
+    The MLP actor-critic (optionally with an encoder), discrete or continuous by `action_space`.
+    kwargs: arch, hidden_sizes, activation, layer_norm, encoder, encoder_kwargs
+    """
+    if isinstance(action_space, gym.spaces.Box):
+        return ActorCriticContinous(state_dim, action_space, rpo_alpha=rpo_alpha, **kwargs)
+    return ActorCriticDiscrete(state_dim, action_space.n, **kwargs)
+
+
+def make_actor_critic(name, state_dim, action_space, **kwargs):
+    if name not in NETWORKS:
+        raise ValueError(f'Unknown network: {name}, expected one of {list(NETWORKS)}')
+    return NETWORKS[name](state_dim, action_space, **kwargs)
@@ -2,19 +2,26 @@ import torch
 import torch.nn as nn
 import numpy as np
 from torch.distributions import Normal
-from .utils import layer_init
+from .layers import make_mlp, make_encoder
+from .fused import normal_sample, normal_log_prob_entropy
+from .heads import make_heads
 
 class ActorCritic(nn.Module):
-    def __init__(self, state_dim, action_space, rpo_alpha=0.0, scale_action=True):
+    def __init__(self, state_dim, action_space, rpo_alpha=0.0, scale_action=True, arch='separate',
+                 hidden_sizes=(64, 64), activation='tanh', layer_norm=False, encoder=None, encoder_kwargs=None):
         """
         Args: 
             scale_action (bool): 是否裁剪动作 
+            arch (str): 'separate': 独立的actor/critic MLP; 'stacked'/'shared': 见 heads.py
+            hidden_sizes, activation, layer_norm: MLP结构, 见 layers.make_mlp
+            encoder (str): 观测编码器(如'cnn')，actor与critic共享; None: 直接使用展平的观测
         """
         super().__init__()
         self.state_dim = state_dim if state_dim else (1,)
         self.action_dim = action_space.shape
         self.action_space = action_space
         self.rpo_alpha = rpo_alpha
+        self.arch = arch
 
         if (self.action_space.high is not None and self.action_space.low is not None and 
             not (np.isinf(self.action_space.high).any() or np.isinf(self.action_space.low).any())):
@@ -24,31 +31,18 @@ class ActorCritic(nn.Module):
         else:
             self.scale_action = False
         
-        self.critic = nn.Sequential(
-            layer_init(nn.Linear(np.prod(self.state_dim), 64)),
-            nn.Tanh(),
-            layer_init(nn.Linear(64, 64)),
-            nn.Tanh(),
-            layer_init(nn.Linear(64, 1), std=1.0),
-        )
-        if self.scale_action:
-            self.actor_mean = nn.Sequential(
-                layer_init(nn.Linear(np.prod(self.state_dim), 64)),
-                nn.Tanh(),
-                layer_init(nn.Linear(64, 64)),
-                nn.Tanh(),
-                layer_init(nn.Linear(64, np.prod(self.action_dim)), std=0.01),
-                nn.Tanh(), # 确保动作在有效范围内
-            )
+        self.encoder, in_dim = make_encoder(encoder, self.state_dim, **(encoder_kwargs or {}))
+        out_dim = int(np.prod(self.action_dim))
+        if arch != 'separate':
+            # actor输出不含Tanh，scale_action时在 _forward_heads 中处理
+            self.heads = make_heads(arch, in_dim, [out_dim, 1], [0.01, 1.0], hidden_sizes=hidden_sizes,
+                                    activation=activation, layer_norm=layer_norm)
         else:
-            self.actor_mean = nn.Sequential(
-                layer_init(nn.Linear(np.prod(self.state_dim), 64)),
-                nn.Tanh(),
-                layer_init(nn.Linear(64, 64)),
-                nn.Tanh(),
-                # 没有裁剪，初始均匀动作
-                layer_init(nn.Linear(64, np.prod(self.action_dim)), std=0.01)
-            )
+            self.critic = make_mlp(in_dim, hidden_sizes, 1, activation, out_std=1.0, layer_norm=layer_norm)
+            # scale_action: Tanh确保动作在有效范围内; 否则没有裁剪，初始均匀动作
+            self.actor_mean = make_mlp(in_dim, hidden_sizes, out_dim, activation, out_std=0.01,
+                                       out_activation='tanh' if self.scale_action else None,
+                                       layer_norm=layer_norm)
         self.actor_logstd = nn.Parameter(torch.zeros(1, np.prod(self.action_dim)))
         if self.scale_action:
             self.register_buffer(
@@ -57,17 +51,52 @@ class ActorCritic(nn.Module):
             self.register_buffer(
                 "action_bias", torch.tensor((self.action_space.high + self.action_space.low) / 2.0, dtype=torch.float32)
             )
+            # device上的动作边界，fused路径使用；不保存到state_dict
+            self.register_buffer("action_low_bound", self.action_low.clone(), persistent=False)
+            self.register_buffer("action_high_bound", self.action_high.clone(), persistent=False)
+
+    def _encode(self, x):
+        if self.encoder is not None:
+            return self.encoder(x)
+        if len(self.state_dim) > 1:
+            return x.flatten(1)
+        return x
+
+    def _forward_heads(self, x):
+        """(action_mean, value), action_mean already scaled to the action space"""
+        x = self._encode(x)
+        if self.arch == 'separate':
+            action_mean, value = self.actor_mean(x), self.critic(x)
+        else:
+            action_mean, value = self.heads(x)
+            if self.scale_action:
+                action_mean = torch.tanh(action_mean)
+        if self.scale_action:
+            action_mean = action_mean * self.action_scale + self.action_bias
+        return action_mean, value
+
+    def forward_actor(self, x):
+        """action_mean (scaled to the action space), without evaluating the critic"""
+        x = self._encode(x)
+        if self.arch == 'separate':
+            action_mean = self.actor_mean(x)
+        else:
+            action_mean = self.heads(x, head=0)
+            if self.scale_action:
+                action_mean = torch.tanh(action_mean)
+        if self.scale_action:
+            action_mean = action_mean * self.action_scale + self.action_bias
+        return action_mean
 
     def get_value(self, x):
-        return self.critic(x)
+        x = self._encode(x)
+        if self.arch == 'separate':
+            return self.critic(x)
+        return self.heads(x, head=1)
 
     def get_action_and_value(self, x, action=None, compute_entropy=True, deterministic=False):
         # from: https://docs.cleanrl.dev/rl-algorithms/rpo/#implementation-details
-        action_mean = self.actor_mean(x)
-        if self.scale_action:
-            # print(f"action_mean: {action_mean}")
-            action_mean = action_mean * self.action_scale + self.action_bias
-            # print(f"action_mean: {action_mean}")
+        action_mean, value = self._forward_heads(x)
         action_logstd = self.actor_logstd.expand_as(action_mean)
         action_std = torch.exp(action_logstd)
         probs = Normal(action_mean, action_std)
@@ -91,4 +120,18 @@ class ActorCritic(nn.Module):
             # TODO: ensure device
             device = action.device
             action = torch.clip(action, self.action_low.to(device), self.action_high.to(device))
-        return action, probs.log_prob(action).sum(1), entropy, self.critic(x)
+        return action, probs.log_prob(action).sum(1), entropy, value
+
+    def get_action_and_value_fused(self, x, action=None, compute_entropy=True, deterministic=False):
+        """Same as `get_action_and_value`, without building `Normal`s (see fused.py)"""
+        action_mean, value = self._forward_heads(x)
+        action_logstd = self.actor_logstd
+        if action is None:
+            action = action_mean if deterministic else normal_sample(action_mean, action_logstd)
+        elif self.rpo_alpha:
+            # RPO: sample again to add stochasticity, for the policy update
+            action_mean = action_mean + torch.empty_like(action_mean).uniform_(-self.rpo_alpha, self.rpo_alpha)
+        if self.scale_action:
+            action = torch.max(torch.min(action, self.action_high_bound), self.action_low_bound)
+        log_prob, entropy = normal_log_prob_entropy(action_mean, action_logstd, action, compute_entropy)
+        return action, log_prob, entropy, value
@@ -2,42 +2,78 @@ import torch
 import torch.nn as nn
 import numpy as np
 from torch.distributions import Categorical
-from .utils import layer_init
+from .layers import make_mlp, make_encoder
+from .fused import categorical_sample, categorical_log_prob_entropy
+from .heads import make_heads
 
 class ActorCritic(nn.Module):
-    def __init__(self, state_dim, action_dim):
+    def __init__(self, state_dim, action_dim, arch='separate', hidden_sizes=(64, 64), activation='tanh',
+                 layer_norm=False, encoder=None, encoder_kwargs=None):
+        """
+        Args:
+            arch (str): 'separate': 独立的actor/critic MLP; 'stacked'/'shared': 见 heads.py
+            hidden_sizes, activation, layer_norm: MLP结构, 见 layers.make_mlp
+            encoder (str): 观测编码器(如'cnn')，actor与critic共享; None: 直接使用展平的观测
+        """
         super().__init__()
         self.state_dim = state_dim if state_dim else (1,)
         self.action_dim = action_dim
-        self.critic = nn.Sequential(
-            layer_init(nn.Linear(np.prod(self.state_dim), 64)),
-            nn.Tanh(),
-            layer_init(nn.Linear(64, 64)),
-            nn.Tanh(),
-            layer_init(nn.Linear(64, 1), std=1.0),
-        )
-        self.actor = nn.Sequential(
-            layer_init(nn.Linear(np.prod(self.state_dim), 64)),
-            nn.Tanh(),
-            layer_init(nn.Linear(64, 64)),
-            nn.Tanh(),
-            layer_init(nn.Linear(64, action_dim), std=0.01),
-        )
+        self.arch = arch
         self.temperature = 1.0 # nn.Parameter(torch.tensor(1.0))
+        self.encoder, in_dim = make_encoder(encoder, self.state_dim, **(encoder_kwargs or {}))
+        if arch != 'separate':
+            self.heads = make_heads(arch, in_dim, [action_dim, 1], [0.01, 1.0], hidden_sizes=hidden_sizes,
+                                    activation=activation, layer_norm=layer_norm)
+            return
+        self.critic = make_mlp(in_dim, hidden_sizes, 1, activation, out_std=1.0, layer_norm=layer_norm)
+        self.actor = make_mlp(in_dim, hidden_sizes, action_dim, activation, out_std=0.01, layer_norm=layer_norm)
+
+    def _encode(self, x):
+        if self.encoder is not None:
+            return self.encoder(x)
+        if len(self.state_dim) > 1:
+            return x.flatten(1)
+        return x
+
+    def _forward_heads(self, x):
+        """(logits, value)"""
+        x = self._encode(x)
+        if self.arch == 'separate':
+            return self.actor(x), self.critic(x)
+        return self.heads(x)
+
+    def forward_actor(self, x):
+        """logits, without evaluating the critic"""
+        x = self._encode(x)
+        if self.arch == 'separate':
+            return self.actor(x)
+        return self.heads(x, head=0)
 
     def get_value(self, x):
-        return self.critic(x)
+        x = self._encode(x)
+        if self.arch == 'separate':
+            return self.critic(x)
+        return self.heads(x, head=1)
     
     def get_action_and_value(self, x, action=None,
                              compute_entropy=True, deterministic=False):
-        logits = self.actor(x) /self.temperature
+        logits, value = self._forward_heads(x)
+        logits = logits / self.temperature
         probs = Categorical(logits=logits)
         if action is None:
             if deterministic:
-                assert logits.shape == (1, self.action_dim), 'only support single action'
                 action = torch.argmax(logits, dim=1)
-                assert logits.shape[0] == 1, 'only support single action'
             else:
                 action = probs.sample()
         entropy = probs.entropy() if compute_entropy else None
-        return action, probs.log_prob(action), entropy, self.critic(x)
+        return action, probs.log_prob(action), entropy, value
+
+    def get_action_and_value_fused(self, x, action=None,
+                                   compute_entropy=True, deterministic=False):
+        """Same as `get_action_and_value`, without building a `Categorical` (see fused.py)"""
+        logits, value = self._forward_heads(x)
+        logits = logits / self.temperature
+        if action is None:
+            action = logits.argmax(dim=-1) if deterministic else categorical_sample(logits)
+        log_prob, entropy = categorical_log_prob_entropy(logits, action, compute_entropy)
+        return action, log_prob, entropy, value
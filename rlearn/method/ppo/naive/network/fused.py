@@ -0,0 +1,43 @@
+"""
+Hand-written distribution math for the fused policy path.
+
+Same results as `torch.distributions.Categorical`/`Normal`, but plain tensor ops without
+constructing distribution objects (no argument validation, no broadcasting bookkeeping),
+so that a whole `get_action_and_value` can run as a few kernels or be `torch.compile`d.
+"""
+import math
+import torch
+
+_HALF_LOG_2PI = 0.5 * math.log(2 * math.pi)
+
+
+def categorical_sample(logits):
+    """Gumbel-max sampling: argmax(logits - log(E)), E ~ Exp(1)"""
+    with torch.no_grad():
+        noise = torch.empty_like(logits).exponential_()
+        return (logits - noise.log()).argmax(dim=-1)
+
+
+def categorical_log_prob_entropy(logits, action, compute_entropy=True):
+    log_p = logits - logits.logsumexp(dim=-1, keepdim=True)
+    log_prob = log_p.gather(-1, action.long().unsqueeze(-1)).squeeze(-1)
+    if compute_entropy:
+        # clamp: p=0 时 0 * -inf = nan
+        entropy = -(log_p.exp() * log_p.clamp(min=torch.finfo(log_p.dtype).min)).sum(-1)
+    else:
+        entropy = None
+    return log_prob, entropy
+
+
+def normal_sample(mean, log_std):
+    with torch.no_grad():
+        return mean + log_std.exp() * torch.randn_like(mean)
+
+
+def normal_log_prob_entropy(mean, log_std, action, compute_entropy=True):
+    """log-prob and entropy of a diagonal Normal, summed over the last dim"""
+    log_std = log_std.expand_as(mean)
+    var = log_std.exp() ** 2
+    log_prob = (-(action - mean) ** 2 / (2 * var) - log_std - _HALF_LOG_2PI).sum(-1)
+    entropy = (0.5 + _HALF_LOG_2PI + log_std).sum(-1) if compute_entropy else None
+    return log_prob, entropy
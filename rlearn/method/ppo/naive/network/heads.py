@@ -0,0 +1,103 @@
+"""
+Actor and critic heads evaluated together, instead of two separate `nn.Sequential` MLPs.
+
+- `StackedMLPHeads`: independent MLPs per head (same math and init as separate networks),
+  weights stacked as `(num_heads, in, out)` so each layer of all heads is one `baddbmm`
+- `SharedTrunkHeads`: one shared MLP trunk followed by a single linear layer holding all heads
+"""
+import numpy as np
+import torch
+import torch.nn as nn
+from .utils import layer_init
+from .layers import get_activation
+
+
+class StackedMLPHeads(nn.Module):
+
+    def __init__(self, in_dim, out_dims, out_stds, hidden_sizes=(64, 64), activation='tanh', layer_norm=False):
+        """
+        Args:
+            in_dim (int): input features, shared by all heads
+            out_dims (list[int]): output features of each head
+            out_stds (list[float]): `layer_init` std of the output layer of each head
+        """
+        super().__init__()
+        if layer_norm:
+            raise ValueError("layer_norm is not supported by arch='stacked'")
+        self.out_dims = list(out_dims)
+        self.num_heads = len(self.out_dims)
+        sizes = [in_dim] + list(hidden_sizes) + [max(self.out_dims)]
+        self.weights = nn.ParameterList()
+        self.biases = nn.ParameterList()
+        for i, (n_in, n_out) in enumerate(zip(sizes[:-1], sizes[1:])):
+            is_output = i == len(sizes) - 2
+            weight = torch.zeros(self.num_heads, n_in, n_out)
+            bias = torch.zeros(self.num_heads, 1, n_out)
+            for k in range(self.num_heads):
+                # 与单独的nn.Linear相同的初始化；输出层多余的列保持为0，前向时被切掉
+                width = self.out_dims[k] if is_output else n_out
+                std = out_stds[k] if is_output else np.sqrt(2)
+                linear = layer_init(nn.Linear(n_in, width), std=std)
+                weight[k, :, :width] = linear.weight.detach().T
+                bias[k, 0, :width] = linear.bias.detach()
+            self.weights.append(nn.Parameter(weight))
+            self.biases.append(nn.Parameter(bias))
+        self.activation = get_activation(activation)()
+
+    def forward(self, x, head=None):
+        """Returns the list of head outputs, or only output `head` if given."""
+        if head is None:
+            weights, biases = list(self.weights), list(self.biases)
+            h = x.unsqueeze(0).expand(self.num_heads, *x.shape)
+        else:
+            weights = [w[head:head + 1] for w in self.weights]
+            biases = [b[head:head + 1] for b in self.biases]
+            h = x.unsqueeze(0)
+        last = len(weights) - 1
+        for i, (w, b) in enumerate(zip(weights, biases)):
+            h = torch.baddbmm(b, h, w)
+            if i != last:
+                h = self.activation(h)
+        if head is not None:
+            return h[0, :, :self.out_dims[head]]
+        return [h[k, :, :n] for k, n in enumerate(self.out_dims)]
+
+
+class SharedTrunkHeads(nn.Module):
+
+    def __init__(self, in_dim, out_dims, out_stds, hidden_sizes=(64, 64), activation='tanh', layer_norm=False):
+        super().__init__()
+        self.out_dims = list(out_dims)
+        activation = get_activation(activation)
+        layers = []
+        for n_in, n_out in zip([in_dim] + list(hidden_sizes[:-1]), hidden_sizes):
+            layers.append(layer_init(nn.Linear(n_in, n_out)))
+            if layer_norm:
+                layers.append(nn.LayerNorm(n_out))
+            layers.append(activation())
+        self.trunk = nn.Sequential(*layers)
+        last = hidden_sizes[-1] if hidden_sizes else in_dim
+        self.head = nn.Linear(last, sum(self.out_dims))
+        with torch.no_grad():
+            start = 0
+            for n, std in zip(self.out_dims, out_stds):
+                linear = layer_init(nn.Linear(last, n), std=std)
+                self.head.weight[start:start + n] = linear.weight
+                self.head.bias[start:start + n] = linear.bias
+                start += n
+
+    def forward(self, x, head=None):
+        outputs = self.head(self.trunk(x)).split(self.out_dims, dim=-1)
+        return list(outputs) if head is None else outputs[head]
+
+
+HEADS = {
+    'stacked': StackedMLPHeads,
+    'shared': SharedTrunkHeads,
+}
+
+
+def make_heads(arch, in_dim, out_dims, out_stds, **kwargs):
+    if arch not in HEADS:
+        raise ValueError(f'Unknown network arch: {arch}, expected one of separate, {", ".join(HEADS)}')
+    return HEADS[arch](in_dim, out_dims, out_stds, **kwargs)
@@ -0,0 +1,125 @@
+"""
+Building blocks of the actor-critic networks: activations, MLPs and observation encoders.
+"""
+import numpy as np
+import torch
+import torch.nn as nn
+from .utils import layer_init
+
+ACTIVATIONS = {
+    'tanh': nn.Tanh,
+    'relu': nn.ReLU,
+    'elu': nn.ELU,
+    'gelu': nn.GELU,
+    'silu': nn.SiLU,
+    'leaky_relu': nn.LeakyReLU,
+}
+
+
+def get_activation(activation):
+    """name (see `ACTIVATIONS`) or nn.Module class -> nn.Module class"""
+    if isinstance(activation, str):
+        if activation not in ACTIVATIONS:
+            raise ValueError(f'Unknown activation: {activation}, expected one of {list(ACTIVATIONS)}')
+        return ACTIVATIONS[activation]
+    return activation
+
+
+def make_mlp(in_dim, hidden_sizes, out_dim, activation='tanh', out_std=np.sqrt(2),
+             out_activation=None, layer_norm=False):
+    """
+    `Linear -> [LayerNorm] -> activation` per hidden layer, then the output `Linear`
+    (orthogonal init via `layer_init`, `out_std` for the output layer).
+    """
+    activation = get_activation(activation)
+    layers = []
+    for n_in, n_out in zip([in_dim] + list(hidden_sizes[:-1]), hidden_sizes):
+        layers.append(layer_init(nn.Linear(n_in, n_out)))
+        if layer_norm:
+            layers.append(nn.LayerNorm(n_out))
+        layers.append(activation())
+    last = hidden_sizes[-1] if hidden_sizes else in_dim
+    layers.append(layer_init(nn.Linear(last, out_dim), std=out_std))
+    if out_activation is not None:
+        layers.append(get_activation(out_activation)())
+    return nn.Sequential(*layers)
+
+
+class CNNEncoder(nn.Module):
+    """
+    Conv stack + linear projection for image observations.
+    Defaults are the Nature-DQN layout (32x8x8/4, 64x4x4/2, 64x3x3/1, 512 features).
+
+    Observations may be `(C, H, W)` or `(H, W, C)` (`channels_last`, auto-detected as the
+    smaller of the first/last dim being the channels) and of any dtype: they are converted to
+    float and multiplied by `obs_scale` inside `forward`, so uint8 frames can be stored and
+    transferred as-is. `(H, W, C)` input is permuted to a channels_last-strided NCHW view,
+    which the convolutions consume without a copy.
+    """
+
+    def __init__(self, state_dim, channels=(32, 64, 64), kernel_sizes=(8, 4, 3), strides=(4, 2, 1),
+                 out_features=512, activation='relu', obs_scale=None, channels_last=None):
+        super().__init__()
+        if len(state_dim) != 3:
+            raise ValueError(f'CNNEncoder expects (C, H, W) or (H, W, C) observations, got shape {state_dim}')
+        if channels_last is None:
+            channels_last = state_dim[-1] < state_dim[0]
+        self.channels_last = channels_last
+        self.obs_scale = obs_scale
+        chw = (state_dim[2], state_dim[0], state_dim[1]) if channels_last else tuple(state_dim)
+        activation = get_activation(activation)
+        layers = []
+        in_channels = chw[0]
+        for out_channels, kernel_size, stride in zip(channels, kernel_sizes, strides):
+            layers += [layer_init(nn.Conv2d(in_channels, out_channels, kernel_size, stride)), activation()]
+            in_channels = out_channels
+        layers.append(nn.Flatten())
+        self.conv = nn.Sequential(*layers)
+        with torch.no_grad():
+            n_flatten = self.conv(torch.zeros((1,) + chw)).shape[1]
+        self.linear = nn.Sequential(layer_init(nn.Linear(n_flatten, out_features)), activation())
+        self.out_dim = out_features
+
+    def forward(self, x):
+        if not x.is_floating_point():
+            x = x.float()
+        if self.obs_scale is not None:
+            x = x * self.obs_scale
+        if self.channels_last:
+            x = x.permute(0, 3, 1, 2)
+        return self.linear(self.conv(x))
+
+
+ENCODERS = {}
+
+
+def register_encoder(name):
+    """Register an encoder class `cls(state_dim, **kwargs)` with an `out_dim` attribute"""
+    def decorator(cls):
+        ENCODERS[name] = cls
+        return cls
+    return decorator
+
+
+register_encoder('cnn')(CNNEncoder)
+
+
+@register_encoder('nature_cnn')
+class NatureCNNEncoder(CNNEncoder):
+    """Atari Nature-CNN on raw pixels: 0..255 frames are scaled to [0, 1] inside `forward`"""
+
+    def __init__(self, state_dim, out_features=512, obs_scale=1.0 / 255.0, channels_last=None):
+        super().__init__(state_dim, out_features=out_features, obs_scale=obs_scale, channels_last=channels_last)
+
+
+def make_encoder(name, state_dim, **kwargs):
+    """
+    Returns `(encoder, out_dim)`; `name=None` means no encoder (the MLPs take the
+    flattened observation).
+    """
+    if name is None:
+        return None, int(np.prod(state_dim))
+    if name not in ENCODERS:
+        raise ValueError(f'Unknown encoder: {name}, expected one of {list(ENCODERS)}')
+    encoder = ENCODERS[name](state_dim, **kwargs)
+    return encoder, encoder.out_dim
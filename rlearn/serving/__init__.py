@@ -0,0 +1,6 @@
+from .micro_batch import MicroBatchServer
+from .runtime import load_policy, NumpyPolicy, TorchExportPolicy, OnnxPolicy
+from .numpy_engine import NumpyInferenceEngine
+
+__all__ = ['MicroBatchServer', 'load_policy', 'NumpyPolicy', 'TorchExportPolicy', 'OnnxPolicy',
+           'NumpyInferenceEngine']
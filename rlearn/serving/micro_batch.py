@@ -0,0 +1,159 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+
+class MicroBatchServer:
+    """
+    Thread-based micro-batching in front of an agent's `predict_batch`.
+
+    Concurrent callers `submit` single states and get a `Future`; one worker thread collects the
+    queued requests into a batch (up to `max_batch_size`, waiting at most `max_wait_ms` after the
+    first request), runs one batched forward pass and scatters the actions back to the futures.
+
+        server = MicroBatchServer.from_checkpoint('final_models/model.pth', env, PPOAgent)
+        with server:
+            action = server.predict(state)
+    """
+
+    def __init__(self, agent, max_batch_size=64, max_wait_ms=2.0, deterministic=True):
+        """
+        Args:
+            agent: An agent with `predict_batch(states, deterministic)`, e.g. `PPOAgent`.
+            max_batch_size (int): Maximum number of requests per forward pass.
+            max_wait_ms (float): Maximum time to wait for more requests once the first one arrived.
+            deterministic (bool): Passed to `predict_batch`.
+        """
+        self.agent = agent
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.deterministic = deterministic
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stop = threading.Event()
+        # submit与stop互斥: stop之后不会再有请求进入队列
+        self._lock = threading.Lock()
+        self.state_shape = tuple(getattr(agent, 'state_dim', None) or ()) or None
+        # 统计: 处理的batch数与请求数
+        self.num_batches = 0
+        self.num_requests = 0
+
+    @classmethod
+    def from_checkpoint(cls, path, env, agent_cls, **kwargs):
+        """Load the agent saved by `BaseAgent.save` once and serve it"""
+        return cls(agent_cls.load(path, env), **kwargs)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._serve, name='MicroBatchServer', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Stop accepting requests and wait for the worker; requests it did not serve fail with
+        `RuntimeError`. If the worker is still running after `timeout` the server stays in the
+        stopping state (`stop` can be called again).
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stop.set()
+            self._queue.put(None)  # 唤醒worker
+        thread.join(timeout)
+        if thread.is_alive():
+            return
+        self._fail_pending()
+        with self._lock:
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def submit(self, state) -> Future:
+        """
+        Queue one state, the `Future` resolves to its action. A state that does not match the
+        agent's observation shape (or is not numeric) raises `ValueError` here, without
+        affecting the other requests.
+        """
+        state = self._check_state(state)
+        future = Future()
+        with self._lock:
+            if self._thread is None or self._stop.is_set():
+                raise RuntimeError('MicroBatchServer is not started')
+            self._queue.put((state, future))
+        return future
+
+    def _check_state(self, state):
+        state = np.asarray(state)
+        if state.dtype.kind not in 'biuf':
+            raise ValueError(f'Expected a numeric state, got dtype {state.dtype}')
+        if self.state_shape is not None and state.shape != self.state_shape \
+                and not (self.state_shape == (1,) and state.shape == ()):
+            raise ValueError(f'Expected a state of shape {self.state_shape}, got {state.shape}')
+        return state
+
+    def predict(self, state, timeout=None):
+        return self.submit(state).result(timeout)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or `max_wait` passed"""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def _serve(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._run_batch(batch)
+        self._fail_pending()
+
+    def _fail_pending(self):
+        """停止后未处理的请求"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and not item[1].done():
+                item[1].set_exception(RuntimeError('MicroBatchServer stopped'))
+
+    def _run_batch(self, batch):
+        futures = [future for _, future in batch]
+        try:
+            states = np.stack([state for state, _ in batch])
+            actions, _ = self.agent.predict_batch(states, deterministic=self.deterministic)
+        except Exception as e:
+            if len(batch) == 1:
+                futures[0].set_exception(e)
+                return
+            # 逐个重试，只有出错的请求得到异常
+            for item in batch:
+                self._run_batch([item])
+            return
+        self.num_batches += 1
+        self.num_requests += len(batch)
+        for future, action in zip(futures, actions):
+            future.set_result(action.item() if action.ndim == 0 else action)
@@ -0,0 +1,164 @@
+"""
+Low-latency NumPy forward pass of an exported ('npz') MLP actor for CPU serving.
+
+For small MLPs and single states the per-op dispatch overhead of torch dominates; here every
+layer writes into buffers preallocated for `max_batch_size` (`np.matmul(..., out=...)`,
+in-place activations), so a call does no allocation besides the returned actions.
+"""
+import numpy as np
+from .runtime import ACTIVATIONS, NumpyPolicy
+
+
+def _linear(weight, bias, buffer):
+    def linear(x, n):
+        out = buffer[:n]
+        np.dot(x, weight, out=out)
+        np.add(out, bias, out=out)
+        return out
+    return linear
+
+
+def _layer_norm(weight, bias, eps):
+    def layer_norm(x, n):
+        x -= x.mean(axis=-1, keepdims=True)
+        x /= np.sqrt(np.square(x).mean(axis=-1, keepdims=True) + eps)
+        x *= weight
+        x += bias
+        return x
+    return layer_norm
+
+
+def _inplace_activation(layer):
+    fn = layer['fn']
+    if fn == 'tanh':
+        return lambda x, n: np.tanh(x, out=x)
+    if fn == 'relu':
+        return lambda x, n: np.maximum(x, 0.0, out=x)
+    generic = ACTIVATIONS[fn]
+
+    def activation(x, n):
+        x[...] = generic(x, layer)
+        return x
+    return activation
+
+
+class NumpyInferenceEngine:
+    """
+    Deterministic (argmax / action mean) or sampled (categorical / Gaussian) actions of an
+    exported policy, see `rlearn.method.ppo.naive.export`.
+
+        engine = NumpyInferenceEngine.load('policy.npz')
+        action = engine.act(state)
+        actions = engine.predict(states, deterministic=False)
+    """
+
+    def __init__(self, policy: NumpyPolicy, max_batch_size=64, seed=None):
+        """
+        Args:
+            policy: The loaded 'npz' policy.
+            max_batch_size (int): Size of the preallocated buffers; larger batches grow them.
+            seed: Seed of the sampling generator.
+        """
+        self.meta = policy.meta
+        self.state_dim = policy.state_dim
+        self.is_continuous = policy.is_continuous
+        arrays = {name: np.ascontiguousarray(a, dtype=np.float32) for name, a in policy.arrays.items()}
+        self.in_dim = int(np.prod(self.state_dim))
+        self.rng = np.random.default_rng(seed)
+
+        self.normalize_obs = self.meta['normalize_obs']
+        if self.normalize_obs:
+            self.obs_mean = arrays['obs_mean'].reshape(-1)
+            self.obs_std = arrays['obs_std'].reshape(-1)
+        self.clip_obs = self.meta['clip_obs']
+
+        self.layers = self.meta['layers']
+        self.arrays = arrays
+        self.out_dim = self.in_dim
+        for layer in self.layers:
+            if layer['type'] == 'linear':
+                self.out_dim = arrays[layer['name'] + '.weight'].shape[1]
+
+        self.scale_action = self.meta['scale_action']
+        if self.scale_action:
+            self.action_scale = arrays['action_scale'].reshape(-1)
+            self.action_bias = arrays['action_bias'].reshape(-1)
+            self.action_low = arrays['action_low_bound'].reshape(-1)
+            self.action_high = arrays['action_high_bound'].reshape(-1)
+        if self.is_continuous:
+            self.action_std = np.exp(arrays['log_std'].reshape(-1))
+        self._allocate(max_batch_size)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        return cls(NumpyPolicy(path), **kwargs)
+
+    def _allocate(self, batch_size):
+        """(Re)allocate the buffers and build the layer functions `fn(x, n) -> x` writing into them"""
+        self.max_batch_size = batch_size
+        self._input = np.zeros((batch_size, self.in_dim), dtype=np.float32)
+        self._noise = np.zeros((batch_size, self.out_dim), dtype=np.float32)
+        # 每个linear层一个输出缓冲区，其它层原地计算
+        self._steps = []
+        for layer in self.layers:
+            if layer['type'] == 'linear':
+                weight, bias = self.arrays[layer['name'] + '.weight'], self.arrays[layer['name'] + '.bias']
+                buffer = np.zeros((batch_size, weight.shape[1]), dtype=np.float32)
+                self._steps.append(_linear(weight, bias, buffer))
+            elif layer['type'] == 'layer_norm':
+                self._steps.append(_layer_norm(self.arrays[layer['name'] + '.weight'],
+                                               self.arrays[layer['name'] + '.bias'], layer['eps']))
+            else:
+                self._steps.append(_inplace_activation(layer))
+
+    def forward(self, states):
+        """logits (discrete) or action mean (continuous), a view of an internal buffer"""
+        states = np.asarray(states)
+        n = len(states)
+        if n > self.max_batch_size:
+            self._allocate(n)
+        x = self._input[:n]
+        if self.normalize_obs:
+            np.subtract(states.reshape(n, -1), self.obs_mean, out=x, casting='unsafe')
+            np.divide(x, self.obs_std, out=x)
+            if self.clip_obs is not None:
+                np.minimum(x, self.clip_obs, out=x)
+                np.maximum(x, -self.clip_obs, out=x)
+        else:
+            x[...] = states.reshape(n, -1)
+        for step in self._steps:
+            x = step(x, n)
+        if self.scale_action:
+            x *= self.action_scale
+            x += self.action_bias
+        return x
+
+    def predict(self, states, deterministic=True):
+        """actions of `(n, *state_dim)` states: `(n,)` int64 or `(n, action_dim)` float32"""
+        out = self.forward(states)
+        if not self.is_continuous:
+            if not deterministic:
+                # Gumbel-max: argmax(logits + Gumbel noise) ~ Categorical(logits)
+                noise = self._noise[:len(out)]
+                self.rng.random(dtype=np.float32, out=noise)
+                np.maximum(noise, np.finfo(np.float32).tiny, out=noise)
+                np.log(noise, out=noise)
+                np.negative(noise, out=noise)
+                np.log(noise, out=noise)
+                np.subtract(out, noise, out=out)
+            return out.argmax(axis=-1)
+        if not deterministic:
+            noise = self._noise[:len(out)]
+            self.rng.standard_normal(dtype=np.float32, out=noise)
+            noise *= self.action_std
+            out += noise
+        if self.scale_action:
+            # np.minimum/np.maximum: np.clip has a much larger per-call overhead
+            np.minimum(out, self.action_high, out=out)
+            np.maximum(out, self.action_low, out=out)
+        return out.copy()
+
+    def act(self, state, deterministic=True):
+        """action of a single state"""
+        action = self.predict(np.asarray(state)[None], deterministic=deterministic)[0]
+        return action.item() if action.ndim == 0 else action
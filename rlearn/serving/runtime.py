@@ -0,0 +1,145 @@
+"""
+Minimal runtime for policies written by `rlearn.method.ppo.naive.export.export_policy`.
+
+Only NumPy is imported at module level; torch (for '.pt2') and onnxruntime (for '.onnx') are
+imported when such a file is loaded. gymnasium and tensorboard are never imported.
+
+    policy = load_policy('policy.npz')
+    actions = policy.predict(states)    # (n, *state_dim) -> (n,) or (n, action_dim)
+    action = policy.act(state)
+"""
+import json
+from pathlib import Path
+import numpy as np
+
+NPZ_FORMAT_VERSION = 1
+
+
+def _erf(x):
+    # Abramowitz-Stegun 7.1.26, |error| < 1.5e-7
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    y = 1.0 - (((((1.061405429 * t - 1.453152027) * t) + 1.421413741) * t - 0.284496736) * t + 0.254829592) * t * np.exp(-x * x)
+    return sign * y
+
+
+def _gelu(x, approximate='none'):
+    if approximate == 'tanh':
+        return 0.5 * x * (1.0 + np.tanh(np.sqrt(2.0 / np.pi) * (x + 0.044715 * x ** 3)))
+    return 0.5 * x * (1.0 + _erf(x / np.sqrt(2.0)))
+
+
+ACTIVATIONS = {
+    'tanh': lambda x, layer: np.tanh(x),
+    'relu': lambda x, layer: np.maximum(x, 0.0),
+    'elu': lambda x, layer: np.where(x > 0, x, layer.get('alpha', 1.0) * np.expm1(np.minimum(x, 0.0))),
+    'gelu': lambda x, layer: _gelu(x, layer.get('approximate', 'none')),
+    'silu': lambda x, layer: x / (1.0 + np.exp(-x)),
+    'leaky_relu': lambda x, layer: np.where(x > 0, x, layer.get('negative_slope', 0.01) * x),
+}
+
+
+def _as_input(states):
+    """uint8 (images) as-is, float32 otherwise"""
+    states = np.asarray(states)
+    return states if states.dtype == np.uint8 else states.astype(np.float32, copy=False)
+
+
+class Policy:
+
+    def predict(self, states):
+        """deterministic actions of `(n, *state_dim)` states"""
+        raise NotImplementedError()
+
+    def act(self, state):
+        """action of a single state"""
+        action = self.predict(np.asarray(state)[None])[0]
+        return action.item() if action.ndim == 0 else action
+
+
+class NumpyPolicy(Policy):
+    """Pure-NumPy forward pass of an exported MLP actor ('npz')"""
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            self.meta = json.loads(str(data['__meta__']))
+            self.arrays = {name: data[name] for name in data.files if name != '__meta__'}
+        if self.meta['format_version'] > NPZ_FORMAT_VERSION:
+            raise ValueError(f'Unsupported policy format version: {self.meta["format_version"]}')
+        self.state_dim = tuple(self.meta['state_dim'])
+        self.is_continuous = self.meta['kind'] == 'continuous'
+        self.layers = self.meta['layers']
+
+    def forward(self, states):
+        """logits (discrete) or action mean (continuous) of `(n, *state_dim)` states"""
+        x = np.asarray(states, dtype=np.float32).reshape(len(states), -1)
+        if self.meta['normalize_obs']:
+            x = (x - self.arrays['obs_mean'].reshape(-1)) / self.arrays['obs_std'].reshape(-1)
+            if self.meta['clip_obs'] is not None:
+                x = np.clip(x, -self.meta['clip_obs'], self.meta['clip_obs'])
+        for layer in self.layers:
+            if layer['type'] == 'linear':
+                x = x @ self.arrays[layer['name'] + '.weight'] + self.arrays[layer['name'] + '.bias']
+            elif layer['type'] == 'layer_norm':
+                mean = x.mean(axis=-1, keepdims=True)
+                var = x.var(axis=-1, keepdims=True)
+                x = (x - mean) / np.sqrt(var + layer['eps'])
+                x = x * self.arrays[layer['name'] + '.weight'] + self.arrays[layer['name'] + '.bias']
+            else:
+                x = ACTIVATIONS[layer['fn']](x, layer)
+        if self.meta['scale_action']:
+            x = x * self.arrays['action_scale'] + self.arrays['action_bias']
+        return x
+
+    def predict(self, states):
+        out = self.forward(states)
+        if not self.is_continuous:
+            return out.argmax(axis=-1)
+        if self.meta['scale_action']:
+            out = np.clip(out, self.arrays['action_low_bound'], self.arrays['action_high_bound'])
+        return out
+
+
+class TorchExportPolicy(Policy):
+    """`torch.export` program ('.pt2')"""
+
+    def __init__(self, path):
+        import torch
+        self._torch = torch
+        self.module = torch.export.load(str(path)).module()
+
+    def predict(self, states):
+        torch = self._torch
+        with torch.no_grad():
+            return self.module(torch.as_tensor(_as_input(states))).numpy()
+
+
+class OnnxPolicy(Policy):
+    """ONNX graph ('.onnx') run by onnxruntime"""
+
+    def __init__(self, path):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError('Loading .onnx policies requires onnxruntime: pip install onnxruntime') from e
+        self.session = onnxruntime.InferenceSession(str(path), providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, states):
+        return self.session.run(None, {self.input_name: _as_input(states)})[0]
+
+
+POLICY_LOADERS = {
+    '.npz': NumpyPolicy,
+    '.pt2': TorchExportPolicy,
+    '.onnx': OnnxPolicy,
+}
+
+
+def load_policy(path):
+    """Load an exported policy by its file suffix (.npz, .pt2, .onnx)"""
+    suffix = Path(path).suffix
+    if suffix not in POLICY_LOADERS:
+        raise ValueError(f'Unknown policy file: {path}, expected one of {list(POLICY_LOADERS)}')
+    return POLICY_LOADERS[suffix](path)
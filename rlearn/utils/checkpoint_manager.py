@@ -0,0 +1,140 @@
+import os
+import queue
+import threading
+from pathlib import Path
+import torch
+from rlearn.logger import user_logger
+
+
+def snapshot_to_cpu(obj):
+    """
+    Detached CPU copy of (nested dicts/lists/tuples of) tensors, safe to serialize while the
+    training loop keeps updating the originals in place (parameters, optimizer moments).
+    """
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return type(obj)((key, snapshot_to_cpu(value)) for key, value in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(snapshot_to_cpu(value) for value in obj)
+    return obj
+
+
+class CheckpointManager:
+    """
+    Writes checkpoints from a background thread so that `torch.save` (large optimizer state,
+    slow/networked disks) does not stall training.
+
+    `save` only copies the state dict to CPU and enqueues it; the writer thread serializes it to
+    a temporary file in the same directory and atomically renames it (`os.replace`), so a crash
+    never leaves a truncated checkpoint under the final name. At most `max_pending` snapshots
+    are held in memory, `save` blocks when the writer falls further behind.
+
+    Retention: after every write, files written by this manager that are neither among the
+    `keep_last` most recent nor among the `keep_best` with the highest `metric` are deleted.
+    `keep_last=None` keeps every checkpoint.
+    """
+
+    def __init__(self, checkpoint_dir='checkpoints', keep_last=None, keep_best=0, max_pending=1):
+        """
+        Args:
+            checkpoint_dir: Directory of the checkpoint files.
+            keep_last (int): Number of most recent checkpoints to keep, None: keep all.
+            keep_best (int): Additionally keep this many checkpoints with the highest metric.
+            max_pending (int): Maximum number of snapshots waiting to be written.
+        """
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.logger = user_logger
+        self.saved = []  # [(path, metric)], in save order, only files that exist
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+
+    def save(self, name, state_dict, metric=None):
+        """Snapshot `state_dict` and write it to `checkpoint_dir / name` in the background"""
+        self._raise_error()
+        if self._thread is None:
+            raise RuntimeError('CheckpointManager is closed')
+        path = self.checkpoint_dir / name
+        self._queue.put((path, snapshot_to_cpu(state_dict), metric))
+        return path
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, state_dict, metric = item
+                self._write(path, state_dict)
+                with self._lock:
+                    self.saved = [(p, m) for p, m in self.saved if p != path]
+                    self.saved.append((path, metric))
+                    self._apply_retention()
+            except Exception as e:
+                self.logger.error(f'Failed to write checkpoint: {e}')
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write(path, state_dict):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        torch.save(state_dict, str(tmp_path))
+        os.replace(tmp_path, path)
+
+    def _apply_retention(self):
+        if self.keep_last is None:
+            return
+        keep = {p for p, _ in self.saved[len(self.saved) - self.keep_last:]} if self.keep_last > 0 else set()
+        if self.keep_best:
+            scored = [(m, i) for i, (_, m) in enumerate(self.saved) if m is not None]
+            # 分数相同时保留较新的
+            for _, i in sorted(scored, reverse=True)[:self.keep_best]:
+                keep.add(self.saved[i][0])
+        for path, _ in self.saved:
+            if path not in keep:
+                path.unlink(missing_ok=True)
+        self.saved = [(p, m) for p, m in self.saved if p in keep]
+
+    @property
+    def best(self):
+        """path of the saved checkpoint with the highest metric"""
+        with self._lock:
+            scored = [(m, i) for i, (_, m) in enumerate(self.saved) if m is not None]
+            return self.saved[max(scored)[1]][0] if scored else None
+
+    @property
+    def latest(self):
+        with self._lock:
+            return self.saved[-1][0] if self.saved else None
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError('Checkpoint writer failed') from error
+
+    def wait(self):
+        """Block until all queued checkpoints are written"""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self):
+        """Write the queued checkpoints and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,5 +1,6 @@
 import numpy as np
 import time
+import gymnasium as gym
 from .i18n import Translator
 
 
@@ -7,36 +8,38 @@ def eval_agent_performance(agent,
                            env, 
                            num_episodes=10, 
                            max_steps=1000, 
-                           deterministic=True):
+                           deterministic=True,
+                           vectorized=False,
+                           num_envs=None,
+                           mode='sync',
+                           envs_per_worker=None,
+                           seed=None):
     """
     测试agent的性能 | Test agent performance
     
     Args:
+    - env: 单个env；vectorized时为env_fn或vector player | A single env; env_fn or vector player if vectorized
     - deterministic: 是否使用确定性策略 | Whether to use deterministic policy
+    - vectorized: 所有episode在vector player上同时运行，每步一次批量前向(agent.predict_batch)
+      | Run all episodes at once on a vector player with one batched forward per step
+    - num_envs: vectorized且env为env_fn时的env数量，默认num_episodes | Number of envs, defaults to num_episodes
+    - mode, envs_per_worker: 见 make_vec_env_player，'async'/'sharded'在子进程中运行env | See make_vec_env_player
+    - seed: vectorized时reset的seed | Seed of the reset if vectorized
+
+    env已归一化观测时(如NormalizeVecEnvPlayer)，以normalize_obs=False调用agent，避免二次归一化
+    | If env already normalizes the observations (e.g. NormalizeVecEnvPlayer), the agent is called
+    with normalize_obs=False so that they are not normalized twice
     
     Returns:
     - 包含性能统计信息的字典 | Dictionary containing performance statistics
     """
-    total_rewards = []
-    episode_lengths = []
     start_time = time.time()
-    
-    for episode in range(num_episodes):
-        state, _ = env.reset()
-        episode_reward = 0
-        episode_length = 0
-        for step in range(max_steps):
-            action, _ = agent.predict(state, deterministic=deterministic)
-            # print(action)
-            next_state, reward, done, truncated, _ = env.step(action)
-            episode_reward += reward
-            episode_length += 1
-            state = next_state
-            if done or truncated:
-                break
-        
-        total_rewards.append(episode_reward)
-        episode_lengths.append(episode_length)
+    if vectorized:
+        total_rewards, episode_lengths = _run_episodes_vectorized(
+            agent, env, num_episodes, max_steps, deterministic, num_envs, mode, envs_per_worker, seed
+        )
+    else:
+        total_rewards, episode_lengths = _run_episodes(agent, env, num_episodes, max_steps, deterministic)
     
     end_time = time.time()
     test_duration = end_time - start_time
@@ -70,3 +73,94 @@ def eval_agent_performance(agent,
         'test_duration': test_duration
     }
     return info
+
+
+def _normalizes_obs(env):
+    """env (或其包装的player/env) 是否已归一化观测，如 NormalizeVecEnvPlayer(norm_obs=True)"""
+    while env is not None:
+        if getattr(env, 'obs_rms', None) is not None:
+            return True
+        env = getattr(env, 'player', None) or getattr(env, 'env', None)
+    return False
+
+
+def _run_episodes(agent, env, num_episodes, max_steps, deterministic):
+    predict_kwargs = {'normalize_obs': False} if _normalizes_obs(env) else {}
+    total_rewards = []
+    episode_lengths = []
+    for episode in range(num_episodes):
+        state, _ = env.reset()
+        episode_reward = 0
+        episode_length = 0
+        for step in range(max_steps):
+            action, _ = agent.predict(state, deterministic=deterministic, **predict_kwargs)
+            # print(action)
+            next_state, reward, done, truncated, _ = env.step(action)
+            episode_reward += reward
+            episode_length += 1
+            state = next_state
+            if done or truncated:
+                break
+        
+        total_rewards.append(episode_reward)
+        episode_lengths.append(episode_length)
+    return total_rewards, episode_lengths
+
+
+def _run_episodes_vectorized(agent, env, num_episodes, max_steps, deterministic,
+                             num_envs, mode, envs_per_worker, seed):
+    """
+    每个env固定分配 num_episodes/num_envs 个episode(不偏向短episode)，完成后该env的结果被忽略(mask)。
+    auto-reset: env结束后的下一步是reset步(reward为0)，不计入episode。
+    超过max_steps的episode按max_steps截断记录，该env的后续结果被忽略直到env自身结束。
+    """
+    from rlearn.core.player.naive import make_vec_env_player
+
+    own_player = not hasattr(env, 'num_envs')
+    if own_player:
+        env_fn = env
+        player = make_vec_env_player(
+            lambda: gym.wrappers.TimeLimit(env_fn(), max_episode_steps=max_steps),
+            min(num_envs or num_episodes, num_episodes), mode=mode, envs_per_worker=envs_per_worker,
+        )
+    else:
+        player = env
+    predict_kwargs = {'normalize_obs': False} if _normalizes_obs(player) else {}
+    n = player.num_envs
+    # 每个env需要完成的episode数
+    quotas = np.full(n, num_episodes // n)
+    quotas[:num_episodes % n] += 1
+    active = quotas > 0
+    episode_rewards = np.zeros(n, dtype=np.float64)
+    episode_steps = np.zeros(n, dtype=np.int64)
+    resetting = np.zeros(n, dtype=bool)  # 本步为auto-reset步
+    skipping = np.zeros(n, dtype=bool)  # 已按max_steps记录，等待env结束
+    total_rewards = []
+    episode_lengths = []
+    try:
+        states, _ = player.reset(seed=seed)
+        while active.any():
+            if hasattr(agent, 'predict_batch'):
+                actions, _ = agent.predict_batch(states, deterministic=deterministic, **predict_kwargs)
+            else:
+                actions = np.stack([np.asarray(agent.predict(state, deterministic=deterministic, **predict_kwargs)[0])
+                                    for state in states])
+            states, rewards, terminateds, truncateds, _ = player.step(actions)
+            counting = active & ~resetting & ~skipping
+            episode_rewards[counting] += rewards[counting]
+            episode_steps[counting] += 1
+            dones = np.logical_or(terminateds, truncateds)
+            finished = counting & (dones | (episode_steps >= max_steps))
+            for i in np.flatnonzero(finished):
+                total_rewards.append(float(episode_rewards[i]))
+                episode_lengths.append(int(episode_steps[i]))
+            quotas[finished] -= 1
+            active &= quotas > 0
+            episode_rewards[finished] = 0.0
+            episode_steps[finished] = 0
+            skipping = (skipping | (finished & ~dones)) & ~dones
+            resetting = dones
+    finally:
+        if own_player:
+            player.close()
+    return total_rewards, episode_lengths
@@ -0,0 +1,201 @@
+import io
+import os
+import queue
+import traceback
+import multiprocessing as mp
+from pathlib import Path
+import torch
+from rlearn.logger import user_logger
+from rlearn.core.player.naive.async_vec_env import CloudpickleWrapper
+from .eval_agent import eval_agent_performance
+
+EVAL_METRICS = ('average_reward', 'median_reward', 'reward_std', 'min_reward', 'max_reward', 'average_episode_length')
+
+
+def _eval_worker(agent_cls, env_fn, config, eval_kwargs, log_dir, snapshot_queue, result_queue):
+    """
+    Evaluation process: rebuilds the agent once, then for every snapshot loads the weights,
+    runs `eval_agent_performance` on its own envs and logs to its own SummaryWriter.
+    """
+    torch.set_num_threads(1)
+    writer = None
+    try:
+        agent = agent_cls(env_fn(), config=config)
+        if log_dir is not None:
+            from torch.utils.tensorboard import SummaryWriter
+            writer = SummaryWriter(log_dir)
+        while True:
+            item = snapshot_queue.get()
+            if item is None:
+                break
+            epoch, total_steps, data = item
+            agent.load_model_dict(torch.load(io.BytesIO(data)))
+            info = eval_agent_performance(agent, env_fn, vectorized=True, **eval_kwargs)
+            result = {'epoch': epoch, 'total_steps': total_steps}
+            result.update({key: float(info[key]) for key in EVAL_METRICS})
+            result['test_duration'] = info['test_duration']
+            if writer is not None:
+                for key in EVAL_METRICS:
+                    writer.add_scalar(f'eval/{key}', result[key], total_steps)
+                writer.flush()
+            result_queue.put(result)
+    except Exception:
+        result_queue.put({'error': traceback.format_exc()})
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+class EvalWorker:
+    """
+    Periodic evaluation during `OnlineAgentVE.learn` in a background process.
+
+    Every `eval_freq` epochs the agent's `policy_dict` (weights and observation normalization,
+    no optimizer state) is serialized and sent to the worker,
+    which evaluates it on its own env copies (vectorized `eval_agent_performance`) and logs
+    `eval/*` scalars to the run's tensorboard directory; the training loop only polls for
+    finished results and never waits for an evaluation. At most `max_pending` snapshots are
+    queued, further snapshots are skipped until the worker catches up.
+
+    The snapshot with the best `average_reward` is written to `best_checkpoint_file`, and
+    `should_exit` stops training when `target_eval_reward` is reached or after
+    `max_evals_without_improvement` evaluations without a new best.
+
+    At the end of `learn` evaluations that have not finished yet are dropped, unless
+    `wait_at_exit` is set (then `learn` waits for them).
+    """
+
+    def __init__(self, env_fn, eval_freq=10, num_episodes=10, max_steps=1000, num_envs=None,
+                 deterministic=True, target_eval_reward=None, max_evals_without_improvement=None,
+                 best_checkpoint_file=None, max_pending=2, start_method='spawn', wait_at_exit=False):
+        """
+        Args:
+            env_fn: Creates one evaluation env (raw observations, see `NormalizeVecEnvPlayer`).
+            eval_freq (int): Evaluate every `eval_freq` epochs.
+            num_episodes, max_steps, num_envs, deterministic: See `eval_agent_performance`.
+            target_eval_reward (float): Stop when the average eval reward reaches this value.
+            max_evals_without_improvement (int): Stop after this many evaluations without a new best.
+            best_checkpoint_file (str): Where to save the best snapshot (`policy_dict`, loadable by
+                `agent_cls.load`), not saved if None.
+            max_pending (int): Maximum number of snapshots waiting for or under evaluation.
+            start_method (str): multiprocessing start method of the worker.
+            wait_at_exit (bool): Whether `close()` (called at the end of `learn`) waits for the
+                pending evaluations.
+        """
+        self.env_fn = env_fn
+        self.eval_freq = eval_freq
+        self.eval_kwargs = {'num_episodes': num_episodes, 'max_steps': max_steps,
+                            'num_envs': num_envs, 'deterministic': deterministic}
+        self.target_eval_reward = target_eval_reward
+        self.max_evals_without_improvement = max_evals_without_improvement
+        self.best_checkpoint_file = best_checkpoint_file
+        self.max_pending = max_pending
+        self.start_method = start_method
+        self.wait_at_exit = wait_at_exit
+        self.logger = user_logger
+
+        self.results = []
+        self.best_eval_reward = float('-inf')
+        self.best_epoch = None
+        self.evals_without_improvement = 0
+        self._pending = {}  # epoch -> serialized policy_dict
+        self._process = None
+
+    def start(self, agent, log_dir=None):
+        ctx = mp.get_context(self.start_method)
+        self._snapshot_queue = ctx.Queue()
+        self._result_queue = ctx.Queue()
+        self._process = ctx.Process(
+            target=_eval_worker,
+            args=(type(agent), CloudpickleWrapper(self.env_fn), agent.config, self.eval_kwargs, log_dir,
+                  self._snapshot_queue, self._result_queue),
+            daemon=True,
+        )
+        self._process.start()
+        return self
+
+    def should_eval(self, epoch):
+        return self.eval_freq and (epoch + 1) % self.eval_freq == 0
+
+    def submit(self, epoch, total_steps, agent):
+        """Queue a snapshot of `agent`, returns False if skipped because the worker is busy"""
+        if len(self._pending) >= self.max_pending:
+            self.logger.debug(f'eval worker busy, skip evaluation of epoch {epoch}')
+            return False
+        buffer = io.BytesIO()
+        torch.save(agent.policy_dict(), buffer)
+        data = buffer.getvalue()
+        self._pending[epoch] = data
+        self._snapshot_queue.put((epoch, total_steps, data))
+        return True
+
+    def poll(self, timeout=None):
+        """
+        Collect finished evaluations (non-blocking unless `timeout` is given, then wait up to
+        `timeout` seconds for the first one). Returns the new results.
+        """
+        new_results = []
+        while True:
+            try:
+                if timeout is not None and not new_results:
+                    result = self._result_queue.get(timeout=timeout)
+                else:
+                    result = self._result_queue.get_nowait()
+            except queue.Empty:
+                break
+            if 'error' in result:
+                self._pending.clear()
+                raise RuntimeError(f'Evaluation worker failed:\n{result["error"]}')
+            self._on_result(result)
+            new_results.append(result)
+        return new_results
+
+    def _on_result(self, result):
+        data = self._pending.pop(result['epoch'], None)
+        self.results.append(result)
+        self.logger.info(f"eval: epoch {result['epoch']}, total_steps {result['total_steps']}, "
+                         f"average_reward {result['average_reward']:.3f}")
+        if result['average_reward'] > self.best_eval_reward:
+            self.best_eval_reward = result['average_reward']
+            self.best_epoch = result['epoch']
+            self.evals_without_improvement = 0
+            if self.best_checkpoint_file and data is not None:
+                path = Path(self.best_checkpoint_file)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(path.name + '.tmp')
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+        else:
+            self.evals_without_improvement += 1
+
+    def should_exit(self):
+        """ExitMonitor-style stopping on the eval results: (should_exit, exit_reason)"""
+        if self.target_eval_reward is not None and self.best_eval_reward >= self.target_eval_reward:
+            return True, 'eval_reward_threshold_reached'
+        if (self.max_evals_without_improvement is not None
+                and self.evals_without_improvement >= self.max_evals_without_improvement):
+            return True, 'no_eval_improvement_for_too_long'
+        return False, 'should_continue'
+
+    def close(self, wait=None, timeout=None):
+        """
+        Stop the worker; with `wait` the queued snapshots are evaluated (and collected) first,
+        otherwise only already finished results are collected. `wait=None`: `wait_at_exit`.
+        """
+        if self._process is None:
+            return
+        if wait is None:
+            wait = self.wait_at_exit
+        if wait:
+            self._snapshot_queue.put(None)
+            while self._pending and self._process.is_alive():
+                self.poll(timeout=1.0)
+            self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+            # 未被读取的快照不再发送, 否则进程退出时等待队列的feeder线程
+            self._snapshot_queue.cancel_join_thread()
+        self.poll()
+        self._pending.clear()
+        self._process = None
@@ -67,10 +67,22 @@ DEFAULT_DICTIONARY = {
         'zh': '模型性能不再改善（比例）',
         'en': 'No performance improvement (ratio)',
     },
+    'eval_reward_threshold_reached': {
+        'zh': '评估奖励达到阈值',
+        'en': 'Evaluation reward threshold reached',
+    },
+    'no_eval_improvement_for_too_long': {
+        'zh': '评估奖励长时间没有改善',
+        'en': 'No evaluation improvement for too long',
+    },
     'checkpoint_saved': {
         'zh': '检查点已保存',
         'en': 'Checkpoint saved',
     },
+    'checkpoint_queued': {
+        'zh': '检查点已提交后台写入',
+        'en': 'Checkpoint queued for writing',
+    },
     'final_model_saved': {
         'zh': '最终模型已保存',
         'en': 'Final model saved',
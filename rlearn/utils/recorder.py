@@ -1,5 +1,10 @@
+from collections.abc import Sequence
 from dataclasses import dataclass, field
 from typing import List, Any, Dict
+import numpy as np
+
+STEP_FIELDS = ('state', 'action', 'next_state', 'reward', 'done', 'truncated')
+STEP_DTYPES = {'reward': np.float64, 'done': np.bool_, 'truncated': np.bool_}
 
 @dataclass
 class Step:
@@ -33,4 +38,175 @@ class TrajectoryRecorder:
         self.current_episode = None
 
     def get_full_trajectory(self):
-        return self.episodes
\ No newline at end of file
+        return self.episodes
+
+class _GrowableArray:
+    """
+    Typed array with amortized doubling. Without a fixed `dtype` the dtype and shape come from
+    the first value, and the dtype is widened (`np.result_type`) when a later value does not
+    fit, e.g. int rewards followed by float ones.
+    """
+    __slots__ = ('_data', 'size', 'dtype')
+
+    def __init__(self, dtype=None):
+        self._data = None
+        self.size = 0
+        self.dtype = dtype
+
+    def append(self, value):
+        if self._data is None:
+            value = np.asarray(value, dtype=self.dtype)
+            self._data = np.empty((16,) + value.shape, dtype=value.dtype)
+        else:
+            if self.dtype is None:
+                dtype = np.result_type(self._data.dtype, np.asarray(value))
+                if dtype != self._data.dtype:
+                    self._data = self._data.astype(dtype)
+            if self.size == len(self._data):
+                data = np.empty((2 * len(self._data),) + self._data.shape[1:], dtype=self._data.dtype)
+                data[:self.size] = self._data[:self.size]
+                self._data = data
+        self._data[self.size] = value
+        self.size += 1
+
+    def __getitem__(self, index):
+        return self._data[:self.size][index]
+
+class StepsView(Sequence):
+    """Steps of an `EpisodeView`, each `Step` is built on access"""
+    __slots__ = ('_episode',)
+
+    def __init__(self, episode):
+        self._episode = episode
+
+    def __len__(self):
+        return self._episode.length
+
+    def __getitem__(self, index):
+        episode = self._episode
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(episode.length))]
+        if index < 0:
+            index += episode.length
+        if not 0 <= index < episode.length:
+            raise IndexError(index)
+        recorder, i = episode._recorder, episode.start + index
+        columns = recorder._columns
+        info = recorder._infos[i] if recorder.info_keys is None else {
+            key: columns[f'info.{key}'][i] for key in recorder.info_keys}
+        return Step(columns['state'][i], columns['action'][i], columns['next_state'][i],
+                    columns['reward'][i], columns['done'][i], columns['truncated'][i], info)
+
+class EpisodeView:
+    """
+    An episode of `CompactTrajectoryRecorder`: `initial_state` and `steps` like `Episode`, plus
+    the columns as array views (`states`, `actions`, `next_states`, `rewards`, `dones`, `truncateds`).
+    """
+    __slots__ = ('_recorder', 'index', 'start', 'length')
+
+    def __init__(self, recorder, index, start, length):
+        self._recorder = recorder
+        self.index = index
+        self.start = start
+        self.length = length
+
+    def _column(self, name):
+        return self._recorder._columns[name][self.start:self.start + self.length]
+
+    @property
+    def initial_state(self):
+        if self.length == 0:
+            return self._recorder._empty_initial_states[self.index]
+        return self._recorder._columns['state'][self.start]
+
+    @property
+    def steps(self):
+        return StepsView(self)
+
+    states = property(lambda self: self._column('state'))
+    actions = property(lambda self: self._column('action'))
+    next_states = property(lambda self: self._column('next_state'))
+    rewards = property(lambda self: self._column('reward'))
+    dones = property(lambda self: self._column('done'))
+    truncateds = property(lambda self: self._column('truncated'))
+
+    def info(self, key):
+        """recorded `info[key]` of every step (only for `info_keys`)"""
+        return self._column(f'info.{key}')
+
+class EpisodesView(Sequence):
+    """Lazy list of the recorded episodes"""
+    __slots__ = ('_recorder',)
+
+    def __init__(self, recorder):
+        self._recorder = recorder
+
+    def __len__(self):
+        return self._recorder._episode_starts.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        recorder = self._recorder
+        return EpisodeView(recorder, index, int(recorder._episode_starts[index]),
+                           int(recorder._episode_lengths[index]))
+
+class CompactTrajectoryRecorder:
+    """
+    `TrajectoryRecorder` storing the steps as growable typed arrays (one per field) instead of one
+    `Step` object per step. `get_full_trajectory` returns `EpisodeView`s built on access.
+
+    Args:
+        info_keys: None: keep every step's `info` dict; otherwise only these keys are recorded,
+            as typed arrays (missing entries are 0), and the rest of `info` is dropped.
+
+    'reward' is float64, 'done'/'truncated' bool; the other columns take the dtype of their first
+    value and are widened if a later value needs it, values are never truncated.
+    """
+
+    def __init__(self, info_keys=None):
+        self.info_keys = tuple(info_keys) if info_keys is not None else None
+        self._columns = {name: _GrowableArray(STEP_DTYPES.get(name)) for name in STEP_FIELDS}
+        if self.info_keys is not None:
+            self._columns.update({f'info.{key}': _GrowableArray() for key in self.info_keys})
+        self._infos = []
+        self._episode_starts = _GrowableArray(np.int64)
+        self._episode_lengths = _GrowableArray(np.int64)
+        self._empty_initial_states = {}
+        self._initial_state = None
+        self._episode_start = None
+        self.num_steps = 0
+
+    def start_episode(self, initial_state):
+        self._initial_state = initial_state
+        self._episode_start = self.num_steps
+
+    def record_step(self, state, action, next_state, reward, done, truncated, info):
+        columns = self._columns
+        columns['state'].append(state)
+        columns['action'].append(action)
+        columns['next_state'].append(next_state)
+        columns['reward'].append(reward)
+        columns['done'].append(done)
+        columns['truncated'].append(truncated)
+        if self.info_keys is None:
+            self._infos.append(info)
+        else:
+            for key in self.info_keys:
+                columns[f'info.{key}'].append(info.get(key, 0) if info else 0)
+        self.num_steps += 1
+
+    def end_episode(self):
+        if self.num_steps == self._episode_start:
+            self._empty_initial_states[self._episode_starts.size] = self._initial_state
+        self._episode_starts.append(self._episode_start)
+        self._episode_lengths.append(self.num_steps - self._episode_start)
+        self._initial_state = None
+        self._episode_start = None
+
+    def get_full_trajectory(self):
+        return EpisodesView(self)
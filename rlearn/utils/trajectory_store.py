@@ -0,0 +1,277 @@
+"""
+Columnar trajectory storage for long runs, a drop-in replacement of `TrajectoryRecorder`
+(`start_episode` / `record_step` / `end_episode` / `get_full_trajectory`).
+
+Every field is a fixed-dtype column: 'state', 'action', 'next_state' (dtype of the first recorded
+step), 'reward' (float32), 'done', 'truncated' (bool) and 'info.<key>' for the requested
+`info_keys` (float64, NaN where the key is missing; the rest of `info` is dropped). `dtypes`
+overrides the dtype of any column. A value that cannot be cast to its column without loss
+(e.g. a float action into an int64 column) raises instead of being truncated. Episodes are an
+index of `(start, length)` step ranges.
+
+- `TrajectoryStore(path=...)`: appends to chunked memory-mapped `.npy` files on disk, memory use
+  is bounded by one chunk per column. Read it back (also from another process, up to the last
+  `flush`) with `TrajectoryReader.open(path)`.
+- `TrajectoryStore(capacity=...)`: in-memory ring buffer keeping the last `capacity` steps and
+  the episodes that are fully contained in them.
+
+    store = TrajectoryStore('runs/traj', info_keys=['lives'])
+    agent.learn(..., recorder=store)
+    store.close()
+    for episode in TrajectoryReader.open('runs/traj').iter_episodes(['reward']):
+        print(episode['reward'].sum())
+"""
+import json
+import os
+from collections import deque
+from pathlib import Path
+import numpy as np
+
+STORE_FORMAT_VERSION = 1
+STEP_COLUMNS = ('state', 'action', 'next_state', 'reward', 'done', 'truncated')
+STEP_DTYPES = {'reward': np.float32, 'done': np.bool_, 'truncated': np.bool_}
+INFO_DTYPE = np.float64
+
+
+def _chunk_file(path, name, chunk):
+    return Path(path) / f'{name}.{chunk:05d}.npy'
+
+
+class TrajectoryReader:
+    """
+    Streaming access to recorded steps and episodes. Columns are read chunk by chunk, an
+    episode inside a single chunk is returned as views without copying.
+    """
+
+    def __init__(self, chunks, episodes, first_step=0):
+        """
+        Args:
+            chunks: List of `{column: array}` holding consecutive steps.
+            episodes: `(num_episodes, 2)` int64 array of `(start, length)`, start counted from the
+                first recorded step.
+            first_step: Global index of the first step in `chunks`.
+        """
+        self._chunks = chunks
+        sizes = [len(next(iter(chunk.values()))) for chunk in chunks]
+        self._offsets = np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)])
+        self.num_steps = int(self._offsets[-1])
+        self.first_step = first_step
+        self.episodes = episodes
+        self.columns = list(chunks[0]) if chunks else []
+
+    @classmethod
+    def open(cls, path):
+        """Reader of an on-disk `TrajectoryStore` (everything written up to its last `flush`)"""
+        path = Path(path)
+        meta = json.loads((path / 'meta.json').read_text())
+        if meta['format_version'] > STORE_FORMAT_VERSION:
+            raise ValueError(f'Unsupported trajectory store version: {meta["format_version"]}')
+        num_steps, chunk_size = meta['num_steps'], meta['chunk_size']
+        chunks = []
+        for chunk in range((num_steps + chunk_size - 1) // chunk_size):
+            n = min(chunk_size, num_steps - chunk * chunk_size)
+            chunks.append({name: np.load(_chunk_file(path, name, chunk), mmap_mode='r')[:n]
+                           for name in meta['columns']})
+        episodes = np.fromfile(path / 'episodes.bin', dtype=np.int64, count=2 * meta['num_episodes'])
+        return cls(chunks, episodes.reshape(-1, 2))
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def __getitem__(self, index):
+        return self.episode(index)
+
+    def __iter__(self):
+        return self.iter_episodes()
+
+    def iter_chunks(self, columns=None):
+        """Yield `{column: array}` per chunk"""
+        columns = columns or self.columns
+        for chunk in self._chunks:
+            yield {name: chunk[name] for name in columns}
+
+    def read(self, name, start=0, stop=None):
+        """Steps `[start, stop)` of column `name`, a view if they lie in a single chunk"""
+        stop = self.num_steps if stop is None else min(stop, self.num_steps)
+        first = int(np.searchsorted(self._offsets, start, side='right')) - 1
+        last = int(np.searchsorted(self._offsets, stop, side='left'))
+        parts = [self._chunks[c][name][max(start - self._offsets[c], 0):stop - self._offsets[c]]
+                 for c in range(max(first, 0), last)]
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return self._chunks[0][name][:0]
+        return np.concatenate(parts)
+
+    def episode(self, index, columns=None):
+        """`{column: array}` of the steps of episode `index`"""
+        start, length = self.episodes[index]
+        start -= self.first_step
+        return {name: self.read(name, start, start + length) for name in (columns or self.columns)}
+
+    def iter_episodes(self, columns=None):
+        for index in range(len(self.episodes)):
+            yield self.episode(index, columns)
+
+
+class TrajectoryStore:
+    """Columnar trajectory recorder, on disk (`path`) or as an in-memory ring buffer (`capacity`)"""
+
+    def __init__(self, path=None, capacity=None, chunk_size=65536, info_keys=(), dtypes=None):
+        """
+        Args:
+            path: Directory of an on-disk store (must not contain a store yet).
+            capacity (int): Number of steps kept by the in-memory ring buffer.
+            chunk_size (int): Steps per file of the on-disk store.
+            info_keys: `info` entries recorded as 'info.<key>' columns.
+            dtypes (dict): Column dtypes overriding the defaults, e.g.
+                `{'state': np.uint8, 'info.lives': np.int32}`; missing info entries are NaN in
+                float columns and 0 otherwise.
+        """
+        if (path is None) == (capacity is None):
+            raise ValueError('Specify either path (on-disk store) or capacity (in-memory ring buffer)')
+        self.path = Path(path) if path is not None else None
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+        self.info_keys = tuple(info_keys)
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in (dtypes or {}).items()}
+        self.specs = None  # column -> (shape, dtype)
+        self._fills = {}
+        self.num_steps = 0
+        self.num_episodes = 0
+        self._buffers = {}
+        self._episode_start = None
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            if (self.path / 'meta.json').exists():
+                raise FileExistsError(f'Trajectory store already exists: {self.path}')
+            self._episode_file = open(self.path / 'episodes.bin', 'wb')
+            self._write_meta()
+        else:
+            self._episodes = deque()
+
+    def _init_columns(self, values):
+        self.specs = {}
+        for name in list(STEP_COLUMNS) + [f'info.{key}' for key in self.info_keys]:
+            default = INFO_DTYPE if name.startswith('info.') else STEP_DTYPES.get(name)
+            dtype = self.dtypes.get(name, default)
+            value = np.asarray(values[name], dtype=dtype) if name in values else np.zeros((), dtype=dtype)
+            self.specs[name] = (value.shape, value.dtype)
+            self._fills[name] = np.nan if value.dtype.kind in 'fc' else 0
+        if self.path is None:
+            self._buffers = {name: np.zeros((self.capacity,) + shape, dtype=dtype)
+                             for name, (shape, dtype) in self.specs.items()}
+
+    def _check_cast(self, name, value):
+        """raise instead of silently truncating, e.g. a float into an int column"""
+        if name in ('done', 'truncated'):
+            return
+        src, dst = np.asarray(value).dtype, self.specs[name][1]
+        if src != dst and not np.can_cast(src, dst, casting='same_kind'):
+            raise ValueError(f"Cannot store {src} values in column '{name}' of dtype {dst} without loss, "
+                             f"set its dtype with TrajectoryStore(dtypes={{'{name}': ...}})")
+
+    def _slot(self):
+        if self.path is None:
+            return self.num_steps % self.capacity
+        i = self.num_steps % self.chunk_size
+        if i == 0:
+            # 新的chunk文件; 旧的memmap在释放前写回
+            for buffer in self._buffers.values():
+                buffer.flush()
+            chunk = self.num_steps // self.chunk_size
+            self._buffers = {
+                name: np.lib.format.open_memmap(_chunk_file(self.path, name, chunk), mode='w+',
+                                                dtype=dtype, shape=(self.chunk_size,) + shape)
+                for name, (shape, dtype) in self.specs.items()
+            }
+        return i
+
+    def start_episode(self, initial_state):
+        # initial_state 即该episode第一步的 state 列
+        self._episode_start = self.num_steps
+
+    def record_step(self, state, action, next_state, reward, done, truncated, info):
+        values = {'state': state, 'action': action, 'next_state': next_state,
+                  'reward': reward, 'done': done, 'truncated': truncated}
+        for key in self.info_keys:
+            if info and key in info:
+                values[f'info.{key}'] = info[key]
+        if self.specs is None:
+            self._init_columns(values)
+        for name, value in values.items():
+            self._check_cast(name, value)
+        i = self._slot()
+        for name, buffer in self._buffers.items():
+            buffer[i] = values[name] if name in values else self._fills[name]
+        self.num_steps += 1
+
+    def end_episode(self):
+        start, self._episode_start = self._episode_start, None
+        if start is None or start == self.num_steps:
+            return
+        if self.path is not None:
+            self._episode_file.write(np.array([start, self.num_steps - start], dtype=np.int64).tobytes())
+        else:
+            self._episodes.append((start, self.num_steps - start))
+            # 丢弃被覆盖(部分覆盖)的episode
+            while self._episodes and self._episodes[0][0] < self.num_steps - self.capacity:
+                self._episodes.popleft()
+        self.num_episodes += 1
+
+    def _write_meta(self):
+        meta = {
+            'format_version': STORE_FORMAT_VERSION,
+            'chunk_size': self.chunk_size,
+            'num_steps': self.num_steps,
+            'num_episodes': self.num_episodes,
+            'info_keys': list(self.info_keys),
+            'columns': {name: {'shape': list(shape), 'dtype': dtype.str}
+                        for name, (shape, dtype) in (self.specs or {}).items()},
+        }
+        tmp_path = self.path / 'meta.json.tmp'
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self.path / 'meta.json')
+
+    def flush(self):
+        """Make all recorded steps and finished episodes visible to `TrajectoryReader.open` (on-disk store)"""
+        if self.path is None:
+            return
+        for buffer in self._buffers.values():
+            buffer.flush()
+        self._episode_file.flush()
+        self._write_meta()
+
+    def close(self):
+        if self.path is None or self._episode_file.closed:
+            return
+        self.flush()
+        self._episode_file.close()
+        self._buffers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_full_trajectory(self):
+        """
+        `TrajectoryReader` of the recorded episodes. For the ring buffer its arrays are views of
+        the live buffer, further recording overwrites them.
+        """
+        if self.path is not None:
+            self.flush()
+            return TrajectoryReader.open(self.path)
+        n = min(self.num_steps, self.capacity)
+        head = self.num_steps % self.capacity
+        if n == 0:
+            chunks = []
+        elif self.num_steps <= self.capacity:
+            chunks = [{name: buffer[:n] for name, buffer in self._buffers.items()}]
+        else:
+            chunks = [{name: buffer[head:] for name, buffer in self._buffers.items()},
+                      {name: buffer[:head] for name, buffer in self._buffers.items()}]
+        episodes = np.array(self._episodes, dtype=np.int64).reshape(-1, 2)
+        episodes = episodes[episodes[:, 0] >= self.num_steps - n]
+        return TrajectoryReader(chunks, episodes, first_step=self.num_steps - n)
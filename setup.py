@@ -6,7 +6,7 @@ setup(
     version='0.0.1', 
     packages=find_packages(),
     description='Reinforcement Learning Algorithms',
-    install_requires = ['torch', 'numpy', 'cfgdict', 'loguru', 'pyyaml'],
+    install_requires = ['torch', 'numpy', 'cfgdict', 'loguru', 'pyyaml', 'cloudpickle'],
     scripts=[],
     python_requires = '>=3',
     include_package_data=True,
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+import torch
+from rlearn.core.buffer import RolloutBuffer, RolloutBatch, PackedMinibatchSampler, FrameStackRolloutBuffer
+from rlearn.core.player.naive import BatchedCartPolePlayer, FrameStackPlayer
+
+
+class TestRolloutBuffer:
+    """测试RolloutBuffer的存储布局与minibatch迭代"""
+
+    def test_shared_storage(self):
+        """同dtype的字段共享一块连续存储，字段是存储的视图"""
+        buffer = RolloutBuffer(8, 2, (3,), (), obs_dtype=torch.float16,
+                               extra_fields={'terminations': ((), torch.float32)})
+        assert buffer['obs'].shape == (8, 2, 3)
+        assert buffer['obs'].dtype == torch.float16
+        assert buffer['actions'].shape == (8, 2)
+        assert buffer['terminations'].shape == (8, 2)
+        assert set(buffer.storages) == {torch.float16, torch.float32}
+        assert buffer.storages[torch.float16].numel() == 8 * 2 * 3
+        # 8个float32字段: actions, log_probs, rewards, dones, values, advantages, returns, terminations
+        assert buffer.storages[torch.float32].numel() == 8 * 8 * 2
+
+        buffer['rewards'][3] = torch.tensor([1.0, 2.0])
+        assert buffer.flat('rewards')[6:8].tolist() == [1.0, 2.0]
+        assert buffer.storages[torch.float32].sum().item() == 3.0
+        assert buffer.flat('obs').shape == (16, 3)
+
+        buffer.reset()
+        assert buffer['rewards'].sum().item() == 0.0
+
+        with pytest.raises(ValueError):
+            RolloutBuffer(8, 2, (3,), extra_fields={'rewards': ((), torch.float32)})
+
+    def test_sequential_minibatches_are_views(self):
+        buffer = RolloutBuffer(4, 3, (2,))
+        buffer['obs'].copy_(torch.arange(24, dtype=torch.float32).view(4, 3, 2))
+        batches = list(buffer.iter_minibatches(5, shuffle=False))
+        assert [len(b.obs) for b in batches] == [5, 5, 2]
+        assert isinstance(batches[0], RolloutBatch)
+        assert batches[0].obs.data_ptr() == buffer['obs'].data_ptr()
+        assert torch.equal(torch.cat([b.obs for b in batches]), buffer.flat('obs'))
+
+    def test_shuffled_minibatches(self):
+        buffer = RolloutBuffer(4, 3, (2,))
+        buffer['obs'].copy_(torch.arange(24, dtype=torch.float32).view(4, 3, 2))
+        buffer['rewards'].copy_(torch.arange(12, dtype=torch.float32).view(4, 3))
+        buffer['returns'].copy_(buffer['rewards'])
+        batches = list(buffer.iter_minibatches(4, shuffle=True, generator=torch.Generator().manual_seed(0)))
+        obs = torch.cat([b.obs for b in batches])
+        returns = torch.cat([b.returns for b in batches])
+        # 所有样本各出现一次，且字段之间保持对齐
+        assert sorted(returns.tolist()) == list(range(12))
+        assert torch.equal(obs[:, 0], returns * 2)
+
+    def test_packed_sampler(self):
+        """每个epoch打包一次，minibatch为打包缓冲区的连续切片"""
+        buffer = RolloutBuffer(4, 3, (2,), action_dtype=torch.long)
+        buffer['obs'].copy_(torch.arange(24, dtype=torch.float32).view(4, 3, 2))
+        buffer['actions'].copy_(torch.arange(12).view(4, 3))
+        sampler = PackedMinibatchSampler(buffer)
+        batches = list(sampler.iter_minibatches(5, generator=torch.Generator().manual_seed(0)))
+        assert [len(b.obs) for b in batches] == [5, 5, 2]
+        assert batches[0].obs.data_ptr() == sampler.fields['obs'].data_ptr()
+        assert batches[1].actions.is_contiguous()
+        actions = torch.cat([b.actions for b in batches])
+        assert actions.dtype == torch.long
+        assert sorted(actions.tolist()) == list(range(12))
+        assert torch.equal(torch.cat([b.obs for b in batches])[:, 0], actions.float() * 2)
+
+
+class TestFrameStackRolloutBuffer:
+    """测试按帧存储的rollout: 每帧只存一次，minibatch时按索引还原堆叠"""
+
+    def _rollout(self, steps=24, num_envs=3, k=4):
+        player = FrameStackPlayer(BatchedCartPolePlayer(num_envs, max_episode_steps=7), num_stack=k)
+        buffer = FrameStackRolloutBuffer(steps, num_envs, (k, 4))
+        obs, _ = player.reset(seed=0)
+        # 非起始状态
+        for _ in range(3):
+            obs, _, terminateds, truncateds, _ = player.step(np.zeros(num_envs, dtype=np.int64))
+        done = terminateds | truncateds
+        expected = torch.zeros((steps, num_envs, k, 4))
+        for t in range(steps):
+            buffer.set_obs(t, torch.as_tensor(obs))
+            buffer['dones'][t] = torch.as_tensor(done, dtype=torch.float32)
+            expected[t] = torch.as_tensor(obs)
+            obs, _, terminateds, truncateds, _ = player.step(np.ones(num_envs, dtype=np.int64))
+            done = terminateds | truncateds
+        assert buffer['dones'].sum() > 0
+        return buffer, expected.view(steps * num_envs, k, 4)
+
+    def test_reconstruct(self):
+        buffer, expected = self._rollout()
+        assert 'obs' not in buffer
+        assert buffer.frames.shape == (24 + 3, 3, 4)
+        indices = torch.randperm(buffer.batch_size)
+        assert torch.equal(buffer.gather('obs', indices), expected[indices])
+        batches = list(buffer.iter_minibatches(10, shuffle=False))
+        assert [len(b.obs) for b in batches] == [10] * 7 + [2]
+        assert torch.equal(torch.cat([b.obs for b in batches]), expected)
+
+    def test_packed_sampler(self):
+        buffer, expected = self._rollout()
+        buffer['returns'].copy_(torch.arange(buffer.batch_size, dtype=torch.float32).view(buffer['returns'].shape))
+        sampler = PackedMinibatchSampler(buffer)
+        assert sampler.fields['obs'].shape == (buffer.batch_size, 4, 4)
+        batches = list(sampler.iter_minibatches(16, generator=torch.Generator().manual_seed(0)))
+        obs = torch.cat([b.obs for b in batches])
+        indices = torch.cat([b.returns for b in batches]).long()
+        assert torch.equal(obs, expected[indices])
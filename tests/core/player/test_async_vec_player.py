@@ -0,0 +1,160 @@
+import time
+import multiprocessing as mp
+import numpy as np
+import pytest
+import gymnasium as gym
+from rlearn.core.player.naive.sync_vec_env import SyncVecEnvPlayer, make_vec_env_player
+from rlearn.core.player.naive.async_vec_env import AsyncVecEnvPlayer
+
+
+def make_cartpole_env():
+    """创建CartPole环境的工厂函数"""
+    return gym.make('CartPole-v1')
+
+
+class SlowStepWrapper(gym.Wrapper):
+    """模拟慢环境"""
+
+    def step(self, action):
+        time.sleep(0.3)
+        return self.env.step(action)
+
+
+def make_slow_cartpole_env():
+    return SlowStepWrapper(gym.make('CartPole-v1'))
+
+
+class TestAsyncVecEnvPlayer:
+    """测试AsyncVecEnvPlayer与SyncVecEnvPlayer的一致性"""
+
+    def test_initialization(self):
+        """测试初始化"""
+        num_envs = 3
+        env_fns = [make_cartpole_env for _ in range(num_envs)]
+
+        our_vec_env = AsyncVecEnvPlayer(env_fns)
+        sync_vec_env = SyncVecEnvPlayer(env_fns)
+        assert our_vec_env.num_envs == num_envs
+        assert not our_vec_env.is_closed
+        assert our_vec_env.single_action_space == sync_vec_env.single_action_space
+        assert our_vec_env.single_observation_space == sync_vec_env.single_observation_space
+
+        our_vec_env.close()
+        sync_vec_env.close()
+
+    def test_same_as_sync(self):
+        """测试相同seed和动作下，与SyncVecEnvPlayer（含自动重置）结果完全一致"""
+        num_envs = 3
+        env_fns = [make_cartpole_env for _ in range(num_envs)]
+
+        our_vec_env = AsyncVecEnvPlayer(env_fns)
+        sync_vec_env = SyncVecEnvPlayer(env_fns)
+
+        our_obs, our_info = our_vec_env.reset(seed=42)
+        sync_obs, sync_info = sync_vec_env.reset(seed=42)
+        np.testing.assert_array_equal(our_obs, sync_obs)
+        assert len(our_info['infos']) == num_envs
+
+        # 持续向左, 保证多次终止与自动重置
+        actions = np.zeros(num_envs, dtype=np.int64)
+        num_dones = 0
+        for _ in range(100):
+            our_out = our_vec_env.step(actions)
+            sync_out = sync_vec_env.step(actions)
+            for ours, theirs in zip(our_out[:4], sync_out[:4]):
+                np.testing.assert_array_equal(ours, theirs)
+                assert ours.dtype == theirs.dtype
+            num_dones += np.sum(our_out[2] | our_out[3])
+        assert num_dones > 0
+
+        our_vec_env.close()
+        sync_vec_env.close()
+
+    def test_no_copy_returns_shared_buffers(self):
+        """测试copy=False时返回共享内存视图"""
+        our_vec_env = AsyncVecEnvPlayer([make_cartpole_env for _ in range(2)], copy=False)
+        obs, _ = our_vec_env.reset(seed=0)
+        next_obs, rewards, _, _, _ = our_vec_env.step(np.array([0, 1]))
+        assert np.shares_memory(obs, next_obs)
+        assert rewards.shape == (2,)
+        our_vec_env.close()
+
+    def test_worker_error(self):
+        """测试子进程异常会在主进程抛出"""
+        our_vec_env = AsyncVecEnvPlayer([make_cartpole_env for _ in range(2)])
+        our_vec_env.reset()
+        with pytest.raises(RuntimeError):
+            our_vec_env.step(np.array([5, 5]))  # invalid action
+        assert our_vec_env.is_closed
+
+    def test_make_vec_env_player(self):
+        """测试make_vec_env_player函数"""
+        num_envs = 2
+        our_vec_env = make_vec_env_player(make_cartpole_env, num_envs, mode='async')
+        assert isinstance(our_vec_env, AsyncVecEnvPlayer)
+
+        obs, info = our_vec_env.reset()
+        assert obs.shape == (num_envs, 4)
+        obs, rewards, terminateds, truncateds, info = our_vec_env.step(np.array([0, 1]))
+        assert obs.shape == (num_envs, 4)
+        assert rewards.shape == (num_envs,)
+
+        our_vec_env.close()
+        assert our_vec_env.is_closed
+        # 重复关闭应该不会出错
+        our_vec_env.close()
+
+    def test_step_async_same_as_step(self):
+        """测试step_async/step_wait等价于step"""
+        num_envs = 3
+        env_fns = [make_cartpole_env for _ in range(num_envs)]
+        our_vec_env = AsyncVecEnvPlayer(env_fns)
+        sync_vec_env = SyncVecEnvPlayer(env_fns)
+        our_vec_env.reset(seed=3)
+        sync_vec_env.reset(seed=3)
+
+        actions = np.zeros(num_envs, dtype=np.int64)
+        for _ in range(30):
+            our_vec_env.step_async(actions)
+            *our_out, our_infos, env_ids = our_vec_env.step_wait()
+            sync_out = sync_vec_env.step(actions)
+            np.testing.assert_array_equal(env_ids, np.arange(num_envs))
+            assert len(our_infos['infos']) == num_envs
+            for ours, theirs in zip(our_out, sync_out[:4]):
+                np.testing.assert_array_equal(ours, theirs)
+
+        with pytest.raises(RuntimeError):
+            our_vec_env.step_wait()
+        our_vec_env.close()
+        sync_vec_env.close()
+
+    def test_step_wait_min_ready(self):
+        """测试min_ready: 慢环境不阻塞快环境"""
+        num_envs = 3
+        env_fns = [make_slow_cartpole_env] + [make_cartpole_env for _ in range(num_envs - 1)]
+        our_vec_env = AsyncVecEnvPlayer(env_fns)
+        our_vec_env.reset(seed=0)
+
+        our_vec_env.step_async(np.zeros(num_envs, dtype=np.int64))
+        obs, rewards, terminateds, truncateds, infos, env_ids = our_vec_env.step_wait(min_ready=2)
+        np.testing.assert_array_equal(env_ids, [1, 2])
+        assert obs.shape == (2, 4)
+        assert rewards.shape == (2,)
+        assert len(infos['infos']) == 2
+
+        # 快环境继续前进，慢环境仍在运行
+        with pytest.raises(RuntimeError):
+            our_vec_env.step_async(np.zeros(1, dtype=np.int64), env_ids=[0])
+        our_vec_env.step_async(np.ones(2, dtype=np.int64), env_ids=env_ids)
+        with pytest.raises(RuntimeError):
+            our_vec_env.step(np.zeros(num_envs, dtype=np.int64))
+        with pytest.raises(RuntimeError, match='reset'):
+            our_vec_env.reset()
+        *_, env_ids = our_vec_env.step_wait()
+        np.testing.assert_array_equal(env_ids, [0, 1, 2])
+
+        our_vec_env.step_async(np.zeros(1, dtype=np.int64), env_ids=[0])
+        with pytest.raises(mp.TimeoutError):
+            our_vec_env.step_wait(timeout=0.01)
+        our_vec_env.close()
+        assert our_vec_env.is_closed
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import gymnasium as gym
+from rlearn.core.player.naive.batched_classic_control import BatchedCartPolePlayer, BatchedPendulumPlayer
+
+
+class TestBatchedEnvPlayer:
+    """测试BatchedEnvPlayer参考实现与Gymnasium环境的一致性"""
+
+    def test_cartpole_dynamics(self):
+        """测试CartPole动力学与gymnasium一致"""
+        num_envs = 8
+        player = BatchedCartPolePlayer(num_envs)
+        assert player.num_envs == num_envs
+        assert player.single_observation_space == gym.make('CartPole-v1').observation_space
+        assert player.single_action_space == gym.make('CartPole-v1').action_space
+
+        obs, infos = player.reset(seed=0)
+        assert obs.shape == (num_envs, 4)
+        assert obs.dtype == np.float32
+
+        envs = [gym.make('CartPole-v1').unwrapped for _ in range(num_envs)]
+        for env, state in zip(envs, player.state):
+            env.reset()
+            env.state = state.copy()
+
+        rng = np.random.default_rng(0)
+        for _ in range(5):
+            actions = rng.integers(0, 2, size=num_envs)
+            obs, rewards, terminateds, truncateds, _ = player.step(actions)
+            for i, env in enumerate(envs):
+                ob, reward, terminated, _, _ = env.step(int(actions[i]))
+                np.testing.assert_allclose(obs[i], ob, rtol=1e-6)
+                assert rewards[i] == reward
+                assert terminateds[i] == terminated
+        player.close()
+
+    def test_cartpole_auto_reset(self):
+        """测试终止后下一步自动重置，奖励为0"""
+        player = BatchedCartPolePlayer(4)
+        player.reset(seed=1)
+        actions = np.zeros(4, dtype=np.int64)  # 持续向左
+        for _ in range(100):
+            _, _, terminateds, truncateds, _ = player.step(actions)
+            if terminateds.any():
+                break
+        assert terminateds.any()
+        ended = terminateds | truncateds
+        obs, rewards, terminateds, truncateds, _ = player.step(actions)
+        np.testing.assert_array_equal(rewards[ended], 0.0)
+        assert not terminateds[ended].any()
+        assert np.all(np.abs(obs[ended]) <= 0.05)
+        player.close()
+
+    def test_pendulum_dynamics_and_truncation(self):
+        """测试Pendulum动力学与200步截断"""
+        num_envs = 4
+        player = BatchedPendulumPlayer(num_envs)
+        player.reset(seed=2)
+
+        envs = [gym.make('Pendulum-v1').unwrapped for _ in range(num_envs)]
+        for env, state in zip(envs, player.state):
+            env.reset()
+            env.state = state.copy()
+
+        rng = np.random.default_rng(0)
+        for step in range(200):
+            actions = rng.uniform(-3, 3, size=(num_envs, 1)).astype(np.float32)
+            obs, rewards, terminateds, truncateds, _ = player.step(actions)
+            if step < 5:
+                for i, env in enumerate(envs):
+                    ob, reward, _, _, _ = env.step(actions[i])
+                    np.testing.assert_allclose(obs[i], ob, rtol=1e-5, atol=1e-6)
+                    np.testing.assert_allclose(rewards[i], reward, rtol=1e-5)
+            assert not terminateds.any()
+            assert truncateds.all() == (step == 199)
+
+        _, rewards, _, truncateds, _ = player.step(np.zeros((num_envs, 1), dtype=np.float32))
+        np.testing.assert_array_equal(rewards, 0.0)
+        assert not truncateds.any()
+        player.close()
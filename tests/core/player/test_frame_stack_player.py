@@ -0,0 +1,44 @@
+import numpy as np
+from rlearn.core.player.naive import BatchedCartPolePlayer, FrameStackPlayer
+
+
+class TestFrameStackPlayer:
+    """测试FrameStackPlayer的环形缓冲区与自动重置"""
+
+    def test_stack_and_reset(self):
+        """堆叠结果与逐步记录的最近k帧一致；重置后用第一帧填满"""
+        num_envs, k = 3, 4
+        player = FrameStackPlayer(BatchedCartPolePlayer(num_envs, max_episode_steps=10), num_stack=k)
+        assert player.num_envs == num_envs
+        assert player.single_observation_space.shape == (k, 4)
+        assert player.single_action_space == player.player.single_action_space
+
+        obs, _ = player.reset(seed=0)
+        assert obs.shape == (num_envs, k, 4)
+        history = [[obs[i, -1]] * k for i in range(num_envs)]
+        np.testing.assert_array_equal(obs, np.stack([np.stack(h) for h in history]))
+
+        rng = np.random.default_rng(0)
+        should_reset = np.zeros(num_envs, dtype=bool)
+        num_resets = 0
+        for _ in range(40):
+            obs, _, terminateds, truncateds, _ = player.step(rng.integers(0, 2, size=num_envs))
+            for i in range(num_envs):
+                if should_reset[i]:
+                    history[i] = [obs[i, -1]] * k
+                    num_resets += 1
+                else:
+                    history[i] = history[i][1:] + [obs[i, -1]]
+            np.testing.assert_array_equal(obs, np.stack([np.stack(h) for h in history]))
+            should_reset = terminateds | truncateds
+        assert num_resets > 0
+        player.close()
+        assert player.is_closed and player.player.is_closed
+
+    def test_no_copy_returns_view(self):
+        player = FrameStackPlayer(BatchedCartPolePlayer(2), num_stack=3, copy=False)
+        obs, _ = player.reset(seed=0)
+        assert np.shares_memory(obs, player._frames)
+        obs, *_ = player.step(np.zeros(2, dtype=np.int64))
+        assert np.shares_memory(obs, player._frames)
+        player.close()
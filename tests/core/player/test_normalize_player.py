@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from rlearn.core.player.naive import BatchedCartPolePlayer, NormalizeVecEnvPlayer, RunningMeanStd
+
+
+class TestRunningMeanStd:
+    """测试批量(并行)方差更新"""
+
+    def test_matches_numpy(self):
+        rng = np.random.default_rng(0)
+        batches = [rng.normal(3.0, 2.0, size=(n, 4)) for n in [1, 5, 8, 3]]
+        rms = RunningMeanStd((4,), epsilon=0.0)
+        rms.count = 0
+        for batch in batches:
+            rms.update(batch)
+        data = np.concatenate(batches)
+        np.testing.assert_allclose(rms.mean, data.mean(axis=0))
+        np.testing.assert_allclose(rms.var, data.var(axis=0))
+        assert rms.count == len(data)
+
+        normalized = rms.normalize(data)
+        assert normalized.dtype == np.float32
+        np.testing.assert_allclose(normalized, (data - data.mean(axis=0)) / data.std(axis=0), rtol=1e-5, atol=1e-5)
+
+    def test_state_dict(self):
+        rms = RunningMeanStd((2,), clip=5.0)
+        rms.update(np.array([[1.0, 2.0], [3.0, 6.0]]))
+        restored = RunningMeanStd.from_state_dict(rms.state_dict())
+        np.testing.assert_array_equal(restored.mean, rms.mean)
+        np.testing.assert_array_equal(restored.var, rms.var)
+        assert restored.count == rms.count and restored.clip == 5.0
+
+
+class TestNormalizeVecEnvPlayer:
+    """测试归一化player: 所有env共享一份统计量"""
+
+    def test_normalize_obs(self):
+        num_envs = 4
+        player = NormalizeVecEnvPlayer(BatchedCartPolePlayer(num_envs), clip_obs=10.0)
+        assert player.single_observation_space.shape == (4,)
+        raw = []
+        obs, _ = player.reset(seed=0)
+        raw.append(player.player.get_observations())
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            obs, rewards, *_ = player.step(rng.integers(0, 2, size=num_envs))
+            raw.append(player.player.get_observations())
+        assert obs.dtype == np.float32
+        data = np.concatenate(raw)
+        assert player.obs_rms.count == pytest.approx(len(data) + 1e-4)
+        np.testing.assert_allclose(player.obs_rms.mean, data.mean(axis=0), rtol=1e-4, atol=1e-6)
+        expected = np.clip((raw[-1] - player.obs_rms.mean) / np.sqrt(player.obs_rms.var + 1e-8), -10, 10)
+        np.testing.assert_allclose(obs, expected, rtol=1e-5, atol=1e-5)
+        # 不归一化reward
+        assert np.isin(rewards, [0.0, 1.0]).all()
+
+        player.training = False
+        count = player.obs_rms.count
+        player.step(np.zeros(num_envs, dtype=np.int64))
+        assert player.obs_rms.count == count
+        player.close()
+
+    def test_normalize_reward(self):
+        num_envs = 3
+        player = NormalizeVecEnvPlayer(BatchedCartPolePlayer(num_envs), norm_obs=False, norm_reward=True, gamma=0.9)
+        assert player.obs_rms is None
+        player.reset(seed=0)
+        returns = np.zeros(num_envs)
+        for _ in range(30):
+            _, rewards, terminateds, truncateds, _ = player.step(np.zeros(num_envs, dtype=np.int64))
+            returns = returns * 0.9 + player.player._rewards
+            expected = np.clip(player.player._rewards / np.sqrt(player.ret_rms.var + 1e-8), -10, 10)
+            np.testing.assert_allclose(rewards, expected, rtol=1e-6)
+            returns[terminateds | truncateds] = 0
+        np.testing.assert_allclose(player._returns, returns)
+
+        state = player.state_dict()
+        other = NormalizeVecEnvPlayer(BatchedCartPolePlayer(num_envs), norm_obs=False, norm_reward=True)
+        other.load_state_dict(state)
+        assert other.ret_rms.var == player.ret_rms.var
+        player.close()
+        other.close()
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+import gymnasium as gym
+from rlearn.core.player.naive.sync_vec_env import SyncVecEnvPlayer, make_vec_env_player
+from rlearn.core.player.naive.sharded_vec_env import ShardedVecEnvPlayer
+
+
+def make_cartpole_env():
+    """创建CartPole环境的工厂函数"""
+    return gym.make('CartPole-v1')
+
+
+class TestShardedVecEnvPlayer:
+    """测试ShardedVecEnvPlayer与SyncVecEnvPlayer的一致性"""
+
+    def test_slicing(self):
+        """测试env切分到worker"""
+        env_fns = [make_cartpole_env for _ in range(5)]
+        our_vec_env = ShardedVecEnvPlayer(env_fns, envs_per_worker=2)
+        assert our_vec_env.num_envs == 5
+        assert our_vec_env.num_workers == 3
+        our_vec_env.close()
+
+        our_vec_env = ShardedVecEnvPlayer(env_fns, num_workers=2)
+        assert our_vec_env.envs_per_worker == 3
+        assert our_vec_env.num_workers == 2
+        our_vec_env.close()
+
+        with pytest.raises(ValueError):
+            ShardedVecEnvPlayer(env_fns, envs_per_worker=2, num_workers=2)
+
+    def test_same_as_sync(self):
+        """测试相同seed和动作下，与SyncVecEnvPlayer（含自动重置）结果完全一致"""
+        num_envs = 5
+        env_fns = [make_cartpole_env for _ in range(num_envs)]
+
+        our_vec_env = ShardedVecEnvPlayer(env_fns, envs_per_worker=2)
+        sync_vec_env = SyncVecEnvPlayer(env_fns)
+
+        our_obs, our_info = our_vec_env.reset(seed=7)
+        sync_obs, _ = sync_vec_env.reset(seed=7)
+        np.testing.assert_array_equal(our_obs, sync_obs)
+        assert len(our_info['infos']) == num_envs
+
+        rng = np.random.default_rng(0)
+        for _ in range(100):
+            actions = rng.integers(0, 2, size=num_envs)
+            our_out = our_vec_env.step(actions)
+            sync_out = sync_vec_env.step(actions)
+            for ours, theirs in zip(our_out[:4], sync_out[:4]):
+                np.testing.assert_array_equal(ours, theirs)
+            assert len(our_out[4]['infos']) == num_envs
+
+        our_vec_env.close()
+        sync_vec_env.close()
+
+    def test_make_vec_env_player(self):
+        """测试make_vec_env_player函数"""
+        our_vec_env = make_vec_env_player(make_cartpole_env, 4, mode='sharded', envs_per_worker=2)
+        assert isinstance(our_vec_env, ShardedVecEnvPlayer)
+        assert our_vec_env.num_workers == 2
+
+        obs, _ = our_vec_env.reset()
+        assert obs.shape == (4, 4)
+        obs, rewards, terminateds, truncateds, _ = our_vec_env.step(np.array([0, 1, 0, 1]))
+        assert obs.shape == (4, 4)
+        assert rewards.shape == (4,)
+
+        our_vec_env.close()
+        assert our_vec_env.is_closed
@@ -214,6 +214,108 @@ class TestSyncVecEnvPlayer:
         # 重复关闭应该不会出错
         our_vec_env.close()
 
+    def test_no_copy_mode(self):
+        """测试copy=False时与默认模式结果一致，且返回双缓冲视图"""
+        num_envs = 3
+        env_fns = [make_cartpole_env for _ in range(num_envs)]
+
+        copy_vec_env = SyncVecEnvPlayer(env_fns)
+        inplace_vec_env = SyncVecEnvPlayer(env_fns, copy=False)
+
+        copy_obs, _ = copy_vec_env.reset(seed=42)
+        inplace_obs, _ = inplace_vec_env.reset(seed=42)
+        np.testing.assert_array_equal(copy_obs, inplace_obs)
+
+        actions = np.zeros(num_envs, dtype=np.int64)
+        prev_obs = None
+        for step in range(60):
+            copy_out = copy_vec_env.step(actions)
+            inplace_out = inplace_vec_env.step(actions)
+            for ours, theirs in zip(inplace_out[:4], copy_out[:4]):
+                np.testing.assert_array_equal(ours, theirs)
+            assert len(inplace_out[4]['infos']) == num_envs
+            # 上一步返回的数组在本步之后仍然有效
+            if prev_obs is not None:
+                assert not np.shares_memory(prev_obs, inplace_out[0])
+                np.testing.assert_array_equal(prev_obs, prev_copy_obs)
+            prev_obs, prev_copy_obs = inplace_out[0], copy_out[0]
+
+        copy_vec_env.close()
+        inplace_vec_env.close()
+
+    def test_collect_infos(self):
+        """测试collect_infos=False时step不构建infos"""
+        num_envs = 2
+        our_vec_env = SyncVecEnvPlayer([make_cartpole_env for _ in range(num_envs)],
+                                       copy=False, collect_infos=False)
+        our_vec_env.reset()
+        *_, infos = our_vec_env.step(np.array([0, 1]))
+        assert infos == {}
+        assert len(our_vec_env.get_infos()['infos']) == num_envs
+        our_vec_env.close()
+
+    def test_step_async(self):
+        """测试step_async/step_wait（含部分环境）与step一致"""
+        num_envs = 3
+        env_fns = [make_cartpole_env for _ in range(num_envs)]
+        our_vec_env = SyncVecEnvPlayer(env_fns)
+        ref_vec_env = SyncVecEnvPlayer(env_fns)
+        our_vec_env.reset(seed=1)
+        ref_vec_env.reset(seed=1)
+
+        actions = np.array([0, 1, 0])
+        our_vec_env.step_async(actions)
+        with pytest.raises(RuntimeError):
+            our_vec_env.step(actions)
+        with pytest.raises(RuntimeError, match='reset'):
+            our_vec_env.reset(seed=1)
+        *our_out, infos, env_ids = our_vec_env.step_wait()
+        ref_out = ref_vec_env.step(actions)
+        np.testing.assert_array_equal(env_ids, np.arange(num_envs))
+        for ours, theirs in zip(our_out, ref_out[:4]):
+            np.testing.assert_array_equal(ours, theirs)
+
+        # 只推进部分环境, env_ids按升序返回
+        our_vec_env.step_async(np.array([1, 0]), env_ids=[2, 0])
+        obs, rewards, terminateds, truncateds, infos, env_ids = our_vec_env.step_wait()
+        np.testing.assert_array_equal(env_ids, [0, 2])
+        assert obs.shape == (2, 4)
+        assert len(infos['infos']) == 2
+
+        with pytest.raises(RuntimeError):
+            our_vec_env.step_wait()
+        our_vec_env.close()
+        ref_vec_env.close()
+
+    def test_step_wait_no_copy(self):
+        """copy=False时step_wait不覆盖上一次step返回的视图"""
+        num_envs = 3
+        env_fns = [make_cartpole_env for _ in range(num_envs)]
+        our_vec_env = SyncVecEnvPlayer(env_fns, copy=False)
+        ref_vec_env = SyncVecEnvPlayer(env_fns)
+        our_vec_env.reset(seed=3)
+        ref_vec_env.reset(seed=3)
+
+        actions = np.array([0, 1, 0])
+        step_out = our_vec_env.step(actions)
+        ref_vec_env.step(actions)
+        saved = [np.copy(x) for x in step_out[:4]]
+        our_vec_env.step_async(np.array([1]), env_ids=[0])
+        our_out = our_vec_env.step_wait()
+        ref_vec_env.step_async(np.array([1]), env_ids=[0])
+        ref_out = ref_vec_env.step_wait()
+        for ours, theirs in zip(our_out[:4], ref_out[:4]):
+            np.testing.assert_array_equal(ours, theirs)
+        # 上一次step返回的视图在下一次调用之后仍然有效
+        for view, expected in zip(step_out[:4], saved):
+            np.testing.assert_array_equal(view, expected)
+
+        # 之后的step与copy模式一致(未推进的环境保留最新数据)
+        for ours, theirs in zip(our_vec_env.step(actions)[:4], ref_vec_env.step(actions)[:4]):
+            np.testing.assert_array_equal(ours, theirs)
+        our_vec_env.close()
+        ref_vec_env.close()
+
 
 if __name__ == "__main__":
     # 运行测试
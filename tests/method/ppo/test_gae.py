@@ -0,0 +1,98 @@
+import pytest
+import torch
+from rlearn.method.ppo.naive.gae import compute_gae, discount_matrix, GAE_BACKENDS
+
+gamma, gae_lambda = 0.99, 0.95
+
+
+def reference_gae(rewards, values, dones, next_value, next_done):
+    # PPOAgent 原始实现
+    steps = rewards.shape[0]
+    advantages = torch.zeros_like(rewards)
+    lastgaelam = 0
+    for t in reversed(range(steps)):
+        if t == steps - 1:
+            nextnonterminal = 1.0 - next_done
+            nextvalues = next_value
+        else:
+            nextnonterminal = 1.0 - dones[t + 1]
+            nextvalues = values[t + 1]
+        delta = rewards[t] + gamma * nextvalues * nextnonterminal - values[t]
+        advantages[t] = lastgaelam = delta + gamma * gae_lambda * nextnonterminal * lastgaelam
+    return advantages
+
+
+def make_rollout(steps=64, num_envs=4, done_prob=0.1, seed=0):
+    g = torch.Generator().manual_seed(seed)
+    rewards = torch.randn((steps, num_envs), generator=g)
+    values = torch.randn((steps, num_envs), generator=g)
+    dones = (torch.rand((steps, num_envs), generator=g) < done_prob).float()
+    next_value = torch.randn(num_envs, generator=g)
+    next_done = (torch.rand(num_envs, generator=g) < done_prob).float()
+    return rewards, values, dones, next_value, next_done
+
+
+class TestGAE:
+    """测试GAE各backend与原始循环实现一致"""
+
+    @pytest.mark.parametrize('backend', GAE_BACKENDS)
+    @pytest.mark.parametrize('done_prob', [0.0, 0.1])
+    def test_backends_match_reference(self, backend, done_prob):
+        if backend == 'numba':
+            pytest.importorskip('numba')
+        rollout = make_rollout(done_prob=done_prob)
+        expected = reference_gae(*rollout)
+        advantages, returns = compute_gae(*rollout, gamma, gae_lambda, backend=backend)
+        torch.testing.assert_close(advantages, expected, rtol=1e-5, atol=1e-5)
+        torch.testing.assert_close(returns, expected + rollout[1])
+
+    def test_truncation_bootstrap(self):
+        """截断时用最终状态的value做bootstrap，终止时不做"""
+        rewards = torch.ones((3, 1))
+        values = torch.tensor([[1.0], [2.0], [3.0]])
+        dones = torch.tensor([[0.0], [0.0], [1.0]])  # states[2] 是episode的最终状态
+        next_value = torch.tensor([5.0])
+        next_done = torch.tensor([0.0])
+
+        # 终止: delta[1] = r[1] - v[1]
+        terminations = dones.clone()
+        adv_term, _ = compute_gae(rewards, values, dones, next_value, next_done, gamma, gae_lambda,
+                                  terminations=terminations, next_termination=next_done)
+        # 截断: delta[1] = r[1] + gamma * v[2] - v[1]，但GAE链仍在episode边界断开
+        terminations = torch.zeros_like(dones)
+        adv_trunc, _ = compute_gae(rewards, values, dones, next_value, next_done, gamma, gae_lambda,
+                                   terminations=terminations, next_termination=next_done)
+
+        assert adv_term[1].item() == pytest.approx(1.0 - 2.0)
+        assert adv_trunc[1].item() == pytest.approx(1.0 + gamma * 3.0 - 2.0)
+        # 最后一步不受影响
+        assert adv_term[2].item() == pytest.approx(adv_trunc[2].item())
+        # 不传terminations时与旧行为一致(所有done视为终止)
+        adv_default, _ = compute_gae(rewards, values, dones, next_value, next_done, gamma, gae_lambda)
+        torch.testing.assert_close(adv_default, adv_term)
+
+    def test_discount_matrix(self):
+        matrix = discount_matrix(4, 0.5)
+        x = torch.ones((4, 1))
+        torch.testing.assert_close((matrix @ x).flatten(), torch.tensor([1.875, 1.75, 1.5, 1.0]))
+
+    def test_invalid_args(self):
+        rollout = make_rollout()
+        with pytest.raises(ValueError):
+            compute_gae(*rollout, gamma, gae_lambda, backend='unknown')
+        with pytest.raises(ValueError):
+            compute_gae(*rollout, gamma, gae_lambda, terminations=rollout[2])
+
+
+@pytest.mark.parametrize('cuda', [False, True])
+def test_agent_default_backend(cuda):
+    """默认后端: cpu上numpy，cuda上torchscript(不在host与device之间拷贝rollout)"""
+    if cuda and not torch.cuda.is_available():
+        pytest.skip('cuda not available')
+    from rlearn.method.ppo.naive.agent import PPOAgent
+    from rlearn.core.player.naive import BatchedCartPolePlayer
+    envs = BatchedCartPolePlayer(2)
+    agent = PPOAgent(envs, config={'cuda': cuda}, seed=0)
+    assert agent.gae_backend == ('torchscript' if cuda else 'numpy')
+    assert PPOAgent(envs, config={'cuda': cuda, 'gae_backend': 'loop'}, seed=0).gae_backend == 'loop'
+    envs.close()
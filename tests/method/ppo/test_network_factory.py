@@ -0,0 +1,52 @@
+import pytest
+import torch
+import torch.nn as nn
+import gymnasium as gym
+from rlearn.method.ppo.naive.network import (
+    make_actor_critic, register_network, NETWORKS, make_mlp, make_encoder, CNNEncoder
+)
+from rlearn.method.ppo.naive.network.discrete import ActorCritic as ActorCriticDiscrete
+
+
+class TestNetworkFactory:
+    """测试网络注册与工厂"""
+
+    def test_make_mlp(self):
+        mlp = make_mlp(4, [32, 16], 2, activation='relu', layer_norm=True)
+        assert [type(m) for m in mlp] == [nn.Linear, nn.LayerNorm, nn.ReLU, nn.Linear, nn.LayerNorm, nn.ReLU, nn.Linear]
+        assert mlp(torch.zeros(3, 4)).shape == (3, 2)
+        with pytest.raises(ValueError):
+            make_mlp(4, [32], 2, activation='unknown')
+
+    def test_default_network(self):
+        net = make_actor_critic('actor_critic', (4,), gym.spaces.Discrete(3), hidden_sizes=[32], activation='relu')
+        assert isinstance(net, ActorCriticDiscrete)
+        assert net.actor[0].out_features == 32
+        net = make_actor_critic('actor_critic', (4,), gym.spaces.Box(-1, 1, (2,)), layer_norm=True)
+        action, log_prob, _, value = net.get_action_and_value(torch.zeros(5, 4))
+        assert action.shape == (5, 2) and log_prob.shape == (5,) and value.shape == (5, 1)
+        with pytest.raises(ValueError):
+            make_actor_critic('unknown', (4,), gym.spaces.Discrete(3))
+
+    def test_cnn_encoder(self):
+        encoder, out_dim = make_encoder('cnn', (4, 84, 84))
+        assert isinstance(encoder, CNNEncoder) and out_dim == 512
+        assert make_encoder(None, (4, 3)) == (None, 12)
+        with pytest.raises(ValueError):
+            make_encoder('cnn', (84, 84))
+
+        for arch in ['separate', 'shared']:
+            net = make_actor_critic('actor_critic', (4, 84, 84), gym.spaces.Discrete(6), arch=arch,
+                                    encoder='cnn', encoder_kwargs={'out_features': 128}, hidden_sizes=[64])
+            action, _, _, value = net.get_action_and_value(torch.rand(2, 4, 84, 84))
+            assert action.shape == (2,) and value.shape == (2, 1)
+
+    def test_register_network(self):
+        @register_network('test_tiny')
+        def make_tiny(state_dim, action_space, **kwargs):
+            return ActorCriticDiscrete(state_dim, action_space.n, hidden_sizes=[8], **kwargs)
+        try:
+            net = make_actor_critic('test_tiny', (4,), gym.spaces.Discrete(2))
+            assert net.critic[0].out_features == 8
+        finally:
+            NETWORKS.pop('test_tiny')
@@ -0,0 +1,63 @@
+import pytest
+import torch
+import gymnasium as gym
+from rlearn.method.ppo.naive.network.heads import StackedMLPHeads, SharedTrunkHeads
+from rlearn.method.ppo.naive.network.discrete import ActorCritic as ActorCriticDiscrete
+from rlearn.method.ppo.naive.network.continous import ActorCritic as ActorCriticContinous
+from rlearn.method.ppo.naive.network.api import make_actor_critic
+
+
+class TestNetworkHeads:
+    """测试actor/critic批量计算的网络结构"""
+
+    def test_stacked_equals_separate_mlps(self):
+        """每个head与独立的MLP计算结果一致"""
+        torch.manual_seed(0)
+        heads = StackedMLPHeads(5, [3, 1], [0.01, 1.0])
+        x = torch.randn(7, 5)
+        outputs = heads(x)
+        assert [o.shape for o in outputs] == [(7, 3), (7, 1)]
+        for k, out in enumerate(outputs):
+            h = x
+            for i, (w, b) in enumerate(zip(heads.weights, heads.biases)):
+                h = h @ w[k] + b[k, 0]
+                if i < len(heads.weights) - 1:
+                    h = torch.tanh(h)
+            torch.testing.assert_close(out, h[:, :heads.out_dims[k]])
+        torch.testing.assert_close(heads(x, head=1), outputs[1])
+
+    def test_shared_trunk(self):
+        torch.manual_seed(0)
+        heads = SharedTrunkHeads(5, [3, 1], [0.01, 1.0])
+        x = torch.randn(7, 5)
+        logits, value = heads(x)
+        assert logits.shape == (7, 3) and value.shape == (7, 1)
+        torch.testing.assert_close(heads(x, head=1), value)
+
+    @pytest.mark.parametrize('arch', ['stacked', 'shared'])
+    def test_actor_critic_arch(self, arch):
+        torch.manual_seed(0)
+        x = torch.randn(6, 4)
+        for net in [ActorCriticDiscrete((4,), 2, arch=arch),
+                    ActorCriticContinous((4,), gym.spaces.Box(-2, 2, (2,)), arch=arch)]:
+            action, log_prob, entropy, value = net.get_action_and_value(x)
+            assert log_prob.shape == (6,) and entropy.shape == (6,) and value.shape == (6, 1)
+            torch.testing.assert_close(net.get_value(x), value)
+            _, log_prob_f, _, _ = net.get_action_and_value_fused(x, action)
+            torch.testing.assert_close(log_prob_f, log_prob)
+            (log_prob.mean() + value.mean()).backward()
+
+    @pytest.mark.parametrize('arch', ['stacked', 'shared'])
+    def test_encoder_without_hidden_layers(self, arch):
+        """图像模式默认 hidden_sizes=()，heads直接接在编码器输出上"""
+        torch.manual_seed(0)
+        net = make_actor_critic('actor_critic', (4, 84, 84), gym.spaces.Discrete(3), arch=arch,
+                                encoder='nature_cnn', hidden_sizes=())
+        x = torch.randint(0, 256, (2, 4, 84, 84), dtype=torch.uint8)
+        action, log_prob, entropy, value = net.get_action_and_value(x)
+        assert action.shape == (2,) and value.shape == (2, 1)
+        assert net.forward_actor(x).shape == (2, 3)
+
+    def test_unknown_arch(self):
+        with pytest.raises(ValueError):
+            ActorCriticDiscrete((4,), 2, arch='unknown')
@@ -0,0 +1,57 @@
+import pytest
+import torch
+import gymnasium as gym
+from rlearn.method.ppo.naive.network.discrete import ActorCritic as ActorCriticDiscrete
+from rlearn.method.ppo.naive.network.continous import ActorCritic as ActorCriticContinous
+from rlearn.method.ppo.naive.network.fused import categorical_sample
+
+
+class TestFusedPolicy:
+    """测试fused路径与torch.distributions实现一致"""
+
+    def test_discrete(self):
+        torch.manual_seed(0)
+        net = ActorCriticDiscrete((4,), 3)
+        x = torch.randn(16, 4)
+        actions = torch.randint(0, 3, (16,))
+        _, log_prob, entropy, value = net.get_action_and_value(x, actions)
+        _, log_prob_f, entropy_f, value_f = net.get_action_and_value_fused(x, actions)
+        torch.testing.assert_close(log_prob_f, log_prob)
+        torch.testing.assert_close(entropy_f, entropy)
+        torch.testing.assert_close(value_f, value)
+
+        action, log_prob, entropy, _ = net.get_action_and_value_fused(x, compute_entropy=False)
+        assert action.shape == (16,) and action.dtype == torch.long
+        assert entropy is None
+        torch.testing.assert_close(log_prob, net.get_action_and_value(x, action)[1])
+        # 批量deterministic
+        action, _, _, _ = net.get_action_and_value_fused(x, deterministic=True)
+        torch.testing.assert_close(action, net.actor(x).argmax(dim=1))
+
+    def test_discrete_sampling_distribution(self):
+        torch.manual_seed(0)
+        logits = torch.tensor([[0.0, 1.0, 2.0]])
+        samples = categorical_sample(logits.expand(20000, 3))
+        freqs = torch.bincount(samples, minlength=3).float() / 20000
+        torch.testing.assert_close(freqs, torch.softmax(logits[0], 0), atol=0.02, rtol=0)
+
+    @pytest.mark.parametrize('high', [2.0, float('inf')])
+    def test_continuous(self, high):
+        torch.manual_seed(0)
+        space = gym.spaces.Box(-high, high, (2,))
+        net = ActorCriticContinous((3,), space, rpo_alpha=0.0)
+        with torch.no_grad():
+            net.actor_logstd.fill_(-0.5)
+        x = torch.randn(16, 3)
+        actions = torch.randn(16, 2)
+        _, log_prob, entropy, value = net.get_action_and_value(x, actions)
+        action_f, log_prob_f, entropy_f, value_f = net.get_action_and_value_fused(x, actions)
+        torch.testing.assert_close(log_prob_f, log_prob)
+        torch.testing.assert_close(entropy_f, entropy)
+        torch.testing.assert_close(value_f, value)
+
+        action, log_prob, _, _ = net.get_action_and_value_fused(x)
+        assert action.shape == (16, 2)
+        torch.testing.assert_close(log_prob, net.get_action_and_value(x, action)[1])
+        # 非持久buffer不影响state_dict
+        assert 'action_low_bound' not in net.state_dict()
@@ -0,0 +1,107 @@
+import subprocess
+import sys
+import numpy as np
+import pytest
+import torch
+from rlearn.method.ppo.naive.agent import PPOAgent
+from gymnasium import spaces
+from rlearn.core.player.naive import (
+    BatchedCartPolePlayer, BatchedPendulumPlayer, BatchedEnvPlayer, NormalizeVecEnvPlayer
+)
+from rlearn.serving.runtime import load_policy, NumpyPolicy, TorchExportPolicy
+from rlearn.utils.seed import seed_all
+
+g_seed = 36
+
+
+def _agent(player, **network_kwargs):
+    seed_all(g_seed)
+    return PPOAgent(player, config={'network_kwargs': network_kwargs}, seed=g_seed)
+
+
+@pytest.mark.parametrize('player_cls', [BatchedCartPolePlayer, BatchedPendulumPlayer])
+@pytest.mark.parametrize('network_kwargs', [
+    {},
+    {'arch': 'shared', 'activation': 'relu', 'layer_norm': True},
+    {'arch': 'stacked', 'activation': 'gelu', 'hidden_sizes': [32]},
+    {'activation': 'elu'},
+])
+def test_export_npz(tmp_path, player_cls, network_kwargs):
+    """导出的NumPy策略与agent的确定性动作一致"""
+    envs = NormalizeVecEnvPlayer(player_cls(2))
+    agent = _agent(envs, **network_kwargs)
+    envs.reset(seed=0)
+    for _ in range(10):
+        envs.step(np.stack([envs.single_action_space.sample() for _ in range(2)]))
+    states = np.random.default_rng(0).normal(size=(64,) + agent.state_dim).astype(np.float32) * 2
+    expected, _ = agent.predict_batch(states, deterministic=True)
+
+    agent.export_policy(tmp_path / 'policy.npz')
+    policy = load_policy(tmp_path / 'policy.npz')
+    assert isinstance(policy, NumpyPolicy)
+    assert policy.meta['normalize_obs']
+    np.testing.assert_allclose(policy.predict(states), expected, rtol=1e-4, atol=1e-5)
+    assert np.isscalar(policy.act(states[0])) != agent.is_continuous
+    envs.close()
+
+
+@pytest.mark.parametrize('arch', ['separate', 'shared', 'stacked'])
+def test_export_torch(tmp_path, arch):
+    envs = BatchedPendulumPlayer(2)
+    agent = _agent(envs, arch=arch)
+    states = np.random.default_rng(0).normal(size=(5, 3)).astype(np.float32)
+    agent.export_policy(tmp_path / 'policy.pt2', format='torch')
+    policy = load_policy(tmp_path / 'policy.pt2')
+    assert isinstance(policy, TorchExportPolicy)
+    # 只导出actor: 没有critic的权重
+    state_dict = policy.module.state_dict()
+    assert not any('critic' in name for name in state_dict)
+    if arch == 'shared':
+        assert state_dict['net.heads.head.weight'].shape[0] == 1  # action_dim, 无value行
+    elif arch == 'stacked':
+        assert all(v.shape[0] == 1 for name, v in state_dict.items() if name.startswith('net.heads.'))
+    assert agent.actor_critic.get_value(torch.zeros(1, 3)).shape == (1, 1)  # agent的网络不受影响
+    expected, _ = agent.predict_batch(states, deterministic=True)
+    np.testing.assert_allclose(policy.predict(states), expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(policy.predict(states[:1]), expected[:1], rtol=1e-5, atol=1e-6)
+    envs.close()
+
+
+class ImagePlayer(BatchedEnvPlayer):
+    """uint8图像观测"""
+
+    def __init__(self, num_envs):
+        super().__init__(num_envs, observation_space=spaces.Box(0, 255, (36, 36, 3), dtype=np.uint8),
+                         action_space=spaces.Discrete(3))
+
+    def reset_envs(self, mask):
+        pass
+
+    def step_envs(self, actions):
+        return np.zeros(self.num_envs, dtype=np.float32), np.zeros(self.num_envs, dtype=bool)
+
+    def get_observations(self):
+        return np.zeros((self.num_envs, 36, 36, 3), dtype=np.uint8)
+
+
+def test_export_encoder(tmp_path):
+    """CNN encoder只能导出为torch program，uint8输入"""
+    envs = ImagePlayer(2)
+    agent = _agent(envs)
+    assert agent.image_obs
+    with pytest.raises(ValueError):
+        agent.export_policy(tmp_path / 'policy.npz')
+    agent.export_policy(tmp_path / 'policy.pt2', format='torch')
+    states = np.random.default_rng(0).integers(0, 256, size=(4, 36, 36, 3), dtype=np.uint8)
+    expected, _ = agent.predict_batch(states, deterministic=True)
+    np.testing.assert_array_equal(load_policy(tmp_path / 'policy.pt2').predict(states), expected)
+    with pytest.raises(ValueError):
+        agent.export_policy(tmp_path / 'policy.bin', format='pickle')
+    envs.close()
+
+
+def test_runtime_imports():
+    """runtime不导入gymnasium/tensorboard/torch"""
+    code = ('import sys; import rlearn.serving.runtime; '
+            'assert not {"gymnasium", "tensorboard", "torch"} & set(sys.modules), sorted(sys.modules)')
+    subprocess.run([sys.executable, '-c', code], check=True)
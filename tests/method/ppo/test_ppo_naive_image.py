@@ -0,0 +1,89 @@
+import numpy as np
+import torch
+from gymnasium import spaces
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.method.ppo.naive.network import make_encoder
+from rlearn.core.player.naive.batched_env import BatchedEnvPlayer
+from rlearn.core.player.naive.frame_stack import FrameStackPlayer
+from rlearn.core.buffer import FrameStackRolloutBuffer
+from rlearn.utils.seed import seed_all
+
+g_seed = 36
+
+
+class PixelPlayer(BatchedEnvPlayer):
+    """像素观测的玩具环境: 动作与图像亮度的奇偶一致时奖励1"""
+
+    def __init__(self, num_envs, shape=(36, 36, 3)):
+        super().__init__(num_envs,
+                         observation_space=spaces.Box(0, 255, shape, dtype=np.uint8),
+                         action_space=spaces.Discrete(2),
+                         max_episode_steps=16)
+        self.frames = np.zeros((num_envs,) + shape, dtype=np.uint8)
+        self.labels = np.zeros(num_envs, dtype=np.int64)
+
+    def reset_envs(self, mask):
+        self.labels[mask] = self.np_random.integers(0, 2, size=int(mask.sum()))
+        self.frames[mask] = (self.labels[mask] * 200)[:, None, None, None]
+
+    def step_envs(self, actions):
+        rewards = (actions == self.labels).astype(np.float32)
+        self.reset_envs(np.ones(self.num_envs, dtype=bool))
+        return rewards, np.zeros(self.num_envs, dtype=bool)
+
+    def get_observations(self):
+        return self.frames.copy()
+
+
+def test_nature_cnn_channels_last():
+    """HWC与CHW输入结果一致，uint8在forward中归一化"""
+    torch.manual_seed(0)
+    encoder_hwc, _ = make_encoder('nature_cnn', (36, 36, 4))
+    encoder_chw, _ = make_encoder('nature_cnn', (4, 36, 36))
+    assert encoder_hwc.channels_last and not encoder_chw.channels_last
+    encoder_chw.load_state_dict(encoder_hwc.state_dict())
+    frames = torch.randint(0, 256, (2, 36, 36, 4), dtype=torch.uint8)
+    out = encoder_hwc(frames)
+    torch.testing.assert_close(out, encoder_chw(frames.permute(0, 3, 1, 2).contiguous()))
+    torch.testing.assert_close(out, encoder_hwc(frames.float()))
+
+
+def test_ppo_image_obs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+    envs = PixelPlayer(4)
+    agent = PPOAgent(envs, config={'update_epochs': 2, 'num_minibatches': 2}, seed=g_seed)
+    info = agent.learn(2, steps_per_epoch=32, reward_window_size=5, verbose_freq=1)
+    assert agent.image_obs
+    assert agent.rollout['obs'].dtype == torch.uint8
+    assert agent.rollout['obs'].shape == (32, 4, 36, 36, 3)
+    assert info['total_steps'] == 2 * 32 * 4
+    action, _ = agent.predict(envs.get_observations()[0], deterministic=True)
+    assert action in (0, 1)
+    envs.close()
+
+
+class GrayPixelPlayer(PixelPlayer):
+    """单通道(H, W)帧，用于帧堆叠"""
+
+    def __init__(self, num_envs, shape=(36, 36)):
+        super().__init__(num_envs, shape=shape)
+
+    def reset_envs(self, mask):
+        self.labels[mask] = self.np_random.integers(0, 2, size=int(mask.sum()))
+        self.frames[mask] = (self.labels[mask] * 200)[:, None, None]
+
+
+def test_ppo_frame_stack(tmp_path, monkeypatch):
+    """帧堆叠环境自动使用按帧存储的rollout"""
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+    envs = FrameStackPlayer(GrayPixelPlayer(4), num_stack=4)
+    agent = PPOAgent(envs, config={'update_epochs': 2, 'num_minibatches': 2}, seed=g_seed)
+    info = agent.learn(2, steps_per_epoch=32, reward_window_size=5, verbose_freq=1)
+    assert agent.image_obs and agent.frame_stack_storage
+    assert isinstance(agent.rollout, FrameStackRolloutBuffer)
+    assert agent.rollout.frames.shape == (32 + 3, 4, 36, 36)
+    assert agent.rollout.frames.dtype == torch.uint8
+    assert info['total_steps'] == 2 * 32 * 4
+    envs.close()
@@ -0,0 +1,67 @@
+import numpy as np
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.core.player.naive import BatchedCartPolePlayer, NormalizeVecEnvPlayer
+from rlearn.utils.eval_agent import eval_agent_performance
+from rlearn.utils.seed import seed_all
+
+g_seed = 36
+
+
+def test_ppo_normalize_player(tmp_path, monkeypatch):
+    """归一化统计量随model_dict保存，predict用固定的统计量归一化原始观测"""
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+    envs = NormalizeVecEnvPlayer(BatchedCartPolePlayer(4), norm_reward=True)
+    agent = PPOAgent(envs, config={'update_epochs': 2, 'num_minibatches': 2}, seed=g_seed)
+    info = agent.learn(2, steps_per_epoch=64, reward_window_size=5, verbose_freq=1)
+    assert info['total_steps'] == 2 * 64 * 4
+    assert agent.obs_rms is envs.obs_rms
+    assert envs.obs_rms.count > 2 * 64 * 4
+
+    path = tmp_path / 'model.pth'
+    agent.save(path)
+    single_env = BatchedCartPolePlayer(1)
+    loaded = PPOAgent.load(path, single_env)
+    np.testing.assert_allclose(loaded.obs_rms.mean, envs.obs_rms.mean)
+    np.testing.assert_allclose(loaded.obs_rms.var, envs.obs_rms.var)
+
+    state = np.array([0.1, 0.5, -0.05, 0.2], dtype=np.float32)
+    count = loaded.obs_rms.count
+    _, info = loaded.predict(state, deterministic=True)
+    _, expected = agent.predict(state, deterministic=True)
+    assert loaded.obs_rms.count == count
+    np.testing.assert_allclose(info['values'], expected['values'], rtol=1e-5)
+    envs.close()
+    single_env.close()
+
+
+def test_eval_on_normalizing_env(tmp_path, monkeypatch):
+    """在NormalizeVecEnvPlayer上评估时不重复归一化，结果与在原始env上评估一致"""
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+    envs = NormalizeVecEnvPlayer(BatchedCartPolePlayer(4))
+    agent = PPOAgent(envs, config={'update_epochs': 1}, seed=g_seed)
+    agent.learn(2, steps_per_epoch=64, reward_window_size=5, verbose_freq=1)
+    envs.training = False
+    normalized_states = []
+    predict_batch = agent.predict_batch
+
+    def spy(states, *args, **kwargs):
+        if not kwargs.get('normalize_obs', True):
+            normalized_states.append(np.copy(states))
+        return predict_batch(states, *args, **kwargs)
+
+    monkeypatch.setattr(agent, 'predict_batch', spy)
+    raw_envs = BatchedCartPolePlayer(4)
+    on_normalized = eval_agent_performance(agent, envs, num_episodes=4, max_steps=50, vectorized=True, seed=1)
+    assert normalized_states
+    on_raw = eval_agent_performance(agent, raw_envs, num_episodes=4, max_steps=50, vectorized=True, seed=1)
+    assert sorted(on_normalized['rewards']) == sorted(on_raw['rewards'])
+    # 单个state: predict(normalize_obs=False)等价于对已归一化的state预测
+    state = np.array([0.1, 0.5, -0.05, 0.2], dtype=np.float32)
+    _, expected = agent.predict(state, deterministic=True)
+    _, info = agent.predict(agent.obs_rms.normalize(state).astype(np.float32), deterministic=True,
+                            normalize_obs=False)
+    np.testing.assert_allclose(info['values'], expected['values'], rtol=1e-5)
+    envs.close()
+    raw_envs.close()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.core.player.naive import BatchedCartPolePlayer, BatchedPendulumPlayer
+from rlearn.utils.seed import seed_all
+
+g_seed = 36
+
+
+@pytest.mark.parametrize('player_cls', [BatchedCartPolePlayer, BatchedPendulumPlayer])
+def test_predict_batch(player_cls):
+    """批量predict与逐个predict结果一致"""
+    seed_all(g_seed)
+    envs = player_cls(2)
+    agent = PPOAgent(envs, config={}, seed=g_seed)
+    states = np.random.default_rng(0).normal(size=(50,) + agent.state_dim).astype(np.float32)
+
+    actions, info = agent.predict_batch(states, deterministic=True)
+    assert info is None
+    if agent.is_continuous:
+        assert actions.shape == (50, agent.action_dim)
+    else:
+        assert actions.shape == (50,)
+
+    actions, info = agent.predict_batch(states, deterministic=True, return_info=True)
+    assert set(info) == {'log_probs', 'entropy', 'values'}
+    assert all(v.shape == (50,) for v in info.values())
+    for i in [0, 17, 49]:
+        action, single_info = agent.predict(states[i], deterministic=True)
+        np.testing.assert_allclose(action, actions[i], rtol=1e-5)
+        np.testing.assert_allclose(single_info['values'], info['values'][i:i + 1], rtol=1e-5)
+        np.testing.assert_allclose(single_info['action_probs'], info['log_probs'][i], rtol=1e-5)
+
+    actions, _ = agent.predict_batch(states)
+    assert len(actions) == 50
+    with pytest.raises(AssertionError):
+        agent.predict_batch(states[:, :1])
+    envs.close()
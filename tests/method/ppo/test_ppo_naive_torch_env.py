@@ -0,0 +1,50 @@
+import torch
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.core.player.naive.batched_classic_control import BatchedCartPolePlayer
+from rlearn.utils.seed import seed_all
+
+g_seed = 36
+
+
+class TorchCartPolePlayer(BatchedCartPolePlayer):
+    """torch-native env: reset/step返回tensor，接受tensor动作"""
+    is_torch_env = True
+
+    def reset(self, **kwargs):
+        obs, infos = super().reset(**kwargs)
+        return torch.from_numpy(obs), infos
+
+    def step(self, actions):
+        obs, rewards, terminateds, truncateds, infos = super().step(actions.cpu().numpy())
+        return (torch.from_numpy(obs), torch.from_numpy(rewards),
+                torch.from_numpy(terminateds), torch.from_numpy(truncateds), infos)
+
+
+def _learn(envs, **kwargs):
+    config = {
+        'update_epochs': 2,
+        'num_minibatches': 4,
+    }
+    config.update(kwargs)
+    agent = PPOAgent(envs, config=config, seed=g_seed)
+    info = agent.learn(3, steps_per_epoch=64, reward_window_size=5, verbose_freq=1)
+    envs.close()
+    return agent, info
+
+
+def test_ppo_torch_env(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+    agent, info = _learn(TorchCartPolePlayer(8))
+    assert agent.is_torch_env
+    assert info['total_steps'] == 3 * 64 * 8
+    assert agent.rewards.sum() > 0
+
+
+def test_ppo_pin_memory(tmp_path, monkeypatch):
+    # pin_memory只在cuda上生效，cpu时回退为普通拷贝
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+    agent, info = _learn(BatchedCartPolePlayer(8), pin_memory=True)
+    assert agent.pin_memory == (agent.device.type == 'cuda')
+    assert info['total_steps'] == 3 * 64 * 8
@@ -0,0 +1,33 @@
+import torch
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.core.player.naive.batched_classic_control import BatchedCartPolePlayer
+from rlearn.utils.seed import seed_all
+
+g_seed = 36
+
+
+def _learn(**kwargs):
+    seed_all(g_seed)
+    envs = BatchedCartPolePlayer(8)
+    envs.reset(seed=g_seed)
+    config = {
+        'update_epochs': 3,
+        'num_minibatches': 4,
+        'clip_vloss': True,
+        'autotune_ent_coef': True,
+    }
+    config.update(kwargs)
+    agent = PPOAgent(envs, config=config, seed=g_seed)
+    agent.learn(2, steps_per_epoch=64, reward_window_size=5, verbose_freq=1)
+    envs.close()
+    return agent
+
+
+def test_ppo_deferred_metrics(tmp_path, monkeypatch):
+    """deferred_metrics只改变统计量的同步方式，不改变训练结果"""
+    monkeypatch.chdir(tmp_path)
+    agent = _learn()
+    agent_deferred = _learn(deferred_metrics=True)
+    assert abs(agent.ent_coef - agent_deferred.ent_coef) < 1e-6
+    for name, param in agent.actor_critic.state_dict().items():
+        torch.testing.assert_close(param, agent_deferred.actor_critic.state_dict()[name])
@@ -0,0 +1,97 @@
+import threading
+import numpy as np
+import pytest
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.core.player.naive import BatchedCartPolePlayer
+from rlearn.serving import MicroBatchServer
+from rlearn.utils.seed import seed_all
+
+g_seed = 36
+
+
+class TestMicroBatchServer:
+    """测试并发请求合并为micro-batch，结果与逐个predict一致"""
+
+    def test_concurrent_requests(self, tmp_path):
+        seed_all(g_seed)
+        env = BatchedCartPolePlayer(1)
+        PPOAgent(env, config={}, seed=g_seed).save(tmp_path / 'model.pth')
+        server = MicroBatchServer.from_checkpoint(tmp_path / 'model.pth', env, PPOAgent,
+                                                  max_batch_size=8, max_wait_ms=20.0)
+        states = np.random.default_rng(0).normal(size=(32, 4)).astype(np.float32)
+        expected = [server.agent.predict(state, deterministic=True)[0] for state in states]
+
+        results = [None] * len(states)
+        with server:
+            def client(i):
+                results[i] = server.predict(states[i], timeout=10)
+            threads = [threading.Thread(target=client, args=(i,)) for i in range(len(states))]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert results == expected
+        assert server.num_requests == len(states)
+        assert server.num_batches < len(states)
+        env.close()
+
+    def test_errors(self):
+        env = BatchedCartPolePlayer(1)
+        server = MicroBatchServer(PPOAgent(env, config={}))
+        with pytest.raises(RuntimeError):
+            server.submit(np.zeros(4))
+        with server:
+            # 形状/类型错误的请求在submit时被拒绝
+            with pytest.raises(ValueError):
+                server.submit(np.zeros(3))
+            with pytest.raises(ValueError):
+                server.submit(np.array(['a'] * 4))
+            assert server.predict(np.zeros(4), timeout=10) in (0, 1)
+        with pytest.raises(RuntimeError):
+            server.submit(np.zeros(4))
+        env.close()
+
+    def test_failing_request_is_isolated(self):
+        """batch前向失败时逐个重试，只有出错的请求失败"""
+
+        class Agent:
+            state_dim = (2,)
+            calls = []
+
+            def predict_batch(self, states, deterministic=True):
+                self.calls.append(len(states))
+                if np.isnan(states).any():
+                    raise FloatingPointError('nan state')
+                return states.sum(axis=1), None
+
+        server = MicroBatchServer(Agent(), max_batch_size=8, max_wait_ms=200.0)
+        with server:
+            futures = [server.submit(np.array([i, np.nan if i == 2 else 1.0])) for i in range(4)]
+            results = [f.exception(timeout=10) or f.result() for f in futures]
+        assert isinstance(results[2], FloatingPointError)
+        assert [results[i] for i in (0, 1, 3)] == [1.0, 2.0, 4.0]
+        assert Agent.calls[0] > 1
+
+    def test_stop_timeout(self):
+        """worker仍在运行时stop不清除线程; 之后的请求被拒绝，停止后所有future都有结果"""
+        release = threading.Event()
+
+        class Agent:
+            state_dim = (1,)
+
+            def predict_batch(self, states, deterministic=True):
+                release.wait(10)
+                return np.zeros(len(states)), None
+
+        server = MicroBatchServer(Agent(), max_batch_size=1, max_wait_ms=0.0).start()
+        first = server.submit(np.zeros(1))
+        pending = server.submit(np.zeros(1))
+        server.stop(timeout=0.05)
+        assert server._thread is not None and server._thread.is_alive()
+        with pytest.raises(RuntimeError):
+            server.submit(np.zeros(1))
+        release.set()
+        server.stop()
+        assert server._thread is None
+        assert first.result(timeout=10) == 0.0
+        assert pending.done()
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+import torch
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.core.player.naive import BatchedCartPolePlayer, BatchedPendulumPlayer, NormalizeVecEnvPlayer
+from rlearn.serving import NumpyInferenceEngine, NumpyPolicy
+from rlearn.utils.seed import seed_all
+
+g_seed = 36
+
+
+def _export(tmp_path, player, **network_kwargs):
+    seed_all(g_seed)
+    agent = PPOAgent(player, config={'network_kwargs': network_kwargs}, seed=g_seed)
+    agent.export_policy(tmp_path / 'policy.npz')
+    return agent, NumpyPolicy(tmp_path / 'policy.npz')
+
+
+class TestNumpyInferenceEngine:
+    """测试预分配缓冲区的NumPy推理"""
+
+    @pytest.mark.parametrize('player_cls', [BatchedCartPolePlayer, BatchedPendulumPlayer])
+    @pytest.mark.parametrize('network_kwargs', [{}, {'arch': 'shared', 'layer_norm': True, 'activation': 'silu'}])
+    def test_deterministic(self, tmp_path, player_cls, network_kwargs):
+        envs = NormalizeVecEnvPlayer(player_cls(2))
+        envs.reset(seed=0)
+        agent, policy = _export(tmp_path, envs, **network_kwargs)
+        engine = NumpyInferenceEngine(policy, max_batch_size=4)
+        states = np.random.default_rng(0).normal(size=(16,) + agent.state_dim).astype(np.float32)
+        expected, _ = agent.predict_batch(states, deterministic=True)
+        np.testing.assert_allclose(engine.predict(states[:3]), expected[:3], rtol=1e-4, atol=1e-5)
+        # 超过max_batch_size时扩展缓冲区
+        np.testing.assert_allclose(engine.predict(states), expected, rtol=1e-4, atol=1e-5)
+        assert engine.max_batch_size == 16
+        np.testing.assert_allclose(engine.act(states[5]), expected[5], rtol=1e-4, atol=1e-5)
+        envs.close()
+
+    def test_sample_discrete(self, tmp_path):
+        envs = BatchedCartPolePlayer(2)
+        agent, policy = _export(tmp_path, envs)
+        # 放大输出层使动作概率不均匀
+        policy.arrays[policy.layers[-1]['name'] + '.weight'] *= 100
+        engine = NumpyInferenceEngine(policy, seed=0)
+        state = np.array([0.1, 1.0, -0.2, -1.5], dtype=np.float32)
+        logits = engine.forward(state[None])[0].copy()
+        probs = np.exp(logits - logits.max()) / np.exp(logits - logits.max()).sum()
+        actions = engine.predict(np.repeat(state[None], 20000, axis=0), deterministic=False)
+        np.testing.assert_allclose(np.bincount(actions, minlength=2) / 20000, probs, atol=0.02)
+        envs.close()
+
+    def test_sample_continuous(self, tmp_path):
+        envs = BatchedPendulumPlayer(2)
+        agent, policy = _export(tmp_path, envs)
+        with torch.no_grad():
+            agent.actor_critic.actor_logstd.fill_(np.log(0.1))
+        agent.export_policy(tmp_path / 'policy.npz')
+        engine = NumpyInferenceEngine.load(tmp_path / 'policy.npz', seed=0)
+        state = np.array([0.5, -0.5, 0.2], dtype=np.float32)
+        mean = engine.act(state)
+        actions = engine.predict(np.repeat(state[None], 20000, axis=0), deterministic=False)
+        assert actions.shape == (20000, 1) and actions.dtype == np.float32
+        assert np.abs(actions.mean() - mean[0]) < 0.01
+        assert np.abs(actions.std() - 0.1) < 0.01
+        envs.close()
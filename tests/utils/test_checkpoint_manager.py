@@ -0,0 +1,135 @@
+import threading
+from pathlib import Path
+import pytest
+import torch
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.core.player.naive import BatchedCartPolePlayer
+from rlearn.utils.checkpoint_manager import CheckpointManager, snapshot_to_cpu
+from rlearn.utils.seed import seed_all
+from rlearn.logger import user_logger
+
+g_seed = 36
+
+
+class TestCheckpointManager:
+    """测试后台检查点写入与保留策略"""
+
+    def test_snapshot_is_a_copy(self):
+        state = {'w': torch.ones(3), 'nested': [torch.zeros(2), 1], 'name': 'x'}
+        snapshot = snapshot_to_cpu(state)
+        state['w'] += 1
+        state['nested'][0] += 1
+        assert torch.equal(snapshot['w'], torch.ones(3))
+        assert torch.equal(snapshot['nested'][0], torch.zeros(2))
+        assert snapshot['nested'][1] == 1 and snapshot['name'] == 'x'
+
+    def test_write_atomic_and_snapshot_time(self, tmp_path):
+        with CheckpointManager(tmp_path) as manager:
+            w = torch.zeros(4)
+            path = manager.save('a.pth', {'w': w})
+            w += 1  # 提交后修改不影响写入的内容
+            manager.wait()
+            assert manager.latest == path
+        assert torch.equal(torch.load(path)['w'], torch.zeros(4))
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['a.pth']
+
+    def test_keep_last_and_best(self, tmp_path):
+        manager = CheckpointManager(tmp_path, keep_last=2, keep_best=1)
+        for i, metric in enumerate([5.0, 9.0, 1.0, 2.0, 3.0]):
+            manager.save(f'c{i}.pth', {'i': i}, metric=metric)
+        manager.close()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['c1.pth', 'c3.pth', 'c4.pth']
+        assert manager.best == tmp_path / 'c1.pth'
+        assert manager.latest == tmp_path / 'c4.pth'
+
+    def test_save_does_not_wait_for_write(self, tmp_path, monkeypatch):
+        release = threading.Event()
+        write = CheckpointManager._write
+
+        def slow_write(path, state_dict):
+            release.wait(5)
+            write(path, state_dict)
+
+        monkeypatch.setattr(CheckpointManager, '_write', staticmethod(slow_write))
+        manager = CheckpointManager(tmp_path, max_pending=2)
+        manager.save('a.pth', {'i': 0})
+        manager.save('b.pth', {'i': 1})
+        assert manager.latest is None
+        release.set()
+        manager.close()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['a.pth', 'b.pth']
+
+    def test_write_error_is_raised(self, tmp_path):
+        (tmp_path / 'file').write_text('')
+        manager = CheckpointManager(tmp_path / 'file' / 'sub')
+        manager.save('a.pth', {'i': 0})
+        with pytest.raises(RuntimeError):
+            manager.wait()
+        manager.close()
+
+
+def test_learn_checkpoint_freq(tmp_path, monkeypatch):
+    """每跨过checkpoint_freq个episode只保存一次"""
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+    envs = BatchedCartPolePlayer(4)
+    agent = PPOAgent(envs, config={'update_epochs': 1}, seed=g_seed)
+    saved = []
+    manager = CheckpointManager(tmp_path / 'ckpt', keep_last=2)
+    save = manager.save
+    monkeypatch.setattr(manager, 'save', lambda name, *args, **kwargs: saved.append(name) or save(name, *args, **kwargs))
+    info = agent.learn(6, steps_per_epoch=16, reward_window_size=1000, max_episodes_without_improvement=None,
+                       checkpoint_freq=5, checkpoint_manager=manager)
+    manager.close()
+    episodes = [int(name[len('checkpoint_episode_'):-len('.pth')]) for name in saved]
+    assert episodes and len(set(episodes)) == len(episodes)
+    assert len(episodes) == len({e // 5 for e in episodes})
+    assert len(episodes) <= info['total_episode'] // 5
+    assert len(list((tmp_path / 'ckpt').iterdir())) == min(2, len(episodes))
+    envs.close()
+
+
+def test_learn_checkpoint_dict_override(tmp_path, monkeypatch):
+    """learn通过检查点管理器保存checkpoint_dict()"""
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+
+    class MyAgent(PPOAgent):
+        def checkpoint_dict(self):
+            return dict(super().checkpoint_dict(), extra=1)
+
+    envs = BatchedCartPolePlayer(4)
+    agent = MyAgent(envs, config={'update_epochs': 1}, seed=g_seed)
+    manager = CheckpointManager(tmp_path / 'ckpt')
+    agent.learn(4, steps_per_epoch=16, reward_window_size=1000, max_episodes_without_improvement=None,
+                checkpoint_freq=5, checkpoint_manager=manager)
+    manager.close()
+    assert manager.latest is not None
+    assert torch.load(manager.latest)['extra'] == 1
+    envs.close()
+
+
+def test_learn_save_checkpoint_override(tmp_path, monkeypatch):
+    """重写的save_checkpoint(path)(已弃用)仍被调用并给出警告"""
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+    warnings = []
+    sink = user_logger.add(warnings.append, level='WARNING')
+
+    class MyAgent(PPOAgent):
+        saved = []
+
+        def save_checkpoint(self, path):
+            self.saved.append(path)
+            super().save_checkpoint(path)
+
+    envs = BatchedCartPolePlayer(4)
+    agent = MyAgent(envs, config={'update_epochs': 1}, seed=g_seed)
+    agent.learn(4, steps_per_epoch=16, reward_window_size=1000, max_episodes_without_improvement=None,
+                checkpoint_freq=5, checkpoint_dir=str(tmp_path / 'ckpt'))
+    assert MyAgent.saved
+    assert all(Path(path).exists() for path in MyAgent.saved)
+    assert all(Path(path).parent == tmp_path / 'ckpt' for path in MyAgent.saved)
+    user_logger.remove(sink)
+    assert len([m for m in warnings if 'save_checkpoint' in m]) == 1
+    envs.close()
@@ -0,0 +1,79 @@
+import numpy as np
+import gymnasium as gym
+from rlearn.utils.eval_agent import eval_agent_performance
+from rlearn.core.player.naive import SyncVecEnvPlayer
+
+
+class CountdownEnv(gym.Env):
+    """第k次reset后的episode长度为5+k，第t步奖励为t"""
+    observation_space = gym.spaces.Box(-1, 1, (1,), dtype=np.float32)
+    action_space = gym.spaces.Discrete(2)
+
+    def __init__(self):
+        self.num_resets = 0
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self.length = 5 + self.num_resets
+        self.num_resets += 1
+        self.t = 0
+        return np.zeros(1, dtype=np.float32), {}
+
+    def step(self, action):
+        self.t += 1
+        return np.zeros(1, dtype=np.float32), float(self.t), self.t >= self.length, False, {}
+
+
+class ConstantAgent:
+
+    def __init__(self):
+        self.num_batches = 0
+
+    def predict(self, state, deterministic=True):
+        return 0, {}
+
+    def predict_batch(self, states, deterministic=True):
+        self.num_batches += 1
+        return np.zeros(len(states), dtype=np.int64), None
+
+
+def _returns(length):
+    return float(sum(range(1, length + 1)))
+
+
+class TestEvalAgent:
+    """测试向量化评估: 每个env完成固定数量的episode，结果与逐个运行一致"""
+
+    def test_vectorized(self):
+        agent = ConstantAgent()
+        info = eval_agent_performance(agent, CountdownEnv, num_episodes=6, max_steps=100,
+                                      vectorized=True, num_envs=3)
+        # 每个env运行2个episode: 长度5, 6
+        assert sorted(info['rewards']) == sorted([_returns(5), _returns(6)] * 3)
+        assert info['test_episodes'] == 6
+        assert info['average_episode_length'] == 5.5
+        # 包含auto-reset步: 5 + 1 + 6
+        assert agent.num_batches == 12
+
+        sequential = eval_agent_performance(agent, CountdownEnv(), num_episodes=2, max_steps=100)
+        assert sequential['rewards'] == [_returns(5), _returns(6)]
+
+    def test_max_steps(self):
+        agent = ConstantAgent()
+        info = eval_agent_performance(agent, CountdownEnv, num_episodes=7, max_steps=5,
+                                      vectorized=True, num_envs=2)
+        assert info['rewards'] == [_returns(5)] * 7
+
+        # 传入的player不会被截断: 超过max_steps的episode被记录后跳过，直到env自身结束
+        player = SyncVecEnvPlayer([CountdownEnv, CountdownEnv])
+        info = eval_agent_performance(agent, player, num_episodes=5, max_steps=5, vectorized=True)
+        assert info['rewards'] == [_returns(5)] * 5
+        assert not player.is_closed
+        assert [env.num_resets for env in player.envs] == [3, 3]
+        player.close()
+
+    def test_process_pool(self):
+        agent = ConstantAgent()
+        info = eval_agent_performance(agent, CountdownEnv, num_episodes=4, max_steps=100,
+                                      vectorized=True, num_envs=2, mode='async')
+        assert sorted(info['rewards']) == sorted([_returns(5), _returns(6)] * 2)
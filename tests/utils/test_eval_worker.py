@@ -0,0 +1,93 @@
+import gymnasium as gym
+import pytest
+import torch
+from rlearn.method.ppo.naive.agent import PPOAgent
+from rlearn.core.player.naive import BatchedCartPolePlayer
+from rlearn.utils.eval_worker import EvalWorker
+from rlearn.utils.seed import seed_all
+
+g_seed = 36
+
+
+def make_env():
+    return gym.make('CartPole-v1')
+
+
+class TestEvalWorker:
+    """测试后台评估进程"""
+
+    def test_submit_and_best(self, tmp_path):
+        envs = BatchedCartPolePlayer(2)
+        agent = PPOAgent(envs, config={}, seed=g_seed)
+        worker = EvalWorker(make_env, eval_freq=2, num_episodes=4, max_steps=50, num_envs=2,
+                            target_eval_reward=1e9, max_evals_without_improvement=1,
+                            best_checkpoint_file=tmp_path / 'best.pth', max_pending=2)
+        assert not worker.should_eval(0) and worker.should_eval(1)
+        worker.start(agent, log_dir=str(tmp_path / 'runs'))
+        assert worker.submit(0, 100, agent)
+        # 第二个快照: 权重置零后策略变化
+        with torch.no_grad():
+            for p in agent.actor_critic.parameters():
+                p.zero_()
+        assert worker.submit(1, 200, agent)
+        assert not worker.submit(2, 300, agent)
+        worker.close(wait=True)
+
+        assert [r['epoch'] for r in worker.results] == [0, 1]
+        assert all(0 < r['average_reward'] <= 50 for r in worker.results)
+        best = max(worker.results, key=lambda r: r['average_reward'])
+        assert worker.best_eval_reward == best['average_reward']
+        assert (tmp_path / 'best.pth').exists()
+        best_dict = torch.load(tmp_path / 'best.pth')
+        assert 'optimizer' not in best_dict
+        assert PPOAgent.load(tmp_path / 'best.pth', envs).actor_critic is not None
+        assert any(p.name.startswith('events') for p in (tmp_path / 'runs').iterdir())
+        should_exit, reason = worker.should_exit()
+        assert should_exit == (worker.evals_without_improvement >= 1)
+        envs.close()
+
+
+def test_learn_with_evaluator(tmp_path, monkeypatch):
+    """训练不等待评估，learn结束时收集已提交的评估结果"""
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+    envs = BatchedCartPolePlayer(4)
+    agent = PPOAgent(envs, config={'update_epochs': 1}, seed=g_seed)
+    worker = EvalWorker(make_env, eval_freq=1, num_episodes=2, max_steps=20, target_eval_reward=0.0,
+                        best_checkpoint_file='checkpoints/best_eval.pth', wait_at_exit=True)
+    max_epochs = 4
+    info = agent.learn(max_epochs, steps_per_epoch=64, reward_window_size=5, verbose_freq=1, evaluator=worker)
+    assert 1 <= len(info['eval_results']) <= max_epochs
+    assert info['best_eval_reward'] > 0
+    assert (tmp_path / 'checkpoints' / 'best_eval.pth').exists()
+    # 评估结果到达时间不确定: 若在训练中到达则提前结束
+    if info['exit_reason'] == 'eval_reward_threshold_reached':
+        assert info['total_steps'] < max_epochs * 64 * 4
+    assert worker.should_exit() == (True, 'eval_reward_threshold_reached')
+    envs.close()
+
+
+def test_learn_failure_closes_evaluator(tmp_path, monkeypatch):
+    """训练出错时也停止评估进程(不等待未完成的评估)与检查点写入"""
+    monkeypatch.chdir(tmp_path)
+    seed_all(g_seed)
+    envs = BatchedCartPolePlayer(4)
+    agent = PPOAgent(envs, config={'update_epochs': 1}, seed=g_seed)
+    worker = EvalWorker(make_env, eval_freq=1, num_episodes=2, max_steps=20, wait_at_exit=True)
+    calls = []
+    select_action = agent.select_action
+
+    def failing_select_action(*args, **kwargs):
+        calls.append(1)
+        if len(calls) > 40:
+            raise KeyError('boom')
+        return select_action(*args, **kwargs)
+
+    monkeypatch.setattr(agent, 'select_action', failing_select_action)
+    with pytest.raises(KeyError, match='boom'):
+        agent.learn(10, steps_per_epoch=16, reward_window_size=1000, max_episodes_without_improvement=None,
+                    evaluator=worker, checkpoint_freq=1, checkpoint_dir=str(tmp_path / 'ckpt'))
+    assert worker._process is None
+    assert list((tmp_path / 'ckpt').iterdir())
+    assert not list((tmp_path / 'ckpt').glob('*.tmp'))
+    envs.close()
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from rlearn.utils.recorder import TrajectoryRecorder, CompactTrajectoryRecorder, Step
+
+
+def record(recorder, episode_lengths):
+    for i, length in enumerate(episode_lengths):
+        state = np.array([100.0 * i, 0.0], dtype=np.float32)
+        recorder.start_episode(state)
+        for t in range(length):
+            next_state = state + 1
+            recorder.record_step(state, t % 2, next_state, float(t), t == length - 1, False,
+                                 {'lives': i, 'frame': np.zeros(8)})
+            state = next_state
+        recorder.end_episode()
+
+
+class TestCompactTrajectoryRecorder:
+    """测试数组存储的轨迹记录器"""
+
+    def test_same_as_trajectory_recorder(self):
+        lengths = [3, 40, 0, 5]  # 40步触发多次扩容
+        reference, compact = TrajectoryRecorder(), CompactTrajectoryRecorder()
+        record(reference, lengths)
+        record(compact, lengths)
+        expected, episodes = reference.get_full_trajectory(), compact.get_full_trajectory()
+        assert len(episodes) == len(expected) == 4
+        for episode, ref in zip(episodes, expected):
+            assert np.array_equal(episode.initial_state, ref.initial_state)
+            assert len(episode.steps) == len(ref.steps)
+            for step, ref_step in zip(episode.steps, ref.steps):
+                assert isinstance(step, Step)
+                assert np.array_equal(step.state, ref_step.state)
+                assert np.array_equal(step.next_state, ref_step.next_state)
+                assert (step.action, step.reward, step.done, step.truncated) == \
+                    (ref_step.action, ref_step.reward, ref_step.done, ref_step.truncated)
+                assert step.info['lives'] == ref_step.info['lives'] and 'frame' in step.info
+
+    def test_views_and_info_keys(self):
+        recorder = CompactTrajectoryRecorder(info_keys=['lives'])
+        record(recorder, [3, 4])
+        episodes = recorder.get_full_trajectory()
+        episode = episodes[-1]
+        assert episode.rewards.tolist() == [0.0, 1.0, 2.0, 3.0]
+        assert episode.states.shape == (4, 2) and episode.states.dtype == np.float32
+        assert episode.dones.tolist() == [False, False, False, True]
+        assert episode.info('lives').tolist() == [1] * 4
+        assert episode.steps[-1].info == {'lives': 1}
+        assert recorder._infos == []
+        assert [len(e.steps) for e in episodes[:]] == [3, 4]
+        with pytest.raises(IndexError):
+            episodes[2]
+
+    def test_views_follow_growth(self):
+        recorder = CompactTrajectoryRecorder(info_keys=())
+        record(recorder, [2])
+        episodes = recorder.get_full_trajectory()
+        record(recorder, [2, 100])
+        assert len(episodes) == 3
+        assert episodes[0].rewards.tolist() == [0.0, 1.0]
+        assert len(episodes[2].steps) == 100
+
+    def test_dtypes_are_not_truncated(self):
+        """int first reward / info value followed by floats"""
+        recorder = CompactTrajectoryRecorder(info_keys=['x'])
+        recorder.start_episode(0)
+        recorder.record_step(0, 0, 1, 0, 0, 0, {})
+        recorder.record_step(1, 1, 2, 0.75, 1, 0, {'x': 0.5})
+        for t in range(40):  # 扩容后仍保留加宽的dtype
+            recorder.record_step(2 + t, 0, 3 + t, 0.25, 0, 0, {'x': 1.5})
+        recorder.end_episode()
+        episode = recorder.get_full_trajectory()[0]
+        assert episode.rewards.dtype == np.float64
+        assert episode.rewards[:3].tolist() == [0.0, 0.75, 0.25]
+        assert episode.dones.dtype == np.bool_ and episode.dones[:2].tolist() == [False, True]
+        assert episode.info('x')[:3].tolist() == [0.0, 0.5, 1.5]
+        assert episode.steps[1].reward == 0.75
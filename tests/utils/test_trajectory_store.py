@@ -0,0 +1,119 @@
+import multiprocessing as mp
+import numpy as np
+import pytest
+from rlearn.utils.trajectory_store import TrajectoryStore, TrajectoryReader
+
+
+def record(store, episode_lengths, state_dim=3):
+    """episode i, step t: state = 100 * i + t"""
+    for i, length in enumerate(episode_lengths):
+        state = np.full(state_dim, 100 * i, dtype=np.float32)
+        store.start_episode(state)
+        for t in range(length):
+            next_state = state + 1
+            store.record_step(state, t % 2, next_state, 1.0, t == length - 1, False,
+                              {'lives': i, 'ignored': object()})
+            state = next_state
+        store.end_episode()
+
+
+def check_episode(episode, i, length):
+    assert np.array_equal(episode['state'][:, 0], 100 * i + np.arange(length))
+    assert np.array_equal(episode['next_state'][:, 0], 100 * i + np.arange(1, length + 1))
+    assert np.array_equal(episode['action'], np.arange(length) % 2)
+    assert episode['done'].tolist() == [False] * (length - 1) + [True]
+    assert np.all(episode['info.lives'] == i)
+
+
+def _read_in_subprocess(path, queue):
+    reader = TrajectoryReader.open(path)
+    queue.put((reader.num_steps, len(reader), float(reader.read('reward').sum())))
+
+
+class TestTrajectoryStore:
+    """测试列式轨迹存储"""
+
+    def test_disk_store_chunks(self, tmp_path):
+        lengths = [3, 7, 1, 6]
+        with TrajectoryStore(tmp_path / 'traj', chunk_size=4, info_keys=['lives']) as store:
+            record(store, lengths)
+        reader = TrajectoryReader.open(tmp_path / 'traj')
+        assert reader.num_steps == sum(lengths) and len(reader) == len(lengths)
+        assert sorted(reader.columns) == ['action', 'done', 'info.lives', 'next_state', 'reward', 'state', 'truncated']
+        chunk = next(reader.iter_chunks())
+        assert chunk['state'].shape == (4, 3) and chunk['state'].dtype == np.float32
+        assert chunk['reward'].dtype == np.float32 and chunk['done'].dtype == np.bool_
+        assert isinstance(chunk['state'], np.memmap)
+        assert [len(c['reward']) for c in reader.iter_chunks(['reward'])] == [4, 4, 4, 4, 1]
+        for i, (episode, length) in enumerate(zip(reader, lengths)):
+            check_episode(episode, i, length)
+        assert reader.episode(1, ['reward'])['reward'].tolist() == [1.0] * 7
+
+    def test_disk_store_flush_and_reopen(self, tmp_path):
+        store = TrajectoryStore(tmp_path / 'traj', chunk_size=4)
+        record(store, [3, 2])
+        assert TrajectoryReader.open(tmp_path / 'traj').num_steps == 0
+        store.flush()
+        # 其它进程可读取已flush的数据
+        queue = mp.get_context('spawn').Queue()
+        process = mp.get_context('spawn').Process(target=_read_in_subprocess, args=(str(tmp_path / 'traj'), queue))
+        process.start()
+        assert queue.get(timeout=60) == (5, 2, 5.0)
+        process.join()
+        reader = store.get_full_trajectory()
+        assert len(reader) == 2
+        store.close()
+        with pytest.raises(FileExistsError):
+            TrajectoryStore(tmp_path / 'traj')
+
+    def test_ring_buffer(self):
+        store = TrajectoryStore(capacity=10, info_keys=['lives'])
+        record(store, [4, 5])
+        reader = store.get_full_trajectory()
+        assert reader.num_steps == 9 and len(reader) == 2
+        check_episode(reader[1], 1, 5)
+
+        record(store, [4, 3])  # 前两个episode (steps 0-8) 被部分覆盖而丢弃
+        reader = store.get_full_trajectory()
+        assert reader.num_steps == 10 and reader.first_step == 6
+        assert len(reader) == 2
+        episode = reader[0]
+        assert np.array_equal(episode['state'][:, 0], 100 * 0 + np.arange(4))
+        episode = reader[1]
+        assert np.array_equal(episode['state'][:, 0], 100 * 1 + np.arange(3))
+        assert store.num_episodes == 4
+
+    def test_ring_buffer_memory_is_bounded(self):
+        store = TrajectoryStore(capacity=100)
+        record(store, [50] * 40)
+        assert store._buffers['state'].shape == (100, 3)
+        reader = store.get_full_trajectory()
+        assert reader.num_steps == 100 and len(reader) == 2
+
+    def test_dtypes_and_lossy_casts(self, tmp_path):
+        """info列默认float64(缺失为NaN)，有损转换报错而不是截断"""
+        with TrajectoryStore(tmp_path / 'traj', chunk_size=4, info_keys=['x', 'lives'],
+                             dtypes={'state': np.uint8, 'info.lives': np.int32}) as store:
+            store.start_episode(np.zeros(2))
+            store.record_step(np.zeros(2, np.uint8), 0, np.ones(2), 0, False, False, {})
+            store.record_step(np.ones(2, np.uint8), 1, np.ones(2), 0.75, True, False, {'x': 0.5, 'lives': 3})
+            with pytest.raises(ValueError, match="column 'action'"):
+                store.record_step(np.ones(2, np.uint8), 0.5, np.ones(2), 0.0, False, False, {})
+            with pytest.raises(ValueError, match="column 'info.lives'"):
+                store.record_step(np.ones(2, np.uint8), 1, np.ones(2), 0.0, False, False, {'lives': 2.5})
+            with pytest.raises(ValueError, match="column 'state'"):
+                store.record_step(np.ones(2), 1, np.ones(2), 0.0, False, False, {})
+            store.end_episode()
+        episode = TrajectoryReader.open(tmp_path / 'traj')[0]
+        assert episode['state'].dtype == np.uint8
+        assert episode['reward'].tolist() == [0.0, 0.75]
+        assert episode['info.x'].dtype == np.float64
+        assert np.isnan(episode['info.x'][0]) and episode['info.x'][1] == 0.5
+        assert episode['info.lives'].dtype == np.int32 and episode['info.lives'].tolist() == [0, 3]
+        assert episode['action'].tolist() == [0, 1]
+
+    def test_requires_path_or_capacity(self, tmp_path):
+        with pytest.raises(ValueError):
+            TrajectoryStore()
+        with pytest.raises(ValueError):
+            TrajectoryStore(tmp_path, capacity=10)